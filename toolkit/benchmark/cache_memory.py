@@ -0,0 +1,44 @@
+# coding:utf-8
+
+import os
+import tracemalloc
+
+from psutil import Process
+
+from xkits import CachePool
+
+ITEMS: int = 100000
+
+
+def memory_info(process: Process):
+    memory_info = process.memory_info()
+    print(f"VMS (Virtual Memory Size)\t{memory_info.vms / 1024 / 1024:.2f} MB\t{memory_info.vms}")  # noqa:E501
+    print(f"RSS (Resident Set Size)  \t{memory_info.rss / 1024 / 1024:.2f} MB\t{memory_info.rss}")  # noqa:E501
+
+
+def fill(lifetime: float):
+    tracemalloc.start()
+    pool: CachePool[int, int] = CachePool(lifetime=lifetime)
+    before: int = tracemalloc.get_traced_memory()[0]
+    for index in range(ITEMS):
+        pool.put(index, index)
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"lifetime={lifetime}\t{(after - before) / ITEMS:.1f} bytes per item")  # noqa:E501
+
+
+def main():
+    pid: int = os.getpid()
+    print(f"Hello, PID {pid}")
+    process: Process = Process(pid)
+    print("Before fill:")
+    memory_info(process)
+    fill(lifetime=0)
+    fill(lifetime=3600)
+    print("After fill:")
+    memory_info(process)
+    print("Goodbye!")
+
+
+if __name__ == "__main__":
+    main()
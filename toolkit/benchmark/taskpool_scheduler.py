@@ -0,0 +1,48 @@
+# coding:utf-8
+
+from threading import Event
+from time import perf_counter
+from typing import List
+from typing import Type
+
+from xkits import TaskPool
+from xkits import TaskScheduler
+from xkits import WorkStealingScheduler
+
+JOBS: int = 10000  # per producer
+
+
+def tiny() -> None:
+    pass
+
+
+def fanout(tasker: TaskPool, done: Event) -> None:
+    for _ in range(JOBS):
+        tasker.submit_task(tiny)
+    done.set()
+
+
+def throughput(scheduler: Type[TaskScheduler], workers: int) -> float:
+    with TaskPool(workers=workers, scheduler=scheduler) as tasker:
+        start: float = perf_counter()
+        producers: List[Event] = [Event() for _ in range(workers)]
+        for done in producers:  # jobs are submitted from the workers
+            tasker.submit_task(fanout, tasker, done)
+        for done in producers:
+            done.wait()
+        tasker.shutdown()
+        return workers * JOBS / (perf_counter() - start)
+
+
+def main():
+    print("workers\tqueue\twork stealing")
+    for workers in (1, 2, 4, 8, 16):
+        results = (
+            throughput(TaskScheduler, workers),
+            throughput(WorkStealingScheduler, workers),
+        )
+        print(f"{workers}\t" + "\t".join(f"{ops:.0f}" for ops in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,25 +13,66 @@ from xkits.cache import CacheExpired  # noqa:F401
 from xkits.cache import CacheItem  # noqa:F401
 from xkits.cache import CacheLookupError  # noqa:F401
 from xkits.cache import CacheMiss  # noqa:F401
+from xkits.cache import CachePolicy  # noqa:F401
 from xkits.cache import CachePool  # noqa:F401
+from xkits.cache import FIFOPolicy  # noqa:F401
 from xkits.cache import ItemPool  # noqa:F401
+from xkits.cache import LFUPolicy  # noqa:F401
+from xkits.cache import LRUPolicy  # noqa:F401
 from xkits.cache import NamedCache  # noqa:F401
+from xkits.cache import SLRUPolicy  # noqa:F401
+from xkits.cache import ShardedCachePool  # noqa:F401
+from xkits.cache import cached  # noqa:F401
+from xkits.cachestats import CacheStatistics  # noqa:F401
 from xkits.colorful import Back  # noqa:F401
 from xkits.colorful import Fore  # noqa:F401
 from xkits.colorful import Style  # noqa:F401
 from xkits.colorful import color  # noqa:F401,H306
+from xkits.coroutine import AsyncTaskJob  # noqa:F401
+from xkits.coroutine import AsyncTaskPool  # noqa:F401
+from xkits.coroutine import run_job  # noqa:F401
+from xkits.coroutine import run_task  # noqa:F401
+from xkits.diskcache import DiskCache  # noqa:F401
+from xkits.diskcache import TieredCachePool  # noqa:F401
 from xkits.executor import hourglass  # noqa:F401
+from xkits.lock import LockProfiler  # noqa:F401
+from xkits.lock import LockStats  # noqa:F401
+from xkits.lock import NamedLock  # noqa:F401
+from xkits.lock import NamedRWLock  # noqa:F401
+from xkits.lock import ProfiledLock  # noqa:F401
+from xkits.lock import ProfiledRWLock  # noqa:F401
+from xkits.lock import RWLock  # noqa:F401
+from xkits.lock import lock_profiler  # noqa:F401
 from xkits.logger import Logger  # noqa:F401
+from xkits.meter import ClockSource  # noqa:F401
 from xkits.meter import CountMeter  # noqa:F401
 from xkits.meter import DownMeter  # noqa:F401
+from xkits.meter import FakeClock  # noqa:F401
+from xkits.meter import HdrHistogramMeter  # noqa:F401
+from xkits.meter import HistogramMeter  # noqa:F401
+from xkits.meter import LocalCountMeter  # noqa:F401
+from xkits.meter import RateMeter  # noqa:F401
 from xkits.meter import StatusCountMeter  # noqa:F401
+from xkits.meter import TDigestMeter  # noqa:F401
 from xkits.meter import TimeMeter  # noqa:F401
 from xkits.meter import TimeUnit  # noqa:F401
 from xkits.meter import TsCountMeter  # noqa:F401
+from xkits.meter import WindowCountMeter  # noqa:F401
 from xkits.parser import argp  # noqa:F401
+from xkits.process import ProcessTaskJob  # noqa:F401
+from xkits.process import ProcessTaskPool  # noqa:F401
+from xkits.process import SharedBytes  # noqa:F401
 from xkits.safefile import safile  # noqa:F401
 from xkits.safefile import stfile  # noqa:F401
 from xkits.scanner import scanner  # noqa:F401
+from xkits.scheduler import CronSchedule  # noqa:F401
+from xkits.scheduler import DaemonSchedule  # noqa:F401
+from xkits.scheduler import DaemonScheduler  # noqa:F401
+from xkits.scheduler import IntervalSchedule  # noqa:F401
+from xkits.scheduler import PriorityScheduler  # noqa:F401
+from xkits.scheduler import TaskScheduler  # noqa:F401
+from xkits.scheduler import TaskTimer  # noqa:F401
+from xkits.scheduler import WorkStealingScheduler  # noqa:F401
 from xkits.sheet import cell  # noqa:F401
 from xkits.sheet import csv  # noqa:F401
 from xkits.sheet import form  # noqa:F401
@@ -45,11 +86,14 @@ from xkits.sitepage import PageCache  # noqa:F401
 from xkits.sitepage import ProxyProtocol  # noqa:F401
 from xkits.sitepage import ProxySession  # noqa:F401
 from xkits.sitepage import Site  # noqa:F401
+from xkits.taskmetrics import TaskMetrics  # noqa:F401
+from xkits.thread import Backpressure  # noqa:F401
 from xkits.thread import DaemonTaskJob  # noqa:F401
 from xkits.thread import DelayTaskJob  # noqa:F401
-from xkits.thread import NamedLock  # noqa:F401
 from xkits.thread import TaskJob  # noqa:F401
 from xkits.thread import TaskPool  # noqa:F401
+from xkits.thread import TaskRegistry  # noqa:F401
 from xkits.thread import ThreadPool  # noqa:F401
+from xkits.thread import as_completed  # noqa:F401
 from xkits.utils import chdir  # noqa:F401
 from xkits.utils import singleton  # noqa:F401
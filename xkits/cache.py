@@ -1,14 +1,32 @@
 # coding:utf-8
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from functools import wraps
+from heapq import heapify
+from heapq import heappop
+from heapq import heappush
+from inspect import iscoroutinefunction
+from itertools import count
 from threading import Lock
+from threading import Thread
 from typing import Any
+from typing import Callable
 from typing import Dict
 from typing import Generic
 from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import TypeVar
 
+from xkits.cachestats import CacheStatistics
+from xkits.lock import lock_profiler
+from xkits.meter import ClockSource
 from xkits.meter import DownMeter
+from xkits.meter import TimeMeter
 from xkits.meter import TimeUnit
 
 
@@ -31,9 +49,11 @@ CADT = TypeVar("CADT")
 
 class CacheAtom(DownMeter, Generic[CADT]):
     '''Data cache without name'''
+    __slots__ = ("__data",)
 
-    def __init__(self, data: CADT, lifetime: TimeUnit = 0):
-        super().__init__(lifetime=lifetime)
+    def __init__(self, data: CADT, lifetime: TimeUnit = 0,
+                 source: Optional[ClockSource] = None):
+        super().__init__(lifetime=lifetime, source=source)
         self.__data: CADT = data
 
     def __str__(self) -> str:
@@ -44,6 +64,10 @@ class CacheAtom(DownMeter, Generic[CADT]):
         self.__data = data
         self.renew()
 
+    def peek(self) -> CADT:
+        '''cache data regardless of expiration'''
+        return self.__data
+
     @property
     def data(self) -> CADT:
         return self.__data
@@ -58,6 +82,7 @@ CDT = TypeVar("CDT")
 
 class CacheData(CacheAtom[CDT]):
     '''Data cache with enforces expiration check'''
+    __slots__ = ()
 
     @property
     def data(self) -> CDT:
@@ -76,9 +101,11 @@ NCDT = TypeVar("NCDT")
 
 class NamedCache(CacheAtom[NCDT], Generic[NCNT, NCDT]):
     '''Named data cache'''
+    __slots__ = ("__name",)
 
-    def __init__(self, name: NCNT, data: NCDT, lifetime: TimeUnit = 0):
-        super().__init__(data, lifetime)
+    def __init__(self, name: NCNT, data: NCDT, lifetime: TimeUnit = 0,
+                 source: Optional[ClockSource] = None):
+        super().__init__(data, lifetime, source)
         self.__name: NCNT = name
 
     def __str__(self) -> str:
@@ -95,9 +122,11 @@ CIDT = TypeVar("CIDT")
 
 class CacheItem(NamedCache[CINT, CIDT]):
     '''Named data cache with enforces expiration check'''
+    __slots__ = ()
 
-    def __init__(self, name: CINT, data: CIDT, lifetime: TimeUnit = 0):
-        super().__init__(name, data, lifetime)
+    def __init__(self, name: CINT, data: CIDT, lifetime: TimeUnit = 0,
+                 source: Optional[ClockSource] = None):
+        super().__init__(name, data, lifetime, source)
 
     @property
     def data(self) -> CIDT:
@@ -110,32 +139,250 @@ class CacheItem(NamedCache[CINT, CIDT]):
         super().update(data)
 
 
+EPKT = TypeVar("EPKT")
+
+
+class CachePolicy(Generic[EPKT]):
+    '''Cache eviction policy, all operations are O(1)'''
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, index: EPKT) -> bool:
+        raise NotImplementedError
+
+    def admit(self, index: EPKT) -> None:
+        '''record a new index'''
+        raise NotImplementedError
+
+    def access(self, index: EPKT) -> None:
+        '''record a hit on the index'''
+        raise NotImplementedError
+
+    def discard(self, index: EPKT) -> None:
+        '''forget the index'''
+        raise NotImplementedError
+
+    def victim(self) -> EPKT:
+        '''select the index to evict'''
+        raise NotImplementedError
+
+
+class FIFOPolicy(CachePolicy[EPKT]):
+    '''First in, first out'''
+
+    def __init__(self):
+        self.__queue: Dict[EPKT, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__queue)
+
+    def __contains__(self, index: EPKT) -> bool:
+        return index in self.__queue
+
+    @property
+    def queue(self) -> Dict[EPKT, None]:
+        return self.__queue
+
+    def admit(self, index: EPKT) -> None:
+        self.queue[index] = None
+
+    def access(self, index: EPKT) -> None:
+        pass
+
+    def discard(self, index: EPKT) -> None:
+        self.queue.pop(index, None)
+
+    def victim(self) -> EPKT:
+        try:
+            return next(iter(self.queue))
+        except StopIteration as exc:
+            raise CacheMiss("victim") from exc
+
+
+class LRUPolicy(FIFOPolicy[EPKT]):
+    '''Least recently used'''
+
+    def access(self, index: EPKT) -> None:
+        if index in self.queue:
+            self.queue.move_to_end(index)  # type: ignore
+
+
+class LFUPolicy(CachePolicy[EPKT]):
+    '''Least frequently used, ties are broken by least recently used
+
+    Non-empty frequency buckets are kept in a doubly linked list from the
+    minimum frequency up, so the minimum is always known.
+    '''
+
+    def __init__(self):
+        self.__counts: Dict[EPKT, int] = {}
+        self.__buckets: Dict[int, Dict[EPKT, None]] = {}
+        self.__lower: Dict[int, int] = {}  # next lower frequency, 0 if none
+        self.__higher: Dict[int, int] = {}  # next higher, 0 if none
+        self.__minimum: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__counts)
+
+    def __contains__(self, index: EPKT) -> bool:
+        return index in self.__counts
+
+    def frequency(self, index: EPKT) -> int:
+        return self.__counts.get(index, 0)
+
+    def __unlink(self, index: EPKT, freq: int) -> None:
+        bucket: Dict[EPKT, None] = self.__buckets[freq]
+        del bucket[index]
+        if len(bucket) == 0:
+            del self.__buckets[freq]
+            lower: int = self.__lower.pop(freq)
+            higher: int = self.__higher.pop(freq)
+            if lower > 0:
+                self.__higher[lower] = higher
+            else:
+                self.__minimum = higher
+            if higher > 0:
+                self.__lower[higher] = lower
+
+    def __link(self, index: EPKT, freq: int, lower: int) -> None:
+        '''link index at freq, after the non-empty lower frequency or 0'''
+        self.__counts[index] = freq
+        if freq not in self.__buckets:
+            higher: int = self.__higher[lower] if lower > 0 else self.__minimum  # noqa:E501
+            self.__buckets[freq] = OrderedDict()
+            self.__lower[freq] = lower
+            self.__higher[freq] = higher
+            if lower > 0:
+                self.__higher[lower] = freq
+            else:
+                self.__minimum = freq
+            if higher > 0:
+                self.__lower[higher] = freq
+        self.__buckets[freq][index] = None
+
+    def admit(self, index: EPKT) -> None:
+        if index in self.__counts:
+            return self.access(index)
+        self.__link(index, 1, 0)
+        return None
+
+    def access(self, index: EPKT) -> None:
+        if index in self.__counts:
+            freq: int = self.__counts[index]
+            self.__link(index, freq + 1, freq)
+            self.__unlink(index, freq)
+
+    def discard(self, index: EPKT) -> None:
+        if index in self.__counts:
+            self.__unlink(index, self.__counts.pop(index))
+
+    def victim(self) -> EPKT:
+        if len(self.__buckets) == 0:
+            raise CacheMiss("victim")
+        return next(iter(self.__buckets[self.__minimum]))
+
+
+class SLRUPolicy(CachePolicy[EPKT]):
+    '''Segmented LRU, new indexes are probationary until hit again
+
+    One-shot scans only churn the probation segment, so the frequently
+    used indexes in the protected segment survive them.
+    '''
+
+    def __init__(self, protected: float = 0.8):
+        if not 0.0 < protected < 1.0:
+            raise ValueError(f"protected ratio({protected}) must be between 0 and 1")  # noqa:E501
+        self.__ratio: float = protected
+        self.__probation: Dict[EPKT, None] = OrderedDict()
+        self.__protected: Dict[EPKT, None] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__probation) + len(self.__protected)
+
+    def __contains__(self, index: EPKT) -> bool:
+        return index in self.__probation or index in self.__protected
+
+    @property
+    def probation(self) -> Dict[EPKT, None]:
+        return self.__probation
+
+    @property
+    def protected(self) -> Dict[EPKT, None]:
+        return self.__protected
+
+    def admit(self, index: EPKT) -> None:
+        if index in self:
+            return self.access(index)
+        self.probation[index] = None
+        return None
+
+    def access(self, index: EPKT) -> None:
+        if index in self.protected:
+            self.protected.move_to_end(index)  # type: ignore
+        elif index in self.probation:
+            del self.probation[index]
+            self.protected[index] = None
+            if len(self.protected) > max(int(len(self) * self.__ratio), 1):
+                demote: EPKT = next(iter(self.protected))
+                del self.protected[demote]
+                self.probation[demote] = None
+
+    def discard(self, index: EPKT) -> None:
+        self.probation.pop(index, None)
+        self.protected.pop(index, None)
+
+    def victim(self) -> EPKT:
+        for segment in (self.probation, self.protected):
+            if len(segment) > 0:
+                return next(iter(segment))
+        raise CacheMiss("victim")
+
+
 IPKT = TypeVar("IPKT")
 IPVT = TypeVar("IPVT")
 
 
-class ItemPool(Generic[IPKT, IPVT]):
+class ItemPool(Generic[IPKT, IPVT]):  # noqa: E501, pylint: disable=too-many-instance-attributes
     '''Cache item pool'''
-
-    def __init__(self, lifetime: TimeUnit = 0):
+    REAP_BATCH: int = 8  # expired items reaped by each put
+
+    def __init__(self, lifetime: TimeUnit = 0, capacity: int = 0,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 maxweight: int = 0, sizer: Optional[Callable[[IPVT], int]] = None,  # noqa:E501
+                 policy: Optional[CachePolicy[IPKT]] = None,
+                 source: Optional[ClockSource] = None):
+        bounded: bool = capacity > 0 or maxweight > 0
+        self.__source: Optional[ClockSource] = source
         self.__pool: Dict[IPKT, CacheItem[IPKT, IPVT]] = {}
+        self.__weights: Dict[IPKT, int] = {}
         self.__lifetime: float = float(lifetime)
-        self.__intlock: Lock = Lock()  # internal lock
+        self.__stale: float = 0.0
+        self.__capacity: int = max(capacity, 0)
+        self.__maxweight: int = max(maxweight, 0)
+        self.__weight: int = 0
+        self.__sizer: Callable[[IPVT], int] = sizer or (lambda _: 1)
+        self.__policy: Optional[CachePolicy[IPKT]] = LRUPolicy() if policy is None and bounded else policy  # noqa:E501
+        self.__deadlines: List[Tuple[float, int, IPKT]] = []  # min-heap
+        self.__scheduled: Dict[IPKT, float] = {}  # valid heap deadlines
+        self.__sequence: Iterator[int] = count()  # heap tie breaker
+        self.__statistics: CacheStatistics = CacheStatistics()
+        self.__intlock: Lock = lock_profiler().lock(f"{type(self).__name__}.intlock")  # noqa:E501
 
     def __str__(self) -> str:
         return f"cache item pool at {id(self)}"
 
     def __len__(self) -> int:
-        with self.__intlock:
-            return len(self.__pool)
+        return len(self.__pool)  # atomic under the GIL
 
     def __iter__(self) -> Iterator[IPKT]:
         with self.__intlock:
-            return iter(self.__pool.keys())
+            return iter(list(self.__pool.keys()))
 
     def __contains__(self, index: IPKT) -> bool:
-        with self.__intlock:
-            return index in self.__pool
+        return index in self.__pool  # atomic under the GIL
 
     def __setitem__(self, index: IPKT, value: IPVT) -> None:
         return self.put(index, value)
@@ -154,23 +401,178 @@ class ItemPool(Generic[IPKT, IPVT]):
     def lifetime(self, lifetime: TimeUnit) -> None:
         self.__lifetime = float(lifetime)
 
+    @property
+    def source(self) -> Optional[ClockSource]:
+        '''clock source of items, None means the TimeMeter default'''
+        return self.__source
+
+    @property
+    def stale(self) -> float:
+        '''grace period in which expired items are kept before reaping'''
+        return self.__stale
+
+    @stale.setter
+    def stale(self, stale: TimeUnit) -> None:
+        self.__stale = max(float(stale), 0.0)
+
+    @property
+    def capacity(self) -> int:
+        '''maximum number of items, 0 means unlimited'''
+        return self.__capacity
+
+    @property
+    def maxweight(self) -> int:
+        '''maximum total weight of items, 0 means unlimited'''
+        return self.__maxweight
+
+    @property
+    def weight(self) -> int:
+        '''total weight of items measured by sizer'''
+        return self.__weight
+
+    @property
+    def policy(self) -> Optional[CachePolicy[IPKT]]:
+        '''eviction policy, None means unbounded'''
+        return self.__policy
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        return self.__statistics
+
+    @property
+    def overflow(self) -> bool:
+        return 0 < self.capacity < len(self.__pool) or 0 < self.maxweight < self.weight  # noqa:E501
+
+    def __remove(self, index: IPKT) -> None:
+        del self.__pool[index]
+        self.__weight -= self.__weights.pop(index, 0)
+        self.__scheduled.pop(index, None)
+        if self.policy is not None:
+            self.policy.discard(index)
+
+    def __evict(self) -> List[CacheItem[IPKT, IPVT]]:
+        assert self.policy is not None
+        evicted: List[CacheItem[IPKT, IPVT]] = []
+        while self.overflow:
+            index: IPKT = self.policy.victim()
+            evicted.append(self.__pool[index])
+            self.__remove(index)
+            self.statistics.evict()
+        return evicted
+
+    def __deadline(self, item: CacheItem[IPKT, IPVT]) -> float:
+        deadline: float = item.deadline
+        return deadline + self.stale if deadline > 0.0 else deadline
+
+    def __schedule(self, index: IPKT, item: CacheItem[IPKT, IPVT]) -> None:
+        deadline: float = self.__deadline(item)
+        if deadline <= 0.0:
+            self.__scheduled.pop(index, None)
+            return
+
+        self.__scheduled[index] = deadline
+        heappush(self.__deadlines, (deadline, next(self.__sequence), index))
+        if len(self.__deadlines) > 2 * len(self.__scheduled) + 64:
+            # drop heap entries of overwritten or deleted items
+            self.__deadlines = [entry for entry in self.__deadlines
+                                if self.__scheduled.get(entry[2]) == entry[0]]  # noqa:E501
+            heapify(self.__deadlines)
+
+    def __reap(self, limit: int) -> int:
+        reaped: int = 0
+        heap: List[Tuple[float, int, IPKT]] = self.__deadlines
+        while len(heap) > 0 and (limit <= 0 or reaped < limit):
+            deadline, _, index = heap[0]
+            if self.__scheduled.get(index) != deadline:
+                heappop(heap)  # stale entry
+                continue
+
+            item: CacheItem[IPKT, IPVT] = self.__pool[index]
+            if not item.expired or item.runtime <= item.lifetime + self.stale:  # noqa:E501
+                if self.__deadline(item) == deadline:
+                    break  # the earliest deadline is not reached
+                heappop(heap)  # item is renewed
+                self.__schedule(index, item)
+                continue
+
+            heappop(heap)
+            self.__remove(index)
+            reaped += 1
+        self.statistics.expire(reaped)
+        return reaped
+
+    def reap(self, limit: int = 0) -> int:
+        '''remove expired items in deadline order, return the number removed
+
+        Each put already reaps a few expired items, call this periodically
+        (e.g. from a daemon job) to keep an idle pool clean as well.
+        '''
+        with self.__intlock:
+            return self.__reap(limit)
+
     def put(self, index: IPKT, value: IPVT, lifetime: Optional[TimeUnit] = None) -> None:  # noqa:E501
         life = lifetime if lifetime is not None else self.lifetime
-        item = CacheItem(index, value, life)
+        item = CacheItem(index, value, life, self.source)
+        if self.policy is None:
+            with self.__intlock:
+                self.__pool[index] = item
+                self.__schedule(index, item)
+                self.__reap(self.REAP_BATCH)
+            return
+
+        weight: int = self.__sizer(value) if self.maxweight > 0 else 1
         with self.__intlock:
+            if index in self.__pool:
+                self.__weight -= self.__weights[index]
+                self.policy.access(index)
+            else:
+                self.policy.admit(index)
             self.__pool[index] = item
+            self.__weights[index] = weight
+            self.__weight += weight
+            self.__schedule(index, item)
+            self.__reap(self.REAP_BATCH)
+            evicted: List[CacheItem[IPKT, IPVT]] = self.__evict()
+        for victim in evicted:
+            self.evicted(victim)
+
+    def evicted(self, item: CacheItem[IPKT, IPVT]) -> None:
+        '''called outside the lock with each item evicted by the policy'''
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''statistics with current size and weight'''
+        return {"size": len(self), "weight": self.weight,
+                **self.statistics.snapshot()}
 
     def get(self, index: IPKT) -> CacheItem[IPKT, IPVT]:
-        with self.__intlock:
+        try:
+            item: CacheItem[IPKT, IPVT] = self.lookup(index)
+        except CacheMiss:
+            self.statistics.miss()
+            raise
+        self.statistics.hit()
+        return item
+
+    def lookup(self, index: IPKT) -> CacheItem[IPKT, IPVT]:
+        '''same as get without counting statistics'''
+        if self.policy is None:  # lock-free read, dict lookup is atomic
             try:
                 return self.__pool[index]
             except KeyError as exc:
                 raise CacheMiss(index) from exc
 
+        with self.__intlock:
+            try:
+                item = self.__pool[index]
+            except KeyError as exc:
+                raise CacheMiss(index) from exc
+            self.policy.access(index)
+            return item
+
     def delete(self, index: IPKT) -> None:
         with self.__intlock:
             if index in self.__pool:
-                del self.__pool[index]
+                self.__remove(index)
 
 
 CPIT = TypeVar("CPIT")
@@ -178,10 +580,29 @@ CPVT = TypeVar("CPVT")
 
 
 class CachePool(ItemPool[CPIT, CPVT]):
-    '''Named data cache pool'''
-
-    def __init__(self, lifetime: TimeUnit = 0):
-        super().__init__(lifetime=lifetime)
+    '''Named data cache pool
+
+    With refresh > 0, get_or_load reloads an item in background once its
+    downtime falls below refresh seconds. With stale > 0, get_or_load keeps
+    serving an expired item for up to stale seconds while it is reloaded
+    in background. Background loads run on the executor if given, else on
+    a daemon thread.
+    '''
+
+    def __init__(self, lifetime: TimeUnit = 0, capacity: int = 0,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 maxweight: int = 0, sizer: Optional[Callable[[CPVT], int]] = None,  # noqa:E501
+                 policy: Optional[CachePolicy[CPIT]] = None,
+                 refresh: TimeUnit = 0, stale: TimeUnit = 0,
+                 executor: Optional[Executor] = None,
+                 source: Optional[ClockSource] = None):
+        super().__init__(lifetime=lifetime, capacity=capacity, maxweight=maxweight,  # noqa:E501
+                         sizer=sizer, policy=policy, source=source)
+        self.__flights: Dict[CPIT, Future] = {}  # in-flight loaders
+        self.__failures: ItemPool[CPIT, Exception] = ItemPool(source=source)
+        self.__fltlock: Lock = Lock()  # in-flight loaders lock
+        self.__executor: Optional[Executor] = executor
+        self.__refresh: float = max(float(refresh), 0.0)
+        self.stale = stale
 
     def __str__(self) -> str:
         return f"cache pool at {id(self)}"
@@ -189,10 +610,310 @@ class CachePool(ItemPool[CPIT, CPVT]):
     def __getitem__(self, index: CPIT) -> CPVT:
         return self.get(index)
 
+    @property
+    def refresh(self) -> float:
+        '''reload ahead when downtime falls below it, 0 means disabled'''
+        return self.__refresh
+
+    @refresh.setter
+    def refresh(self, refresh: TimeUnit) -> None:
+        self.__refresh = max(float(refresh), 0.0)
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        '''executor for background loads'''
+        return self.__executor
+
     def get(self, index: CPIT) -> CPVT:
         try:
-            return super().get(index).data
+            item: CacheItem[CPIT, CPVT] = self.lookup(index)
+            data: CPVT = item.data
         except CacheExpired as exc:
-            super().delete(index)
-            assert index not in self
+            self.delete(index)  # subclasses drop their other copies
+            self.statistics.expire()
+            self.statistics.miss()
             raise CacheMiss(index) from exc
+        except CacheMiss:
+            self.statistics.miss()
+            raise
+        self.statistics.hit()
+        return data
+
+    def __call(self, loader: Callable[[], CPVT]) -> CPVT:
+        timer: TimeMeter = TimeMeter(source=self.source)
+        success: bool = False
+        try:
+            value: CPVT = loader()
+            success = True
+            return value
+        finally:
+            self.statistics.load(success, timer.runtime)
+
+    def __takeoff(self, index: CPIT) -> Tuple[Future, bool]:
+        '''join the in-flight loader of index, or become its leader'''
+        with self.__fltlock:
+            flight: Optional[Future] = self.__flights.get(index)
+            if flight is not None:
+                return flight, False
+            flight = self.__flights[index] = Future()
+            return flight, True
+
+    def __load(self, index: CPIT, flight: Future, loader: Callable[[], CPVT],  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+               lifetime: Optional[TimeUnit], error_lifetime: TimeUnit,
+               reload: bool) -> CPVT:
+        try:
+            try:  # another leader may have finished before us
+                if reload:
+                    raise CacheMiss(index)
+                value: CPVT = self.lookup(index).data
+            except CacheLookupError:
+                value = self.__call(loader)
+                self.put(index, value, lifetime)
+                self.__failures.delete(index)
+            flight.set_result(value)
+            return value
+        except BaseException as error:  # complete followers on interrupts
+            if error_lifetime > 0 and isinstance(error, Exception):
+                self.__failures.put(index, error, error_lifetime)
+            flight.set_exception(error)
+            raise
+        finally:
+            with self.__fltlock:
+                del self.__flights[index]
+
+    def __reload(self, index: CPIT, loader: Callable[[], CPVT],
+                 lifetime: Optional[TimeUnit], error_lifetime: TimeUnit) -> None:  # noqa:E501
+        flight, leader = self.__takeoff(index)
+        if not leader:
+            return
+
+        def background() -> None:
+            try:
+                self.__load(index, flight, loader, lifetime, error_lifetime, True)  # noqa:E501
+            except Exception:  # pylint: disable=broad-exception-caught
+                pass  # stale data is served until the item is reaped
+
+        try:
+            if self.executor is not None:
+                self.executor.submit(background)
+            else:
+                Thread(target=background, daemon=True).start()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            flight.set_exception(error)  # e.g. executor is shut down
+            with self.__fltlock:
+                del self.__flights[index]
+
+    def get_or_load(self, index: CPIT, loader: Callable[[], CPVT],
+                    lifetime: Optional[TimeUnit] = None,
+                    error_lifetime: TimeUnit = 0) -> CPVT:
+        '''get data from cache, or load and put it on miss
+
+        Only one loader runs per index at a time, concurrent callers wait
+        for its result. The loader's exception is raised to all of them,
+        and is cached for error_lifetime seconds if it is greater than 0.
+        '''
+        try:
+            item: CacheItem[CPIT, CPVT] = self.lookup(index)
+        except CacheMiss:
+            pass
+        else:
+            if not item.expired:
+                if 0.0 < item.downtime < self.refresh:
+                    self.__reload(index, loader, lifetime, error_lifetime)
+                self.statistics.hit()
+                return item.peek()
+            if item.runtime <= item.lifetime + self.stale:
+                self.__reload(index, loader, lifetime, error_lifetime)
+                self.statistics.hit()
+                return item.peek()
+        self.statistics.miss()
+
+        try:
+            error: Exception = self.__failures.get(index).data
+        except CacheLookupError:
+            pass
+        else:
+            raise error
+
+        flight, leader = self.__takeoff(index)
+        if not leader:
+            return flight.result()
+        return self.__load(index, flight, loader, lifetime, error_lifetime, False)  # noqa:E501
+
+
+SCPK = TypeVar("SCPK")
+SCPV = TypeVar("SCPV")
+
+
+class ShardedCachePool(Generic[SCPK, SCPV]):
+    '''Named data cache pool striped across independently locked shards'''
+
+    def __init__(self, shards: int = 16, lifetime: TimeUnit = 0,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 capacity: int = 0, maxweight: int = 0,
+                 sizer: Optional[Callable[[SCPV], int]] = None,
+                 policy: Optional[Callable[[], CachePolicy[SCPK]]] = None,
+                 source: Optional[ClockSource] = None):
+        number: int = max(shards, 1)
+        self.__shards: Tuple[CachePool[SCPK, SCPV], ...] = tuple(
+            CachePool(lifetime=lifetime,
+                      capacity=-(-capacity // number) if capacity > 0 else 0,
+                      maxweight=-(-maxweight // number) if maxweight > 0 else 0,  # noqa:E501
+                      sizer=sizer, policy=policy() if policy else None,
+                      source=source)
+            for _ in range(number))
+
+    def __str__(self) -> str:
+        return f"sharded cache pool at {id(self)}"
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def __iter__(self) -> Iterator[SCPK]:
+        for shard in self.shards:
+            yield from shard
+
+    def __contains__(self, index: SCPK) -> bool:
+        return index in self.shard(index)
+
+    def __setitem__(self, index: SCPK, value: SCPV) -> None:
+        return self.put(index, value)
+
+    def __getitem__(self, index: SCPK) -> SCPV:
+        return self.get(index)
+
+    def __delitem__(self, index: SCPK) -> None:
+        return self.delete(index)
+
+    @property
+    def shards(self) -> Tuple[CachePool[SCPK, SCPV], ...]:
+        return self.__shards
+
+    @property
+    def lifetime(self) -> float:
+        return self.shards[0].lifetime
+
+    @lifetime.setter
+    def lifetime(self, lifetime: TimeUnit) -> None:
+        for shard in self.shards:
+            shard.lifetime = lifetime
+
+    @property
+    def weight(self) -> int:
+        return sum(shard.weight for shard in self.shards)
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        '''merged statistics of all shards, call reset() to reset shards'''
+        statistics: CacheStatistics = CacheStatistics()
+        for shard in self.shards:
+            statistics.merge(shard.statistics)
+        return statistics
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"size": len(self), "weight": self.weight,
+                **self.statistics.snapshot()}
+
+    def reset(self) -> None:
+        '''reset statistics of all shards'''
+        for shard in self.shards:
+            shard.statistics.reset()
+
+    def shard(self, index: SCPK) -> CachePool[SCPK, SCPV]:
+        '''the shard which holds the index'''
+        return self.__shards[hash(index) % len(self.__shards)]
+
+    def reap(self, limit: int = 0) -> int:
+        return sum(shard.reap(limit) for shard in self.shards)
+
+    def put(self, index: SCPK, value: SCPV, lifetime: Optional[TimeUnit] = None) -> None:  # noqa:E501
+        return self.shard(index).put(index, value, lifetime)
+
+    def get(self, index: SCPK) -> SCPV:
+        return self.shard(index).get(index)
+
+    def get_or_load(self, index: SCPK, loader: Callable[[], SCPV],
+                    lifetime: Optional[TimeUnit] = None,
+                    error_lifetime: TimeUnit = 0) -> SCPV:
+        return self.shard(index).get_or_load(index, loader, lifetime, error_lifetime)  # noqa:E501
+
+    def delete(self, index: SCPK) -> None:
+        return self.shard(index).delete(index)
+
+
+class KeywordMark():
+    '''Separator of positional and keyword arguments in cached keys
+
+    All marks are equal and pickle to the same bytes, so keys can be
+    stored in a disk cache.
+    '''
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, KeywordMark)
+
+    def __hash__(self) -> int:
+        return hash(KeywordMark.__name__)
+
+    def __repr__(self) -> str:
+        return "KeywordMark()"
+
+
+def cached(pool: Optional[Any] = None, lifetime: Optional[TimeUnit] = None,
+           key: Optional[Callable[..., Any]] = None, capacity: int = 0):
+    '''Memoize a function or coroutine function in a cache pool
+
+    The cache key is built by key(*args, **kwargs), by default from the
+    positional and keyword arguments, which must then be hashable. Without
+    a pool a new CachePool with lifetime and capacity is created. Loads
+    are single-flight, concurrent calls for the same key wait for one load.
+    The pool is available as the pool attribute of the decorated function.
+    '''
+    def default_key(*args, **kwargs) -> Any:
+        return args + (KeywordMark(),) + tuple(sorted(kwargs.items())) if kwargs else args  # noqa:E501
+
+    def target(index: Any) -> CachePool:
+        return cache.shard(index) if isinstance(cache, ShardedCachePool) else cache  # noqa:E501
+
+    cache: Any = pool if pool is not None else CachePool(
+        lifetime=lifetime if lifetime is not None else 0, capacity=capacity)
+    keyfunc: Callable[..., Any] = key if key is not None else default_key
+
+    def decorator(fn):
+        if iscoroutinefunction(fn):
+            flights: Dict[Tuple[int, Any], "asyncio.Future"] = {}
+
+            async def load(index: Any, args, kwargs) -> Any:
+                timer: TimeMeter = TimeMeter(source=target(index).source)
+                try:
+                    value = await fn(*args, **kwargs)
+                except Exception:
+                    target(index).statistics.load(False, timer.runtime)
+                    raise
+                target(index).statistics.load(True, timer.runtime)
+                cache.put(index, value, lifetime)
+                return value
+
+            @wraps(fn)
+            async def coroutine(*args, **kwargs):
+                index: Any = keyfunc(*args, **kwargs)
+                try:
+                    return cache.get(index)
+                except CacheLookupError:
+                    pass
+                flight: Tuple[int, Any] = (id(asyncio.get_running_loop()), index)  # noqa:E501
+                if (task := flights.get(flight)) is None:
+                    task = asyncio.ensure_future(load(index, args, kwargs))
+                    task.add_done_callback(lambda _: flights.pop(flight, None))
+                    flights[flight] = task
+                return await asyncio.shield(task)
+
+            setattr(coroutine, "pool", cache)
+            return coroutine
+
+        @wraps(fn)
+        def function(*args, **kwargs):
+            return cache.get_or_load(keyfunc(*args, **kwargs),
+                                     lambda: fn(*args, **kwargs), lifetime)
+
+        setattr(function, "pool", cache)
+        return function
+    return decorator
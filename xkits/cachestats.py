@@ -0,0 +1,134 @@
+# coding:utf-8
+
+from threading import Lock
+from typing import Any
+from typing import Dict
+from typing import List
+
+from xkits.meter import CountMeter
+from xkits.meter import HistogramMeter
+from xkits.meter import LocalCountMeter
+
+
+class CacheStatistics():  # pylint: disable=too-many-instance-attributes
+    '''Cache hit, miss, expiration, eviction and load counters
+
+    Hits and misses are counted per thread without a lock, so they do not
+    serialize the lock-free reads. Other updates and snapshot() hold an
+    internal statistics lock.
+    '''
+
+    def __init__(self):
+        self.__hits: LocalCountMeter = LocalCountMeter()
+        self.__misses: LocalCountMeter = LocalCountMeter()
+        self.__expirations: CountMeter = CountMeter()
+        self.__evictions: CountMeter = CountMeter()
+        self.__loads: CountMeter = CountMeter()
+        self.__load_failures: CountMeter = CountMeter()
+        self.__load_time: HistogramMeter = HistogramMeter()
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def hits(self) -> int:
+        return self.__hits.total
+
+    @property
+    def misses(self) -> int:
+        return self.__misses.total
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    @property
+    def expirations(self) -> int:
+        return self.__expirations.total
+
+    @property
+    def evictions(self) -> int:
+        return self.__evictions.total
+
+    @property
+    def loads(self) -> int:
+        '''number of loader calls'''
+        return self.__loads.total
+
+    @property
+    def load_failures(self) -> int:
+        '''number of loader calls which raised'''
+        return self.__load_failures.total
+
+    @property
+    def load_time(self) -> HistogramMeter:
+        '''loader calls duration in seconds'''
+        return self.__load_time
+
+    def hit(self) -> None:
+        self.__hits.inc()
+
+    def miss(self) -> None:
+        self.__misses.inc()
+
+    def expire(self, value: int = 1) -> None:
+        if value > 0:
+            with self.__intlock:
+                self.__expirations.inc(value)
+
+    def evict(self) -> None:
+        with self.__intlock:
+            self.__evictions.inc()
+
+    def load(self, success: bool, runtime: float) -> None:
+        with self.__intlock:
+            self.__loads.inc()
+            if not success:
+                self.__load_failures.inc()
+            self.__load_time.observe(runtime)
+
+    def merge(self, other: "CacheStatistics") -> None:
+        '''add counters of other statistics'''
+        with other.__intlock:  # pylint: disable=protected-access
+            values: List[int] = [other.hits, other.misses, other.expirations,
+                                 other.evictions, other.loads, other.load_failures]  # noqa:E501
+            load_time: HistogramMeter = HistogramMeter(other.load_time.bounds)
+            load_time.merge(other.load_time)
+        with self.__intlock:
+            for meter, value in zip((self.__hits, self.__misses,
+                                     self.__expirations, self.__evictions,
+                                     self.__loads, self.__load_failures), values):  # noqa:E501
+                if value > 0:
+                    meter.inc(value)
+            self.__load_time.merge(load_time)
+
+    def reset(self) -> None:
+        with self.__intlock:
+            self.__hits = LocalCountMeter()
+            self.__misses = LocalCountMeter()
+            self.__expirations = CountMeter()
+            self.__evictions = CountMeter()
+            self.__loads = CountMeter()
+            self.__load_failures = CountMeter()
+            self.__load_time = HistogramMeter()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.__intlock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hit_ratio,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "loads": self.loads,
+                "load_failures": self.load_failures,
+                "load_time": {
+                    "mean": self.load_time.mean,
+                    "p50": self.load_time.percentile(50),
+                    "p90": self.load_time.percentile(90),
+                    "p99": self.load_time.percentile(99),
+                    "max": self.load_time.maximum,
+                },
+            }
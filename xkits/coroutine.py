@@ -0,0 +1,231 @@
+# coding:utf-8
+
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import Set
+
+from xkits.meter import CountMeter
+from xkits.meter import TimeMeter
+from xkits.meter import TimeUnit
+from xkits.thread import TaskJob
+from xkits.thread import TaskRegistry
+
+
+async def run_job(job: TaskJob, executor: Optional[Executor] = None) -> Any:
+    '''run a blocking job in executor (e.g. ThreadPool) and return its result
+
+    The default executor of the running loop is used if executor is None.
+    If the awaiting coroutine is cancelled, the job is cancelled unless it
+    is already started.
+    '''
+    try:
+        await asyncio.get_running_loop().run_in_executor(executor, job.run)
+    except asyncio.CancelledError:
+        job.cancel()
+        raise
+    return job.result
+
+
+async def run_task(executor: Optional[Executor], fn: Callable, *args: Any, **kwargs: Any) -> Any:  # noqa:E501
+    '''run a blocking fn(*args, **kwargs) as a job in executor'''
+    return await run_job(TaskJob.create_task(fn, *args, **kwargs), executor)
+
+
+class AsyncTaskJob(TaskJob):
+    '''Task job of a coroutine function run in an event loop
+
+    The coroutine runs as an asyncio task and the job completes (result,
+    future and callbacks) when the task finishes, a timed out coroutine
+    fails with asyncio.TimeoutError. coroutine_timer measures the awaited
+    coroutine, running_timer only the completion.
+    '''
+
+    def __init__(self, no: int, fn: Callable, *args: Any, **kwargs: Any):
+        super().__init__(no, fn, *args, **kwargs)
+        self.__task: Optional[asyncio.Task] = None
+        self.__timer: TimeMeter = TimeMeter(startup=False)
+        self.__timeout: float = 0.0
+
+    @property
+    def task(self) -> Optional[asyncio.Task]:
+        '''asyncio task of the coroutine'''
+        return self.__task
+
+    @property
+    def coroutine_timer(self) -> TimeMeter:
+        '''coroutine running timer'''
+        return self.__timer
+
+    @property
+    def timeout(self) -> float:
+        '''seconds to await the coroutine, 0 means no limit'''
+        return self.__timeout
+
+    @timeout.setter
+    def timeout(self, timeout: TimeUnit) -> None:
+        self.__timeout = max(float(timeout), 0.0)
+
+    async def invoke(self, semaphore: asyncio.Semaphore, active: CountMeter) -> Any:  # noqa:E501
+        '''await the coroutine while holding semaphore, counted by active'''
+        async with semaphore:
+            self.coroutine_timer.startup()
+            active.inc()
+            try:
+                return await asyncio.wait_for(self.fn(*self.args, **self.kwargs), self.timeout or None)  # noqa:E501
+            finally:
+                active.dec()
+                self.coroutine_timer.shutdown()
+
+    def dispatch(self, semaphore: asyncio.Semaphore, active: CountMeter) -> asyncio.Task:  # noqa:E501
+        '''create the asyncio task in the running loop'''
+        self.__task = asyncio.ensure_future(self.invoke(semaphore, active))
+        self.__task.add_done_callback(self.__complete)
+        return self.__task
+
+    def __complete(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            super().cancel()
+        self.run()  # a cancelled job fails with CancelledError
+
+    def call(self) -> Any:
+        assert self.task is not None, f"{self} is not dispatched"
+        return self.task.result()
+
+    def cancel(self) -> bool:
+        '''cancel job, a started coroutine is cancelled in the loop'''
+        if self.task is not None:
+            return self.task.cancel()
+        return super().cancel()
+
+
+class AsyncTaskPool(TaskRegistry):  # noqa:E501 pylint: disable=too-many-instance-attributes
+    '''Task Coroutine Pool
+
+    Runs coroutine functions in the event loop with at most concurrency
+    of them awaited at once. Unlike TaskPool, the pool must be started and
+    shut down in the running loop (or use async with). Finished jobs are
+    kept by retain and retention as in TaskRegistry.
+    '''
+
+    def __init__(self, concurrency: int = 100, timeout: TimeUnit = 0,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 executor: Optional[Executor] = None,
+                 retain: int = 0, retention: TimeUnit = 0):
+        self.__concurrency: int = max(concurrency, 1)
+        self.__timeout: float = max(float(timeout), 0.0)
+        self.__executor: Optional[Executor] = executor
+        self.__semaphore: Optional[asyncio.Semaphore] = None
+        self.__tasks: Set[asyncio.Task] = set()
+        self.__active: CountMeter = CountMeter(allow_sub=True)
+        self.__counter: CountMeter = CountMeter()  # used in the loop thread
+        super().__init__(retain, retention)
+
+    async def __aenter__(self):
+        self.startup()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.shutdown()
+
+    @property
+    def concurrency(self) -> int:
+        '''max coroutines awaited at once'''
+        return self.__concurrency
+
+    @property
+    def timeout(self) -> float:
+        '''default seconds to await a coroutine, 0 means no limit'''
+        return self.__timeout
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        '''executor of blocking tasks, None is the loop default'''
+        return self.__executor
+
+    @property
+    def running(self) -> bool:
+        '''pool is started'''
+        return self.__semaphore is not None
+
+    @property
+    def pending(self) -> int:
+        '''submitted coroutines not finished yet'''
+        return len(self.__tasks)
+
+    @property
+    def active(self) -> int:
+        '''coroutines being awaited'''
+        return self.__active.total
+
+    def submit_job(self, job: AsyncTaskJob) -> AsyncTaskJob:
+        assert isinstance(job, AsyncTaskJob), f"{job} is not an AsyncTaskJob"  # noqa:E501
+        if self.__semaphore is None:
+            raise RuntimeError("coroutine pool is not started")
+        self.register(job, count=True)
+        task: asyncio.Task = job.dispatch(self.__semaphore, self.__active)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return job
+
+    def submit_timeout_task(self, timeout: TimeUnit, fn: Callable, *args: Any, **kwargs: Any) -> AsyncTaskJob:  # noqa:E501
+        '''submit a coroutine function, fail if not done in timeout seconds'''
+        sn: int = self.__counter.inc()  # serial number
+        job: AsyncTaskJob = AsyncTaskJob(sn, fn, *args, **kwargs)
+        job.timeout = timeout
+        return self.submit_job(job)
+
+    def submit_task(self, fn: Callable, *args: Any, **kwargs: Any) -> AsyncTaskJob:  # noqa:E501
+        '''submit a coroutine function with the default timeout'''
+        return self.submit_timeout_task(self.timeout, fn, *args, **kwargs)
+
+    def submit_blocking_task(self, fn: Callable, *args: Any, **kwargs: Any) -> AsyncTaskJob:  # noqa:E501
+        '''submit a blocking function to run in executor'''
+        return self.submit_task(partial(run_task, self.executor, fn), *args, **kwargs)  # noqa:E501
+
+    def take(self, index: int, timeout: Optional[TimeUnit] = None) -> Awaitable[Any]:  # noqa:E501
+        '''wait for a job, remove it from pool and return its result
+
+        Unlike TaskPool, the result is returned by awaiting it.
+        '''
+        return self.__take(self[index], timeout)
+
+    async def __take(self, job: AsyncTaskJob, timeout: Optional[TimeUnit]) -> Any:  # noqa:E501
+        waiter: asyncio.Future = asyncio.wrap_future(job.future)
+        done, _ = await asyncio.wait({waiter}, timeout=timeout)
+        if not done:
+            raise TimeoutError(f"{job} is not finished in {timeout} seconds")
+        if not waiter.cancelled():
+            waiter.exception()  # retrieved, raised by job result
+        self.forget(job.id)
+        return job.result
+
+    def cancel(self) -> int:
+        '''cancel all unfinished jobs, return the number of them'''
+        return sum(job.cancel() for job in list(self.values()) if not job.done())  # noqa:E501
+
+    async def shutdown(self, cancel: bool = False) -> None:
+        '''wait for (or cancel) unfinished jobs and stop pool'''
+        if cancel:
+            self.cancel()
+        while self.__tasks:
+            await asyncio.wait(set(self.__tasks))
+        await asyncio.sleep(0)  # let done callbacks complete jobs
+        self.__semaphore = None
+
+    def startup(self) -> None:
+        '''start pool'''
+        if self.__semaphore is None:
+            self.__semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def restart(self) -> None:
+        '''wait for all submitted tasks to end and restart'''
+        await self.shutdown()
+        self.startup()
+
+    async def barrier(self) -> None:
+        '''same as restart'''
+        await self.restart()
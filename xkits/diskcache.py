@@ -0,0 +1,224 @@
+# coding:utf-8
+
+import pickle
+import sqlite3
+from threading import Lock
+from time import time
+from typing import Callable
+from typing import Generic
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+from typing import TypeVar
+
+from xkits.cache import CacheItem
+from xkits.cache import CacheMiss
+from xkits.cache import CachePolicy
+from xkits.cache import CachePool
+from xkits.meter import TimeUnit
+
+DCKT = TypeVar("DCKT")
+DCVT = TypeVar("DCVT")
+
+
+class DiskCache(Generic[DCKT, DCVT]):
+    '''Persistent cache store in a sqlite database
+
+    Names and data are pickled, names must pickle to the same bytes when
+    they are equal (e.g. str, int, bytes or tuples of them). Expiration is
+    stored as a wall clock timestamp so that it survives restarts.
+    '''
+
+    def __init__(self, path: str):
+        self.__path: str = path
+        self.__intlock: Lock = Lock()  # internal lock
+        self.__conn: sqlite3.Connection = sqlite3.connect(path, check_same_thread=False)  # noqa:E501
+        with self.__intlock, self.__conn:
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS cache (name BLOB PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL, updated REAL NOT NULL)")  # noqa:E501
+
+    def __str__(self) -> str:
+        return f"disk cache at {id(self)} path={self.path}"
+
+    def __len__(self) -> int:
+        with self.__intlock:
+            return self.__conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]  # noqa:E501
+
+    def __iter__(self) -> Iterator[DCKT]:
+        with self.__intlock:
+            rows = self.__conn.execute("SELECT name FROM cache").fetchall()
+        return iter([pickle.loads(row[0]) for row in rows])
+
+    def __contains__(self, index: DCKT) -> bool:
+        with self.__intlock:
+            return self.__conn.execute("SELECT 1 FROM cache WHERE name = ?", (pickle.dumps(index),)).fetchone() is not None  # noqa:E501
+
+    @property
+    def path(self) -> str:
+        return self.__path
+
+    def put(self, index: DCKT, value: DCVT, lifetime: TimeUnit = 0) -> None:
+        '''store data for lifetime seconds from now, 0 means never expire'''
+        now: float = time()
+        expires: float = now + lifetime if lifetime > 0 else 0.0
+        with self.__intlock, self.__conn:
+            self.__conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",  # noqa:E501
+                                (pickle.dumps(index), pickle.dumps(value), expires, now))  # noqa:E501
+
+    def get(self, index: DCKT) -> Tuple[DCVT, float]:
+        '''data and its remaining lifetime, 0 means never expire'''
+        name: bytes = pickle.dumps(index)
+        with self.__intlock:
+            row = self.__conn.execute("SELECT data, expires FROM cache WHERE name = ?", (name,)).fetchone()  # noqa:E501
+            if row is None:
+                raise CacheMiss(index)
+            if row[1] <= 0.0:
+                return pickle.loads(row[0]), 0.0
+            if (remaining := row[1] - time()) <= 0.0:
+                with self.__conn:
+                    self.__conn.execute("DELETE FROM cache WHERE name = ?", (name,))  # noqa:E501
+                raise CacheMiss(index)
+            return pickle.loads(row[0]), remaining
+
+    def delete(self, index: DCKT) -> None:
+        with self.__intlock, self.__conn:
+            self.__conn.execute("DELETE FROM cache WHERE name = ?", (pickle.dumps(index),))  # noqa:E501
+
+    def recent(self, limit: int = 0) -> List[Tuple[DCKT, DCVT, float]]:
+        '''unexpired names, data and remaining lifetimes, newest first'''
+        now: float = time()
+        with self.__intlock:
+            rows = self.__conn.execute("SELECT name, data, expires FROM cache WHERE expires <= 0 OR expires > ? ORDER BY updated DESC LIMIT ?",  # noqa:E501
+                                       (now, limit if limit > 0 else -1)).fetchall()  # noqa:E501
+        return [(pickle.loads(name), pickle.loads(data), expires - now if expires > 0 else 0.0)  # noqa:E501
+                for name, data, expires in rows]
+
+    def reap(self) -> List[DCKT]:
+        '''remove expired data, return their names'''
+        now: float = time()
+        with self.__intlock, self.__conn:
+            rows = self.__conn.execute("SELECT name FROM cache WHERE expires > 0 AND expires <= ?", (now,)).fetchall()  # noqa:E501
+            self.__conn.executemany("DELETE FROM cache WHERE name = ?", rows)
+        return [pickle.loads(row[0]) for row in rows]
+
+    def close(self) -> None:
+        with self.__intlock:
+            self.__conn.close()
+
+
+TCPK = TypeVar("TCPK")
+TCPV = TypeVar("TCPV")
+
+
+class TieredCachePool(CachePool[TCPK, TCPV]):
+    '''Named data cache pool in memory which spills to a disk cache
+
+    Items evicted from memory are written to the disk cache, and lookups
+    which miss in memory are served from disk and promoted back. With warm
+    enabled, the most recently written disk items are loaded into memory
+    on creation. Call close() (or flush()) to persist the memory items.
+    '''
+
+    def __init__(self, path: str, lifetime: TimeUnit = 0, capacity: int = 0,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 maxweight: int = 0, sizer: Optional[Callable[[TCPV], int]] = None,  # noqa:E501
+                 policy: Optional[CachePolicy[TCPK]] = None,
+                 warm: bool = True):
+        super().__init__(lifetime=lifetime, capacity=capacity,
+                         maxweight=maxweight, sizer=sizer, policy=policy)
+        self.__disk: DiskCache[TCPK, TCPV] = DiskCache(path)
+        self.__spilled: Set[TCPK] = set(self.__disk)  # names on disk
+        self.__spllock: Lock = Lock()  # names on disk lock
+        if warm:
+            for index, value, remaining in self.__disk.recent(capacity):
+                super().put(index, value, remaining)
+
+    def __str__(self) -> str:
+        return f"tiered cache pool at {id(self)} path={self.disk.path}"
+
+    def __len__(self) -> int:
+        return len(self.__names())
+
+    def __iter__(self) -> Iterator[TCPK]:
+        return iter(self.__names())
+
+    def __contains__(self, index: TCPK) -> bool:
+        return super().__contains__(index) or self.__ondisk(index)
+
+    def __names(self) -> Set[TCPK]:
+        names: Set[TCPK] = set(super().__iter__())
+        with self.__spllock:
+            return names.union(self.__spilled)
+
+    def __ondisk(self, index: TCPK) -> bool:
+        with self.__spllock:
+            return index in self.__spilled
+
+    def __spill(self, index: TCPK) -> None:
+        with self.__spllock:
+            self.__spilled.add(index)
+
+    def __unspill(self, index: TCPK) -> bool:
+        '''forget the disk copy of index, False if there is none'''
+        with self.__spllock:
+            if index not in self.__spilled:
+                return False
+            self.__spilled.discard(index)
+            return True
+
+    @property
+    def disk(self) -> DiskCache[TCPK, TCPV]:
+        return self.__disk
+
+    def evicted(self, item: CacheItem[TCPK, TCPV]) -> None:
+        if not item.expired:
+            self.disk.put(item.name, item.peek(), item.downtime)
+            self.__spill(item.name)
+
+    def lookup(self, index: TCPK) -> CacheItem[TCPK, TCPV]:
+        try:
+            return super().lookup(index)
+        except CacheMiss:
+            if not self.__ondisk(index):
+                raise
+
+        try:
+            value, remaining = self.disk.get(index)
+        except CacheMiss:
+            self.__unspill(index)
+            raise
+        super().put(index, value, remaining)  # promote, keep the disk copy
+        return super().lookup(index)
+
+    def put(self, index: TCPK, value: TCPV, lifetime: Optional[TimeUnit] = None) -> None:  # noqa:E501
+        if self.__unspill(index):  # drop the outdated disk copy
+            self.disk.delete(index)
+        super().put(index, value, lifetime)
+
+    def delete(self, index: TCPK) -> None:
+        super().delete(index)
+        if self.__unspill(index):
+            self.disk.delete(index)
+
+    def reap(self, limit: int = 0) -> int:
+        reaped: int = super().reap(limit)
+        expired: List[TCPK] = self.disk.reap()
+        with self.__spllock:
+            self.__spilled.difference_update(expired)
+        return reaped
+
+    def flush(self) -> None:
+        '''write all unexpired memory items to disk'''
+        for index in super().__iter__():
+            try:
+                item: CacheItem[TCPK, TCPV] = super().lookup(index)
+            except CacheMiss:  # pragma: no cover
+                continue  # pragma: no cover
+            if not item.expired:
+                self.disk.put(index, item.peek(), item.downtime)
+                self.__spill(index)
+
+    def close(self) -> None:
+        '''flush memory items and close the disk cache'''
+        self.flush()
+        self.disk.close()
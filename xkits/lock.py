@@ -0,0 +1,559 @@
+# coding:utf-8
+
+from contextlib import contextmanager
+from threading import Condition
+from threading import Lock
+from threading import local  # noqa:H306
+from time import monotonic
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generic
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import TypeVar
+
+from xkits.actuator import Logger
+from xkits.actuator import commands  # noqa:H306
+from xkits.meter import CountMeter
+from xkits.meter import HistogramMeter
+from xkits.meter import TimeUnit
+
+
+class RWLock():
+    '''Reader-writer lock, held by many readers or by one writer
+
+    acquire() and release() take the write lock, so RWLock can replace a
+    Lock. Waiting writers hold off new readers so that writers are not
+    starved. Timeouts follow threading.Lock, a negative one never expires.
+    '''
+
+    def __init__(self):
+        self.__cond: Condition = Condition(Lock())
+        self.__readers: int = 0
+        self.__writer: bool = False
+        self.__waiting: int = 0  # waiting writers
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    @property
+    def readers(self) -> int:
+        '''number of readers holding the lock'''
+        return self.__readers
+
+    def locked(self) -> bool:
+        '''write lock is held'''
+        return self.__writer
+
+    def __wait(self, predicate: Callable[[], bool], blocking: bool, timeout: TimeUnit) -> bool:  # noqa:E501
+        return self.__cond.wait_for(predicate, (None if timeout < 0 else timeout) if blocking else 0)  # noqa:E501
+
+    def acquire_read(self, blocking: bool = True, timeout: TimeUnit = -1) -> bool:  # noqa:E501
+        with self.__cond:
+            if not self.__wait(lambda: not self.__writer and self.__waiting == 0, blocking, timeout):  # noqa:E501
+                return False
+            self.__readers += 1
+            return True
+
+    def release_read(self) -> None:
+        with self.__cond:
+            if self.__readers <= 0:
+                raise RuntimeError("release unlocked read lock")
+            self.__readers -= 1
+            if self.__readers == 0:
+                self.__cond.notify_all()
+
+    def acquire(self, blocking: bool = True, timeout: TimeUnit = -1) -> bool:
+        with self.__cond:
+            self.__waiting += 1
+            try:
+                if not self.__wait(lambda: not self.__writer and self.__readers == 0, blocking, timeout):  # noqa:E501
+                    self.__cond.notify_all()  # readers held off by this writer
+                    return False
+            finally:
+                self.__waiting -= 1
+            self.__writer = True
+            return True
+
+    def release(self) -> None:
+        with self.__cond:
+            if not self.__writer:
+                raise RuntimeError("release unlocked write lock")
+            self.__writer = False
+            self.__cond.notify_all()
+
+    @contextmanager
+    def read(self, timeout: Optional[TimeUnit] = None) -> Iterator["RWLock"]:
+        '''hold read lock, raise TimeoutError if not acquired in timeout'''
+        if not self.acquire_read(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"failed to acquire read lock in {timeout} seconds")  # noqa:E501
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self, timeout: Optional[TimeUnit] = None) -> Iterator["RWLock"]:  # noqa:E501
+        '''hold write lock, raise TimeoutError if not acquired in timeout'''
+        if not self.acquire(timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"failed to acquire write lock in {timeout} seconds")  # noqa:E501
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+class LockStats():
+    '''Contention statistics of a lock name'''
+
+    def __init__(self, name: str, bounds: Sequence[float] = HistogramMeter.DEFAULT_BOUNDS):  # noqa:E501
+        self.__name: str = name
+        self.__wait: HistogramMeter = HistogramMeter(bounds)
+        self.__hold: HistogramMeter = HistogramMeter(bounds)
+        self.__contentions: CountMeter = CountMeter()
+        self.__timeouts: CountMeter = CountMeter()
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"lock {self.name}"
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def wait(self) -> HistogramMeter:
+        '''seconds waited by successful acquires'''
+        return self.__wait
+
+    @property
+    def hold(self) -> HistogramMeter:
+        '''seconds held between acquire and release'''
+        return self.__hold
+
+    @property
+    def acquires(self) -> int:
+        return self.wait.total
+
+    @property
+    def contentions(self) -> int:
+        '''acquires that found the lock held'''
+        return self.__contentions.total
+
+    @property
+    def timeouts(self) -> int:
+        '''acquires given up without the lock'''
+        return self.__timeouts.total
+
+    def measure(self, acquire: Callable[[bool, TimeUnit], bool],
+                blocking: bool = True, timeout: TimeUnit = -1) -> bool:
+        '''call acquire(blocking, timeout), recording its wait or failure'''
+        if acquire(False, -1):
+            self.acquired(0.0, False)
+            return True
+        if not blocking:
+            self.failed()
+            return False
+        started: float = monotonic()
+        if not acquire(True, timeout):
+            self.failed()
+            return False
+        self.acquired(monotonic() - started, True)
+        return True
+
+    def acquired(self, wait: float, contended: bool) -> None:
+        with self.__intlock:
+            self.__wait.observe(wait)
+            if contended:
+                self.__contentions.inc()
+
+    def released(self, hold: float) -> None:
+        with self.__intlock:
+            self.__hold.observe(hold)
+
+    def failed(self) -> None:
+        with self.__intlock:
+            self.__contentions.inc()
+            self.__timeouts.inc()
+
+    def snapshot(self) -> Dict[str, float]:
+        '''counts and wait/hold times (seconds) of the lock'''
+        with self.__intlock:
+            return {
+                "acquires": self.acquires,
+                "contentions": self.contentions,
+                "timeouts": self.timeouts,
+                "wait_total": self.wait.sum,
+                "wait_mean": self.wait.mean,
+                "wait_p99": self.wait.percentile(99),
+                "wait_max": self.wait.maximum,
+                "hold_total": self.hold.sum,
+                "hold_mean": self.hold.mean,
+                "hold_p99": self.hold.percentile(99),
+                "hold_max": self.hold.maximum,
+            }
+
+
+class ProfiledLock():
+    '''Lock recording its wait and hold times into LockStats
+
+    An acquire first tries the lock without blocking, so an uncontended
+    acquire costs one extra clock read. Only non-reentrant locks (Lock or
+    the write side of RWLock) can be profiled.
+    '''
+
+    def __init__(self, stats: LockStats, lock: Any = None):
+        self.__lock: Any = Lock() if lock is None else lock
+        self.__stats: LockStats = stats
+        self.__held: float = 0.0
+
+    def __str__(self) -> str:
+        return f"profiled {self.stats}"
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    @property
+    def lock(self) -> Any:
+        return self.__lock
+
+    @property
+    def stats(self) -> LockStats:
+        return self.__stats
+
+    def locked(self) -> bool:
+        return self.__lock.locked()
+
+    def acquire(self, blocking: bool = True, timeout: TimeUnit = -1) -> bool:
+        if not self.__stats.measure(self.__lock.acquire, blocking, timeout):
+            return False
+        self.__held = monotonic()
+        return True
+
+    def release(self) -> None:
+        hold: float = monotonic() - self.__held
+        self.__lock.release()
+        self.__stats.released(hold)
+
+
+class ProfiledRWLock(ProfiledLock):
+    '''RWLock recording its write side and read side into LockStats
+
+    The write side is profiled as ProfiledLock, the read side into its
+    own read_stats. Read hold times are kept per thread, since readers
+    share the lock.
+    '''
+
+    def __init__(self, stats: LockStats, read_stats: LockStats, lock: Optional[RWLock] = None):  # noqa:E501
+        super().__init__(stats, RWLock() if lock is None else lock)
+        self.__read_stats: LockStats = read_stats
+        self.__local: local = local()
+
+    @property
+    def read_stats(self) -> LockStats:
+        return self.__read_stats
+
+    @property
+    def readers(self) -> int:
+        '''number of readers holding the lock'''
+        return self.lock.readers
+
+    def __helds(self) -> List[float]:
+        '''acquire times of the read locks held by the current thread'''
+        try:
+            return self.__local.helds
+        except AttributeError:
+            helds: List[float] = []
+            self.__local.helds = helds
+            return helds
+
+    def acquire_read(self, blocking: bool = True, timeout: TimeUnit = -1) -> bool:  # noqa:E501
+        if not self.__read_stats.measure(self.lock.acquire_read, blocking, timeout):  # noqa:E501
+            return False
+        self.__helds().append(monotonic())
+        return True
+
+    def release_read(self) -> None:
+        helds: List[float] = self.__helds()
+        hold: float = monotonic() - helds.pop() if helds else 0.0
+        self.lock.release_read()
+        self.__read_stats.released(hold)
+
+
+class LockProfiler():
+    '''Lock contention statistics by lock name
+
+    lock(name) returns a plain Lock while the profiler is disabled, so
+    profiling costs nothing unless enabled before the locks are created.
+    Locks of the same name share their statistics. The default profiler
+    (lock_profiler()) is used by NamedLock, ItemPool and TaskPool.
+    '''
+
+    def __init__(self, enabled: bool = True,
+                 bounds: Sequence[float] = HistogramMeter.DEFAULT_BOUNDS):
+        self.__stats: Dict[str, LockStats] = {}
+        self.__bounds: Sequence[float] = bounds
+        self.__enabled: bool = enabled
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __len__(self) -> int:
+        return len(self.__stats)
+
+    def __iter__(self) -> Iterator[LockStats]:
+        with self.__intlock:
+            return iter(list(self.__stats.values()))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__stats
+
+    def __getitem__(self, name: str) -> LockStats:
+        return self.__stats[name]
+
+    @property
+    def enabled(self) -> bool:
+        '''new locks are profiled'''
+        return self.__enabled
+
+    def enable(self) -> None:
+        self.__enabled = True
+
+    def disable(self) -> None:
+        self.__enabled = False
+
+    def stats(self, name: str) -> LockStats:
+        '''statistics of name, created if needed'''
+        with self.__intlock:
+            if (stats := self.__stats.get(name)) is None:
+                stats = self.__stats[name] = LockStats(name, self.__bounds)
+            return stats
+
+    def lock(self, name: str, lock: Any = None) -> Any:
+        '''new lock (or wrap lock) of name, profiled only if enabled'''
+        if lock is None:
+            lock = Lock()
+        return ProfiledLock(self.stats(name), lock) if self.enabled else lock  # noqa:E501
+
+    def rwlock(self, name: str) -> Any:
+        '''new RWLock of name, profiled only if enabled
+
+        The read side is profiled under name.read.
+        '''
+        lock: RWLock = RWLock()
+        return ProfiledRWLock(self.stats(name), self.stats(f"{name}.read"), lock) if self.enabled else lock  # noqa:E501
+
+    def reset(self) -> None:
+        '''drop all statistics, existing profiled locks keep theirs'''
+        with self.__intlock:
+            self.__stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        '''statistics of all lock names'''
+        return {stats.name: stats.snapshot() for stats in self}
+
+    def report(self, logger: Optional[Logger] = None) -> None:
+        '''log lock names by total wait time, the longest first'''
+        log: Logger = logger or commands().logger
+        for name, item in sorted(self.snapshot().items(), key=lambda kv: kv[1]["wait_total"], reverse=True):  # noqa:E501
+            log.info("lock %s: %d acquires, %d contentions, %d timeouts, wait total %.6fs mean %.6fs p99 %.6fs max %.6fs, hold mean %.6fs p99 %.6fs max %.6fs",  # noqa:E501
+                     name, item["acquires"], item["contentions"], item["timeouts"],  # noqa:E501
+                     item["wait_total"], item["wait_mean"], item["wait_p99"], item["wait_max"],  # noqa:E501
+                     item["hold_mean"], item["hold_p99"], item["hold_max"])
+
+
+LOCK_PROFILER: LockProfiler = LockProfiler(enabled=False)
+
+
+def lock_profiler() -> LockProfiler:
+    '''default lock profiler, disabled until enable()'''
+    return LOCK_PROFILER
+
+
+LKIT = TypeVar("LKIT")
+LKNT = TypeVar("LKNT")
+
+
+class NamedLock(Generic[LKNT]):
+    '''Locks by name
+
+    lookup() and [] keep the lock of a name forever. Locks held through
+    acquire() and release(), or with named_lock(name), are reference
+    counted and removed once the last holder releases them, so memory
+    stays bounded for high-cardinality names (e.g. URLs or file paths).
+    With an enabled profiler, all locks are profiled under one name.
+    '''
+
+    class LockItem(Generic[LKIT]):
+        def __init__(self, name: LKIT, lock: Any = None):
+            self.__lock: Any = Lock() if lock is None else lock
+            self.__name: LKIT = name
+            self.__refs: int = 0
+            self.__pinned: bool = False
+
+        @property
+        def name(self) -> LKIT:
+            return self.__name
+
+        @property
+        def lock(self) -> Any:
+            return self.__lock
+
+        @property
+        def refs(self) -> int:
+            '''number of holders and waiters'''
+            return self.__refs
+
+        @property
+        def pinned(self) -> bool:
+            '''kept forever'''
+            return self.__pinned
+
+        def pin(self) -> None:
+            self.__pinned = True
+
+        def ref(self) -> int:
+            self.__refs += 1
+            return self.__refs
+
+        def unref(self) -> int:
+            self.__refs -= 1
+            return self.__refs
+
+    def __init__(self, name: str = "NamedLock", profiler: Optional[LockProfiler] = None):  # noqa:E501
+        self.__locks: Dict[LKNT, NamedLock.LockItem[LKNT]] = {}
+        self.__inter: Lock = Lock()  # internal lock
+        self.__profiler: LockProfiler = profiler or lock_profiler()
+        self.__name: str = name
+
+    @property
+    def name(self) -> str:
+        '''profiled lock name shared by all locks'''
+        return self.__name
+
+    @property
+    def profiler(self) -> LockProfiler:
+        return self.__profiler
+
+    def __len__(self) -> int:
+        return len(self.__locks)
+
+    def __iter__(self) -> Iterator[LockItem[LKNT]]:
+        return iter(self.__locks.values())
+
+    def __contains__(self, name: LKNT) -> bool:
+        return name in self.__locks
+
+    def __getitem__(self, name: LKNT) -> Any:
+        return self.lookup(name).lock
+
+    def create(self, name: LKNT) -> LockItem[LKNT]:
+        '''new lock item of name'''
+        return self.LockItem(name, self.profiler.lock(self.name))
+
+    def find(self, name: LKNT) -> LockItem[LKNT]:
+        '''existing lock item of name, raise KeyError if there is none'''
+        return self.__locks[name]
+
+    def lookup(self, name: LKNT) -> LockItem[LKNT]:
+        '''lock item of name, kept forever'''
+        lock = self.__locks.get(name)
+        if lock is not None and lock.pinned:
+            return lock
+
+        with self.__inter:
+            if (lock := self.__locks.get(name)) is None:
+                lock = self.__locks[name] = self.create(name)
+            lock.pin()
+            return lock
+
+    def refer(self, name: LKNT) -> LockItem[LKNT]:
+        '''reference lock item of name, created if needed'''
+        with self.__inter:
+            if (lock := self.__locks.get(name)) is None:
+                lock = self.__locks[name] = self.create(name)
+            lock.ref()
+            return lock
+
+    def unrefer(self, lock: LockItem[LKNT]) -> None:
+        '''dereference lock item, removed without references'''
+        with self.__inter:
+            if lock.unref() <= 0 and not lock.pinned:
+                self.__locks.pop(lock.name, None)
+
+    def acquire(self, name: LKNT, blocking: bool = True, timeout: TimeUnit = -1) -> bool:  # noqa:E501
+        '''acquire lock of name, timeout as threading.Lock'''
+        lock = self.refer(name)
+        try:
+            if lock.lock.acquire(blocking, timeout):
+                return True
+        except BaseException:  # dereference on errors and interrupts
+            self.unrefer(lock)
+            raise
+        self.unrefer(lock)
+        return False
+
+    def release(self, name: LKNT) -> None:
+        '''release lock of name'''
+        lock = self.find(name)
+        lock.lock.release()
+        self.unrefer(lock)
+
+    @contextmanager
+    def __call__(self, name: LKNT, timeout: Optional[TimeUnit] = None) -> Iterator[Any]:  # noqa:E501
+        '''hold lock of name, raise TimeoutError if not acquired in timeout'''
+        if not self.acquire(name, timeout=-1 if timeout is None else timeout):
+            raise TimeoutError(f"failed to acquire lock {name} in {timeout} seconds")  # noqa:E501
+        try:
+            yield self.find(name).lock
+        finally:
+            self.release(name)
+
+
+class NamedRWLock(NamedLock[LKNT]):
+    '''Reader-writer locks by name
+
+    named_lock(name) and acquire() take the write lock, read() and
+    acquire_read() the read lock, all reference counted as NamedLock.
+    With an enabled profiler, the read side is profiled as name.read.
+    '''
+
+    def create(self, name: LKNT) -> NamedLock.LockItem[LKNT]:
+        return self.LockItem(name, self.profiler.rwlock(self.name))
+
+    def acquire_read(self, name: LKNT, blocking: bool = True, timeout: TimeUnit = -1) -> bool:  # noqa:E501
+        '''acquire read lock of name, timeout as threading.Lock'''
+        lock = self.refer(name)
+        try:
+            if lock.lock.acquire_read(blocking, timeout):
+                return True
+        except BaseException:  # dereference on errors and interrupts
+            self.unrefer(lock)
+            raise
+        self.unrefer(lock)
+        return False
+
+    def release_read(self, name: LKNT) -> None:
+        '''release read lock of name'''
+        lock = self.find(name)
+        lock.lock.release_read()
+        self.unrefer(lock)
+
+    @contextmanager
+    def read(self, name: LKNT, timeout: Optional[TimeUnit] = None) -> Iterator[RWLock]:  # noqa:E501
+        '''hold read lock of name, raise TimeoutError if not acquired'''
+        if not self.acquire_read(name, timeout=-1 if timeout is None else timeout):  # noqa:E501
+            raise TimeoutError(f"failed to acquire read lock {name} in {timeout} seconds")  # noqa:E501
+        try:
+            yield self.find(name).lock
+        finally:
+            self.release_read(name)
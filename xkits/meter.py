@@ -1,23 +1,75 @@
 # coding:utf-8
 
+from bisect import bisect_left
+from math import asin
+from math import ceil
+from math import exp
+from math import log2
+from math import pi
+from math import sin
+from threading import Lock
+from threading import Thread
+from threading import current_thread  # noqa:H306
+from threading import local  # noqa:H306
+from time import monotonic
 from time import sleep
 from time import time
+from typing import Callable
+from typing import Dict
+from typing import List
 from typing import Optional
+from typing import Sequence
+from typing import Tuple
 from typing import Union
 
 TimeUnit = Union[float, int]
+ClockSource = Callable[[], float]
 
 
-class TimeMeter():
-    '''Timer'''
+class FakeClock():
+    '''Manually advanced clock source for tests and benchmarks'''
+
+    def __init__(self, start: TimeUnit = 1.0):
+        self.__now: float = float(start)
+
+    def __call__(self) -> float:
+        return self.__now
+
+    def advance(self, delta: TimeUnit) -> float:
+        if delta < 0.0:
+            raise ValueError(f"cannot advance clock by {delta}")
+        self.__now += float(delta)
+        return self.__now
 
-    def __init__(self, startup: bool = True, always: bool = False):
-        timestamp: float = time()
+    def sleep(self, delay: TimeUnit) -> None:
+        '''advance instead of sleeping'''
+        self.advance(max(delay, 0.0))
+
+
+class TimeMeter():
+    '''Timer
+
+    Durations are measured by the clock source, time.monotonic by default,
+    so they are not affected by wall clock steps. A clock source with a
+    sleep method (e.g. FakeClock) is also used to sleep. created_time is
+    always a wall clock timestamp.
+    '''
+    __slots__ = ("__always_running", "__started", "__created", "__stopped",
+                 "__source")
+
+    def __init__(self, startup: bool = True, always: bool = False,
+                 source: Optional[ClockSource] = None):
+        self.__source: ClockSource = source or monotonic
         self.__always_running: bool = always
-        self.__started: float = timestamp if startup else 0.0
-        self.__created: float = timestamp
+        self.__started: float = self.__source() if startup else 0.0
+        self.__created: float = time()
         self.__stopped: float = 0.0
 
+    @property
+    def source(self) -> ClockSource:
+        '''clock source of durations'''
+        return self.__source
+
     @property
     def created_time(self) -> float:
         return self.__created
@@ -32,7 +84,7 @@ class TimeMeter():
 
     @property
     def runtime(self) -> float:
-        return (self.stopped_time or time()) - self.started_time if self.started_time > 0.0 else 0.0  # noqa:E501
+        return (self.stopped_time or self.__source()) - self.started_time if self.started_time > 0.0 else 0.0  # noqa:E501
 
     @property
     def started(self) -> bool:
@@ -45,12 +97,12 @@ class TimeMeter():
         return self.started_time > 0.0 and self.stopped_time > 0.0
 
     def restart(self):
-        self.__started = time()
+        self.__started = self.__source()
         self.__stopped = 0.0
 
     def startup(self):
         if not self.started:
-            self.__started = time()
+            self.__started = self.__source()
             self.__stopped = 0.0
 
     def shutdown(self):
@@ -58,12 +110,12 @@ class TimeMeter():
             raise RuntimeError(f"TimeMeter({self}) cannot shutdown")
 
         if self.started:
-            self.__stopped = time()
+            self.__stopped = self.__source()
 
     def clock(self, delay: TimeUnit = 1.0):
         '''sleep for a while'''
         if self.started and delay > 0.0:
-            sleep(delay)
+            getattr(self.__source, "sleep", sleep)(delay)
 
     def alarm(self, endtime: TimeUnit):
         '''sleep until endtime'''
@@ -79,10 +131,12 @@ class TimeMeter():
 
 class DownMeter(TimeMeter):
     '''Countdown'''
+    __slots__ = ("__lifetime",)
 
-    def __init__(self, lifetime: TimeUnit = 0.0, startup: bool = True):
+    def __init__(self, lifetime: TimeUnit = 0.0, startup: bool = True,
+                 source: Optional[ClockSource] = None):
         self.__lifetime: float = max(float(lifetime), 0.0)
-        super().__init__(startup=startup, always=True)
+        super().__init__(startup=startup, always=True, source=source)
 
     @property
     def lifetime(self) -> float:
@@ -92,6 +146,11 @@ class DownMeter(TimeMeter):
     def downtime(self) -> float:
         return self.lifetime - self.runtime if self.lifetime > 0.0 else 0.0
 
+    @property
+    def deadline(self) -> float:
+        '''expiration time on the clock source, 0.0 means never expire'''
+        return self.started_time + self.lifetime if self.lifetime > 0.0 else 0.0  # noqa:E501
+
     @property
     def expired(self) -> bool:
         return self.lifetime > 0.0 and self.runtime > self.lifetime
@@ -190,3 +249,535 @@ class TsCountMeter(CountMeter):
         total: int = super().dec(value)
         self.__updated = time()
         return total
+
+
+class LocalCountMeter():
+    '''Counter with a cell per thread, summed when read
+
+    inc() only adds to the cell of the calling thread and takes no lock,
+    cells of exited threads are folded into one total when read.
+    '''
+
+    def __init__(self):
+        self.__local: local = local()
+        self.__cells: List[Tuple[Thread, List[int]]] = []
+        self.__folded: int = 0
+        self.__intlock: Lock = Lock()  # cells lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def total(self) -> int:
+        with self.__intlock:
+            alive: List[Tuple[Thread, List[int]]] = []
+            for thread, cell in self.__cells:
+                if thread.is_alive():
+                    alive.append((thread, cell))
+                else:
+                    self.__folded += cell[0]
+            self.__cells = alive
+            return self.__folded + sum(cell[0] for _, cell in alive)
+
+    def inc(self, value: int = 1) -> None:
+        if value <= 0:
+            raise ValueError(f"{self} inc value({value}) must be greater than 0")  # noqa:E501
+        try:
+            cell: List[int] = self.__local.cell
+        except AttributeError:
+            cell = self.__local.cell = [0]
+            with self.__intlock:
+                self.__cells.append((current_thread(), cell))
+        cell[0] += value  # only the owner thread writes its cell
+
+
+class HistogramMeter():
+    '''Histogram with fixed bucket upper bounds'''
+    DEFAULT_BOUNDS: Tuple[float, ...] = tuple(0.001 * 2 ** i for i in range(17))  # noqa:E501
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.__bounds: Tuple[float, ...] = tuple(sorted(bounds))
+        self.__counts: List[int] = [0] * (len(self.__bounds) + 1)
+        self.__counter: CountMeter = CountMeter()
+        self.__sum: float = 0.0
+        self.__min: float = 0.0
+        self.__max: float = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def bounds(self) -> Tuple[float, ...]:
+        return self.__bounds
+
+    @property
+    def buckets(self) -> Dict[float, int]:
+        '''count of each bucket by upper bound, the last one is infinity'''
+        return dict(zip(self.bounds + (float("inf"),), self.__counts))
+
+    @property
+    def total(self) -> int:
+        return self.__counter.total
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total > 0 else 0.0
+
+    @property
+    def minimum(self) -> float:
+        return self.__min
+
+    @property
+    def maximum(self) -> float:
+        return self.__max
+
+    def observe(self, value: float) -> None:
+        self.__counts[bisect_left(self.__bounds, value)] += 1
+        if self.__counter.inc() == 1:
+            self.__min = self.__max = value
+        else:
+            self.__min = min(self.__min, value)
+            self.__max = max(self.__max, value)
+        self.__sum += value
+
+    def merge(self, other: "HistogramMeter") -> None:
+        if other.bounds != self.bounds:
+            raise ValueError(f"{self} and {other} have different bounds")
+        if other.total <= 0:
+            return
+        self.__min = min(self.__min, other.minimum) if self.total > 0 else other.minimum  # noqa:E501
+        self.__max = max(self.__max, other.maximum)
+        for i, value in enumerate(other.buckets.values()):
+            self.__counts[i] += value
+        self.__counter.inc(other.total)
+        self.__sum += other.sum
+
+    def percentile(self, percent: float) -> float:
+        '''upper bound of the bucket holding the percentile, capped by max'''
+        if not 0.0 <= percent <= 100.0:
+            raise ValueError(f"{self} percentile({percent}) must be between 0 and 100")  # noqa:E501
+        if self.total <= 0:
+            return 0.0
+        rank: float = max(self.total * percent / 100.0, 1.0)
+        accumulated: int = 0
+        for bound, value in zip(self.bounds, self.__counts):
+            accumulated += value
+            if accumulated >= rank:
+                return max(min(bound, self.maximum), self.minimum)
+        return self.maximum
+
+
+class RateMeter():  # pylint: disable=too-many-instance-attributes
+    '''Exponentially-weighted moving average rates of 1, 5 and 15 minutes
+
+    Marks are folded into the averages every interval seconds, on the
+    next mark or read, so a mark costs a lock and an addition. Rates are
+    events per second. Thread-safe.
+    '''
+    WINDOWS: Tuple[float, ...] = (60.0, 300.0, 900.0)
+
+    def __init__(self, interval: TimeUnit = 5.0,
+                 source: Optional[ClockSource] = None):
+        if interval <= 0.0:
+            raise ValueError(f"invalid interval {interval}")
+        self.__source: ClockSource = source or monotonic
+        self.__interval: float = float(interval)
+        self.__alphas: Tuple[float, ...] = tuple(1.0 - exp(-self.__interval / window) for window in self.WINDOWS)  # noqa:E501
+        self.__rates: List[float] = [0.0] * len(self.WINDOWS)
+        self.__primed: bool = False  # rates have been initialized
+        self.__uncounted: int = 0
+        self.__count: int = 0
+        self.__started: float = self.__source()
+        self.__ticked: float = self.__started
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def interval(self) -> float:
+        '''seconds between average updates'''
+        return self.__interval
+
+    @property
+    def count(self) -> int:
+        return self.__count
+
+    @property
+    def mean_rate(self) -> float:
+        '''events per second since created'''
+        elapsed: float = self.__source() - self.__started
+        return self.count / elapsed if elapsed > 0.0 else 0.0
+
+    @property
+    def m1_rate(self) -> float:
+        return self.rates[0]
+
+    @property
+    def m5_rate(self) -> float:
+        return self.rates[1]
+
+    @property
+    def m15_rate(self) -> float:
+        return self.rates[2]
+
+    @property
+    def rates(self) -> Tuple[float, ...]:
+        '''1, 5 and 15 minutes rates'''
+        with self.__intlock:
+            self.__tick()
+            return tuple(self.__rates)
+
+    def __tick(self) -> None:
+        ticks: int = int((self.__source() - self.__ticked) / self.interval)
+        if ticks <= 0:
+            return
+        self.__ticked += ticks * self.interval
+        instant: float = self.__uncounted / self.interval
+        self.__uncounted = 0
+        for i, alpha in enumerate(self.__alphas):
+            rate: float = instant if not self.__primed else self.__rates[i] + alpha * (instant - self.__rates[i])  # noqa:E501
+            self.__rates[i] = rate * (1.0 - alpha) ** (ticks - 1)  # idle ticks
+        self.__primed = True
+
+    def mark(self, value: int = 1) -> int:
+        '''count value events, return the total count'''
+        with self.__intlock:
+            self.__tick()
+            self.__uncounted += value
+            self.__count += value
+            return self.__count
+
+
+class WindowCountMeter():
+    '''Counter of the last window seconds
+
+    The window is a ring of slots, events older than the window expire
+    one slot at a time. Thread-safe.
+    '''
+
+    def __init__(self, window: TimeUnit = 60.0, slots: int = 60,
+                 source: Optional[ClockSource] = None):
+        if window <= 0.0 or slots <= 0:
+            raise ValueError(f"invalid window {window} of {slots} slots")
+        self.__source: ClockSource = source or monotonic
+        self.__window: float = float(window)
+        self.__width: float = self.__window / slots
+        self.__counts: List[int] = [0] * slots
+        self.__epochs: List[int] = [-1] * slots
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def window(self) -> float:
+        return self.__window
+
+    @property
+    def slots(self) -> int:
+        return len(self.__counts)
+
+    @property
+    def total(self) -> int:
+        '''events in the window'''
+        with self.__intlock:
+            oldest: int = self.__epoch() - self.slots
+            return sum(count for count, epoch in zip(self.__counts, self.__epochs) if epoch > oldest)  # noqa:E501
+
+    @property
+    def rate(self) -> float:
+        '''events per second in the window'''
+        return self.total / self.window
+
+    def __epoch(self) -> int:
+        return int(self.__source() / self.__width)
+
+    def inc(self, value: int = 1) -> int:
+        '''count value events, return the count of the current slot'''
+        if value <= 0:
+            raise ValueError(f"{self} inc value({value}) must be greater than 0")  # noqa:E501
+        with self.__intlock:
+            epoch: int = self.__epoch()
+            index: int = epoch % self.slots
+            if self.__epochs[index] != epoch:
+                self.__epochs[index] = epoch
+                self.__counts[index] = 0
+            self.__counts[index] += value
+            return self.__counts[index]
+
+    def reset(self) -> None:
+        with self.__intlock:
+            self.__counts = [0] * self.slots
+            self.__epochs = [-1] * self.slots
+
+
+class HdrHistogramMeter():  # pylint: disable=too-many-instance-attributes
+    '''High dynamic range histogram
+
+    Values from lowest to highest are counted in log-linear buckets with
+    a relative error below 10 ** -digits, only non-empty buckets take
+    memory. Values out of range are clamped, minimum and maximum stay
+    exact. Thread-safe.
+    '''
+
+    def __init__(self, lowest: float = 0.000001, highest: float = 3600.0,
+                 digits: int = 2):
+        if not 0.0 < lowest < highest or not 1 <= digits <= 5:
+            raise ValueError(f"invalid range {lowest} to {highest} of {digits} digits")  # noqa:E501
+        self.__lowest: float = float(lowest)
+        self.__highest: float = float(highest)
+        self.__digits: int = digits
+        self.__bits: int = ceil(log2(2 * 10 ** digits))  # sub bucket bits
+        self.__limit: int = int(highest / lowest)  # highest in lowest units
+        self.__counts: Dict[int, int] = {}
+        self.__total: int = 0
+        self.__sum: float = 0.0
+        self.__min: float = 0.0
+        self.__max: float = 0.0
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def lowest(self) -> float:
+        return self.__lowest
+
+    @property
+    def highest(self) -> float:
+        return self.__highest
+
+    @property
+    def digits(self) -> int:
+        '''significant decimal digits'''
+        return self.__digits
+
+    @property
+    def total(self) -> int:
+        return self.__total
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total > 0 else 0.0
+
+    @property
+    def minimum(self) -> float:
+        return self.__min
+
+    @property
+    def maximum(self) -> float:
+        return self.__max
+
+    def __index(self, value: float) -> int:
+        units: int = min(max(int(value / self.__lowest), 0), self.__limit)
+        shift: int = max(units.bit_length() - self.__bits, 0)
+        return ((shift << self.__bits) | (units >> shift)) if shift > 0 else units  # noqa:E501
+
+    def __upper(self, index: int) -> float:
+        '''highest value of the bucket at index'''
+        shift: int = index >> self.__bits
+        units: int = (index & ((1 << self.__bits) - 1)) if shift > 0 else index  # noqa:E501
+        return (((units + 1) << shift) - 1) * self.__lowest
+
+    def observe(self, value: float, count: int = 1) -> None:
+        if count <= 0:
+            raise ValueError(f"{self} observe count({count}) must be greater than 0")  # noqa:E501
+        index: int = self.__index(value)
+        with self.__intlock:
+            self.__counts[index] = self.__counts.get(index, 0) + count
+            if self.__total == 0:
+                self.__min = self.__max = value
+            else:
+                self.__min = min(self.__min, value)
+                self.__max = max(self.__max, value)
+            self.__total += count
+            self.__sum += value * count
+
+    def merge(self, other: "HdrHistogramMeter") -> None:
+        if (other.lowest, other.highest, other.digits) != (self.lowest, self.highest, self.digits):  # noqa:E501
+            raise ValueError(f"{self} and {other} have different ranges")
+        with other.__intlock:  # pylint: disable=protected-access
+            counts: Dict[int, int] = dict(other.__counts)  # noqa:E501 pylint: disable=protected-access
+            total, value_sum = other.total, other.sum
+            minimum, maximum = other.minimum, other.maximum
+        if total <= 0:
+            return
+        with self.__intlock:
+            for index, count in counts.items():
+                self.__counts[index] = self.__counts.get(index, 0) + count
+            self.__min = min(self.__min, minimum) if self.__total > 0 else minimum  # noqa:E501
+            self.__max = max(self.__max, maximum)
+            self.__total += total
+            self.__sum += value_sum
+
+    def percentile(self, percent: float) -> float:
+        '''highest value of the bucket holding the percentile'''
+        if not 0.0 <= percent <= 100.0:
+            raise ValueError(f"{self} percentile({percent}) must be between 0 and 100")  # noqa:E501
+        with self.__intlock:
+            if self.__total <= 0:
+                return 0.0
+            rank: float = max(self.__total * percent / 100.0, 1.0)
+            accumulated: int = 0
+            for index in sorted(self.__counts):
+                accumulated += self.__counts[index]
+                if accumulated >= self.__total:  # bucket of maximum
+                    return self.__max
+                if accumulated >= rank:
+                    return max(self.__upper(index), self.__min)
+            return self.__max  # pragma: no cover
+
+    def reset(self) -> None:
+        with self.__intlock:
+            self.__counts.clear()
+            self.__total = 0
+            self.__sum = 0.0
+            self.__min = self.__max = 0.0
+
+
+class TDigestMeter():  # pylint: disable=too-many-instance-attributes
+    '''t-digest quantile estimator
+
+    Observations are buffered and merged into at most about compression
+    centroids, small near both tails, so extreme percentiles (p99, p999)
+    stay accurate in bounded memory. Thread-safe.
+    '''
+
+    def __init__(self, compression: float = 100.0):
+        if compression < 10.0:
+            raise ValueError(f"invalid compression {compression}")
+        self.__compression: float = float(compression)
+        self.__centroids: List[Tuple[float, float]] = []  # (mean, weight)
+        self.__buffer: List[Tuple[float, float]] = []
+        self.__capacity: int = int(compression) * 5
+        self.__total: float = 0.0
+        self.__sum: float = 0.0
+        self.__min: float = 0.0
+        self.__max: float = 0.0
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}({id(self)})"
+
+    @property
+    def compression(self) -> float:
+        return self.__compression
+
+    @property
+    def total(self) -> int:
+        return int(self.__total)
+
+    @property
+    def sum(self) -> float:
+        return self.__sum
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.__total if self.__total > 0 else 0.0
+
+    @property
+    def minimum(self) -> float:
+        return self.__min
+
+    @property
+    def maximum(self) -> float:
+        return self.__max
+
+    @property
+    def centroids(self) -> List[Tuple[float, float]]:
+        '''merged (mean, weight) centroids'''
+        with self.__intlock:
+            self.__compress()
+            return list(self.__centroids)
+
+    def __scale(self, q: float) -> float:
+        return self.__compression / (2.0 * pi) * asin(2.0 * q - 1.0)
+
+    def __limit(self, k: float) -> float:
+        '''quantile of scale k, capped at 1'''
+        return 1.0 if k >= self.__compression / 4.0 else (sin(k * 2.0 * pi / self.__compression) + 1.0) / 2.0  # noqa:E501
+
+    def __compress(self) -> None:
+        if not self.__buffer:
+            return
+        points: List[Tuple[float, float]] = sorted(self.__centroids + self.__buffer)  # noqa:E501
+        self.__buffer = []
+        merged: List[Tuple[float, float]] = []
+        before: float = 0.0  # weight of merged centroids
+        mean, weight = points[0]
+        limit: float = self.__total * self.__limit(self.__scale(0.0) + 1.0)
+        for value, count in points[1:]:
+            if before + weight + count <= limit:
+                weight += count
+                mean += (value - mean) * count / weight
+                continue
+            merged.append((mean, weight))
+            before += weight
+            limit = self.__total * self.__limit(self.__scale(before / self.__total) + 1.0)  # noqa:E501
+            mean, weight = value, count
+        merged.append((mean, weight))
+        self.__centroids = merged
+
+    def __add(self, value: float, weight: float) -> None:
+        self.__buffer.append((value, weight))
+        self.__total += weight
+        if len(self.__buffer) >= self.__capacity:
+            self.__compress()
+
+    def observe(self, value: float) -> None:
+        with self.__intlock:
+            if self.__total <= 0:
+                self.__min = self.__max = value
+            else:
+                self.__min = min(self.__min, value)
+                self.__max = max(self.__max, value)
+            self.__sum += value
+            self.__add(value, 1.0)
+
+    def merge(self, other: "TDigestMeter") -> None:
+        centroids: List[Tuple[float, float]] = other.centroids
+        if not centroids:
+            return
+        with self.__intlock:
+            self.__min = min(self.__min, other.minimum) if self.__total > 0 else other.minimum  # noqa:E501
+            self.__max = max(self.__max, other.maximum)
+            self.__sum += other.sum
+            for mean, weight in centroids:
+                self.__add(mean, weight)
+
+    def percentile(self, percent: float) -> float:
+        '''interpolated value at the percentile'''
+        if not 0.0 <= percent <= 100.0:
+            raise ValueError(f"{self} percentile({percent}) must be between 0 and 100")  # noqa:E501
+        with self.__intlock:
+            self.__compress()
+            if not self.__centroids:
+                return 0.0
+            target: float = self.__total * percent / 100.0
+            # centroid centers at cumulative weights, min and max at ends
+            lower, lower_rank = self.__min, 0.0
+            before: float = 0.0
+            for mean, weight in self.__centroids:
+                center: float = before + weight / 2.0
+                if target <= center:
+                    return lower + (mean - lower) * (target - lower_rank) / (center - lower_rank) if center > lower_rank else mean  # noqa:E501
+                lower, lower_rank = mean, center
+                before += weight
+            return lower + (self.__max - lower) * (target - lower_rank) / (self.__total - lower_rank) if self.__total > lower_rank else self.__max  # noqa:E501
+
+    def reset(self) -> None:
+        with self.__intlock:
+            self.__centroids = []
+            self.__buffer = []
+            self.__total = 0.0
+            self.__sum = 0.0
+            self.__min = self.__max = 0.0
@@ -0,0 +1,242 @@
+# coding:utf-8
+
+from concurrent.futures import Executor
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import sys
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from xkits.meter import CountMeter
+from xkits.meter import TimeUnit
+from xkits.thread import TaskJob
+from xkits.thread import TaskRegistry
+
+
+class SharedBytes():
+    '''Bytes payload passed to worker processes through shared memory
+
+    Only the shared memory name and size are pickled. The creator owns
+    the shared memory and must release() it, worker processes load() a
+    copy of the bytes. Before Python 3.13 attaching registers the memory
+    with the resource tracker, so workers must share the tracker of the
+    creator (started before them, as ProcessTaskPool does), otherwise
+    their own tracker reports and unlinks it as leaked when they exit.
+    '''
+
+    def __init__(self, data: bytes):
+        memory: SharedMemory = SharedMemory(create=True, size=max(len(data), 1))  # noqa:E501
+        memory.buf[:len(data)] = data
+        self.__memory: Optional[SharedMemory] = memory
+        self.__name: str = memory.name
+        self.__size: int = len(data)
+
+    def __getstate__(self) -> Tuple[str, int]:
+        return self.__name, self.__size
+
+    def __setstate__(self, state: Tuple[str, int]) -> None:
+        self.__name, self.__size = state
+        self.__memory = None
+
+    @property
+    def name(self) -> str:
+        '''shared memory name'''
+        return self.__name
+
+    @property
+    def size(self) -> int:
+        '''payload size in bytes'''
+        return self.__size
+
+    def load(self) -> bytes:
+        '''copy payload out of shared memory'''
+        memory: SharedMemory = self.__memory or self.__attach(self.name)
+        try:
+            return bytes(memory.buf[:self.size])
+        finally:
+            if memory is not self.__memory:
+                memory.close()
+
+    @staticmethod
+    def __attach(name: str) -> SharedMemory:
+        '''attach to shared memory, its lifetime is owned by the creator'''
+        if sys.version_info >= (3, 13):  # pragma: no cover
+            return SharedMemory(name=name, track=False)  # noqa:E501 pylint: disable=unexpected-keyword-arg
+        return SharedMemory(name=name)
+
+    def release(self) -> None:
+        '''free shared memory, only by the creator'''
+        if self.__memory is not None:
+            self.__memory.close()
+            self.__memory.unlink()
+            self.__memory = None
+
+
+class ProcessTaskJob(TaskJob):
+    '''Task job run in a worker process
+
+    The job completes (result, future and callbacks) in the parent once
+    the worker process returns.
+    '''
+
+    def __init__(self, no: int, fn: Callable, *args: Any, **kwargs: Any):
+        super().__init__(no, fn, *args, **kwargs)
+        self.__remote: Optional[Future] = None
+        self.__shared: List[SharedBytes] = []
+
+    @property
+    def remote(self) -> Optional[Future]:
+        '''future of the worker process call'''
+        return self.__remote
+
+    @staticmethod
+    def invoke(fn: Callable, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:  # noqa:E501
+        '''call fn in worker process with shared bytes loaded'''
+        args = tuple(arg.load() if isinstance(arg, SharedBytes) else arg for arg in args)  # noqa:E501
+        kwargs = {k: v.load() if isinstance(v, SharedBytes) else v for k, v in kwargs.items()}  # noqa:E501
+        return fn(*args, **kwargs)
+
+    def __share(self, value: Any, threshold: int) -> Any:
+        if threshold <= 0 or not isinstance(value, (bytes, bytearray)) or len(value) < threshold:  # noqa:E501
+            return value
+        shared: SharedBytes = SharedBytes(value)
+        self.__shared.append(shared)
+        return shared
+
+    def dispatch(self, executor: Executor, threshold: int = 0) -> Future:
+        '''submit to executor, bytes of threshold size or more are shared'''
+        try:
+            args = tuple(self.__share(arg, threshold) for arg in self.args)
+            kwargs = {k: self.__share(v, threshold) for k, v in self.kwargs.items()}  # noqa:E501
+            self.__remote = executor.submit(self.invoke, self.fn, args, kwargs)  # noqa:E501
+        except BaseException:  # free shared memory if not submitted
+            self.__release()
+            raise
+        self.__remote.add_done_callback(self.__complete)
+        return self.__remote
+
+    def __release(self) -> None:
+        for shared in self.__shared:
+            shared.release()
+        self.__shared.clear()
+
+    def __complete(self, remote: Future) -> None:
+        self.__release()
+        if remote.cancelled():
+            super().cancel()
+        else:
+            self.run()
+
+    def call(self) -> Any:
+        assert self.remote is not None, f"{self} is not dispatched"
+        return self.remote.result()
+
+    def cancel(self) -> bool:
+        if self.remote is not None and not self.remote.cancel():
+            return False
+        return super().cancel()
+
+
+class ProcessTaskPool(TaskRegistry):  # noqa:E501 pylint: disable=too-many-instance-attributes
+    '''Task Process Pool
+
+    Same job surface as TaskPool for CPU-bound work: functions and
+    arguments must be picklable. Bytes arguments of share bytes or more
+    are passed through shared memory instead of the call pipe. Finished
+    jobs are kept by retain and retention as in TaskRegistry.
+    '''
+
+    def __init__(self, workers: int = 0, initializer: Optional[Callable] = None,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 initargs: Tuple = (), share: int = 1024 * 1024,
+                 retain: int = 0, retention: TimeUnit = 0):
+        self.__workers: Optional[int] = workers if workers > 0 else None
+        self.__initializer: Optional[Callable] = initializer
+        self.__initargs: Tuple = initargs
+        self.__share: int = share
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__counter: CountMeter = CountMeter()
+        self.__intlock: Lock = Lock()  # internal lock
+        super().__init__(retain, retention)
+
+    def __enter__(self):
+        self.startup()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    @property
+    def running(self) -> bool:
+        '''worker processes are started'''
+        return self.__executor is not None
+
+    @property
+    def share(self) -> int:
+        '''min size of bytes arguments passed through shared memory'''
+        return self.__share
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self.__executor is None:
+            raise RuntimeError("process pool is not started")
+        return self.__executor
+
+    def submit_job(self, job: ProcessTaskJob) -> ProcessTaskJob:
+        assert isinstance(job, ProcessTaskJob), f"{job} is not a ProcessTaskJob"  # noqa:E501
+        executor: ProcessPoolExecutor = self.executor  # raise if not started
+        self.register(job, count=True)
+        try:
+            job.dispatch(executor, self.share)
+        except BaseException:  # not submitted
+            self.forget(job.id)
+            raise
+        return job
+
+    def submit_task(self, fn: Callable, *args: Any, **kwargs: Any) -> ProcessTaskJob:  # noqa:E501
+        '''submit a task to worker processes'''
+        with self.__intlock:  # generate job id under lock protection
+            sn: int = self.__counter.inc()  # serial number
+            return self.submit_job(ProcessTaskJob(sn, fn, *args, **kwargs))
+
+    def map(self, fn: Callable, *iterables: Iterable[Any], chunksize: int = 1,  # noqa:E501
+            timeout: Optional[TimeUnit] = None) -> Iterator[Any]:
+        '''submit fn over iterables in chunks, yield results in order
+
+        The calls go to the executor as in Executor.map, they are not jobs
+        of the pool and are not counted by status_counter.
+        '''
+        return self.executor.map(fn, *iterables, timeout=timeout, chunksize=chunksize)  # noqa:E501
+
+    def shutdown(self) -> None:
+        '''stop worker processes and waiting for all jobs finish'''
+        with self.__intlock:
+            if self.__executor is not None:
+                self.__executor.shutdown(wait=True)
+                self.__executor = None
+
+    def startup(self) -> None:
+        '''start worker processes'''
+        with self.__intlock:
+            if self.__executor is None:
+                if os.name == "posix":  # workers share the tracker
+                    resource_tracker.ensure_running()
+                self.__executor = ProcessPoolExecutor(self.__workers, initializer=self.__initializer, initargs=self.__initargs)  # noqa:E501
+
+    def restart(self) -> None:
+        '''waiting for all submitted tasks to end and restart'''
+        self.shutdown()
+        self.startup()
+
+    def barrier(self) -> None:
+        '''same as restart'''
+        self.restart()
@@ -0,0 +1,629 @@
+# coding:utf-8
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from datetime import timedelta
+from heapq import heapify
+from heapq import heappop
+from heapq import heappush
+from itertools import count
+from queue import Empty
+from queue import Full
+from queue import Queue
+from random import random
+import sys
+from threading import Condition
+from threading import Lock
+from threading import Semaphore
+from threading import Thread
+from threading import current_thread  # noqa:H306
+from threading import local  # noqa:H306
+from time import monotonic
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import FrozenSet
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from xkits.meter import TimeUnit
+
+if TYPE_CHECKING:
+    from xkits.thread import DaemonTaskJob  # pragma: no cover
+    from xkits.thread import TaskJob  # pragma: no cover
+
+if sys.version_info >= (3, 9):
+    JobQueue = Queue[Optional["TaskJob"]]  # noqa: E501, pragma: no cover, pylint: disable=unsubscriptable-object
+else:  # Python3.8 TypeError
+    JobQueue = Queue  # pragma: no cover
+
+
+class TaskScheduler():
+    '''FIFO task job scheduler, one queue shared by all task threads
+
+    Putting None stops the scheduler: get() then returns None to every
+    task thread once the submitted jobs have been taken. drain() removes
+    the remaining jobs and makes the scheduler usable again.
+    '''
+    PRIORITY: bool = False  # orders jobs by priority and tag
+
+    def __init__(self, workers: int = 1, maxsize: int = 0):
+        self.__workers: int = max(workers, 1)
+        self.__jobs: JobQueue = Queue(maxsize)
+
+    def __len__(self) -> int:
+        return self.__jobs.qsize()
+
+    @property
+    def workers(self) -> int:
+        '''number of task threads'''
+        return self.__workers
+
+    def empty(self) -> bool:
+        return self.__jobs.empty()
+
+    def put(self, job: Optional["TaskJob"], block: bool = True, timeout: Optional[TimeUnit] = None) -> None:  # noqa:E501
+        '''put a job, or None to stop, raise Full if there is no room'''
+        self.__jobs.put(job, block=block, timeout=timeout)
+
+    def get(self, worker: int = 0, timeout: Optional[TimeUnit] = None) -> Optional["TaskJob"]:  # noqa:E501 pylint: disable=unused-argument
+        '''take a job for the worker, raise Empty after timeout'''
+        job: Optional["TaskJob"] = self.__jobs.get(block=True, timeout=timeout)
+        if job is None:  # stop task
+            self.__jobs.put(job)  # notice other tasks
+        return job
+
+    def discard(self) -> Optional["TaskJob"]:
+        '''remove and return the oldest job, None if there is no job'''
+        try:
+            job: Optional["TaskJob"] = self.__jobs.get(block=False)
+        except Empty:
+            return None
+        if job is None:  # keep the stop mark
+            self.__jobs.put(job)
+        return job
+
+    def drain(self) -> List["TaskJob"]:
+        '''remove and return all remaining jobs, clear the stop mark'''
+        jobs: List["TaskJob"] = []
+        while not self.__jobs.empty():
+            if (job := self.__jobs.get(block=True)) is not None:
+                jobs.append(job)
+        return jobs
+
+
+class WorkStealingScheduler(TaskScheduler):
+    '''Task job scheduler with a deque per task thread
+
+    Jobs put from a task thread go to its own deque, other jobs are spread
+    round-robin. A task thread takes jobs from the head of its own deque
+    and, when that is empty, steals a batch (up to half, at most BATCH)
+    from the tail of another deque. Threads only touch the shared
+    condition when they run out of work, so there is no single lock every
+    job has to pass through.
+    '''
+    BATCH: int = 32
+
+    def __init__(self, workers: int = 1, maxsize: int = 0):
+        super().__init__(workers=workers)
+        self.__deques: Tuple[Deque["TaskJob"], ...] = tuple(deque() for _ in range(self.workers))  # noqa:E501
+        self.__slots: Optional[Semaphore] = Semaphore(maxsize) if maxsize > 0 else None  # noqa:E501
+        self.__local: local = local()  # worker index of task threads
+        self.__next: Iterator[int] = count()
+        self.__cond: Condition = Condition()
+        self.__sleepers: int = 0
+        self.__closed: bool = False
+
+    def __len__(self) -> int:
+        return sum(len(jobs) for jobs in self.__deques)
+
+    def empty(self) -> bool:
+        return not any(self.__deques)
+
+    def put(self, job: Optional["TaskJob"], block: bool = True, timeout: Optional[TimeUnit] = None) -> None:  # noqa:E501
+        if job is None:
+            with self.__cond:
+                self.__closed = True
+                self.__cond.notify_all()
+            return
+
+        if self.__slots is not None and not self.__slots.acquire(blocking=block, timeout=timeout if block else None):  # noqa:E501 pylint: disable=consider-using-with
+            raise Full
+        worker: Optional[int] = getattr(self.__local, "worker", None)
+        if worker is None:
+            worker = next(self.__next)
+        self.__deques[worker % self.workers].append(job)
+        if self.__sleepers > 0:
+            with self.__cond:
+                self.__cond.notify()
+
+    def __steal(self, worker: int) -> bool:
+        jobs: Deque["TaskJob"] = self.__deques[worker]
+        for offset in range(1, self.workers):
+            victim: Deque["TaskJob"] = self.__deques[(worker + offset) % self.workers]  # noqa:E501
+            for _ in range(min(max(len(victim) // 2, 1), self.BATCH)):
+                try:
+                    jobs.appendleft(victim.pop())
+                except IndexError:
+                    break
+            if jobs:
+                return True
+        return False
+
+    def get(self, worker: int = 0, timeout: Optional[TimeUnit] = None) -> Optional["TaskJob"]:  # noqa:E501
+        worker %= self.workers
+        self.__local.worker = worker
+        jobs: Deque["TaskJob"] = self.__deques[worker]
+        while True:
+            try:
+                job: "TaskJob" = jobs.popleft()
+                if self.__slots is not None:
+                    self.__slots.release()
+                return job
+            except IndexError:
+                pass
+
+            if self.__steal(worker):
+                continue
+
+            with self.__cond:
+                self.__sleepers += 1
+                try:
+                    if not self.__cond.wait_for(lambda: self.__closed or not self.empty(), timeout):  # noqa:E501
+                        raise Empty
+                    if self.empty():  # closed
+                        return None
+                finally:
+                    self.__sleepers -= 1
+
+    def discard(self) -> Optional["TaskJob"]:
+        '''remove and return the head job of the longest deque'''
+        with self.__cond:
+            jobs: Deque["TaskJob"] = max(self.__deques, key=len)
+            try:
+                job: "TaskJob" = jobs.popleft()
+            except IndexError:
+                return None
+        if self.__slots is not None:
+            self.__slots.release()
+        return job
+
+    def drain(self) -> List["TaskJob"]:
+        jobs: List["TaskJob"] = []
+        with self.__cond:
+            for items in self.__deques:
+                while items:
+                    jobs.append(items.popleft())
+                    if self.__slots is not None:
+                        self.__slots.release()
+            self.__closed = False
+        return jobs
+
+
+class PriorityScheduler(TaskScheduler):  # noqa: E501, pylint: disable=too-many-instance-attributes
+    '''Task job scheduler ordered by job priority, lower runs first
+
+    Jobs of the same priority are shared between tags by weighted fair
+    queueing: each job gets a virtual finish time of the later of the
+    current virtual time and the previous finish time of its tag, plus
+    1 / weight of the tag (weights default to 1). Jobs of one tag stay
+    FIFO. Use functools.partial to pass weights to TaskPool.
+    '''
+    PRIORITY: bool = True
+
+    def __init__(self, workers: int = 1, maxsize: int = 0,
+                 weights: Optional[Dict[Any, float]] = None):
+        if any(weight <= 0 for weight in (weights or {}).values()):
+            raise ValueError(f"invalid weights {weights}")
+        super().__init__(workers=workers)
+        self.__maxsize: int = maxsize
+        self.__weights: Dict[Any, float] = dict(weights or {})
+        self.__finish: Dict[Any, float] = {}  # last finish time of tags
+        self.__vtime: float = 0.0
+        self.__jobs: List[Tuple[int, float, int, "TaskJob"]] = []
+        self.__sequence: Iterator[int] = count()
+        self.__cond: Condition = Condition()
+        self.__closed: bool = False
+
+    def __len__(self) -> int:
+        return len(self.__jobs)
+
+    @property
+    def weights(self) -> Dict[Any, float]:
+        '''fair queueing weights of tags'''
+        return self.__weights
+
+    def empty(self) -> bool:
+        return not self.__jobs
+
+    def put(self, job: Optional["TaskJob"], block: bool = True, timeout: Optional[TimeUnit] = None) -> None:  # noqa:E501
+        with self.__cond:
+            if job is None:
+                self.__closed = True
+                self.__cond.notify_all()
+                return
+            if not self.__cond.wait_for(lambda: not 0 < self.__maxsize <= len(self.__jobs), timeout if block else 0):  # noqa:E501
+                raise Full
+            weight: float = self.weights.get(job.tag, 1.0)
+            finish: float = max(self.__vtime, self.__finish.get(job.tag, 0.0)) + 1.0 / weight  # noqa:E501
+            self.__finish[job.tag] = finish
+            heappush(self.__jobs, (job.priority, finish, next(self.__sequence), job))  # noqa:E501
+            self.__cond.notify_all()
+
+    def get(self, worker: int = 0, timeout: Optional[TimeUnit] = None) -> Optional["TaskJob"]:  # noqa:E501
+        with self.__cond:
+            if not self.__cond.wait_for(lambda: self.__closed or self.__jobs, timeout):  # noqa:E501
+                raise Empty
+            if not self.__jobs:  # closed
+                return None
+            _, finish, _, job = heappop(self.__jobs)
+            self.__vtime = max(self.__vtime, finish)
+            self.__cond.notify_all()
+            return job
+
+    def discard(self) -> Optional["TaskJob"]:
+        '''remove and return the earliest put job'''
+        with self.__cond:
+            if not self.__jobs:
+                return None
+            index: int = min(range(len(self.__jobs)), key=lambda i: self.__jobs[i][2])  # noqa:E501
+            job: "TaskJob" = self.__jobs[index][3]
+            self.__jobs[index] = self.__jobs[-1]
+            self.__jobs.pop()
+            heapify(self.__jobs)
+            self.__cond.notify_all()
+            return job
+
+    def drain(self) -> List["TaskJob"]:
+        with self.__cond:
+            jobs = [heappop(self.__jobs)[3] for _ in range(len(self.__jobs))]
+            self.__finish.clear()
+            self.__vtime = 0.0
+            self.__closed = False
+            self.__cond.notify_all()
+            return jobs
+
+
+class TaskTimer():
+    '''Timer thread which calls functions when they are due
+
+    Pending calls are kept in a min-heap ordered by due time, and the
+    timer thread sleeps on a condition until the earliest one is due or
+    an earlier one is scheduled. Calls run in the timer thread, so they
+    should be short (e.g. hand a job over to a queue).
+    '''
+
+    def __init__(self, name: str = "timer"):
+        self.__name: str = name
+        self.__calls: List[Tuple[float, int, Callable[..., Any], Tuple[Any, ...]]] = []  # noqa:E501
+        self.__sequence: Iterator[int] = count()
+        self.__cond: Condition = Condition()
+        self.__thread: Optional[Thread] = None
+
+    def __len__(self) -> int:
+        return len(self.__calls)
+
+    @property
+    def name(self) -> str:
+        '''timer thread name'''
+        return self.__name
+
+    @property
+    def running(self) -> bool:
+        '''timer thread is started'''
+        return self.__thread is not None
+
+    def schedule(self, delay: TimeUnit, fn: Callable[..., Any], *args: Any) -> bool:  # noqa:E501
+        '''call fn(*args) after delay seconds, False if timer is stopped'''
+        with self.__cond:
+            if self.__thread is None:
+                return False
+            call = (monotonic() + max(float(delay), 0.0), next(self.__sequence), fn, args)  # noqa:E501
+            heappush(self.__calls, call)
+            if self.__calls[0] is call:  # wake up for an earlier due time
+                self.__cond.notify()
+            return True
+
+    def __loop(self) -> None:
+        with self.__cond:
+            while self.__thread is current_thread():
+                if not self.__calls:
+                    self.__cond.wait()
+                    continue
+                if (delay := self.__calls[0][0] - monotonic()) > 0.0:
+                    self.__cond.wait(delay)
+                    continue
+                _, _, fn, args = heappop(self.__calls)
+                self.__cond.release()
+                try:
+                    fn(*args)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    pass  # keep the timer running
+                finally:
+                    self.__cond.acquire()
+
+    def startup(self) -> None:
+        '''start timer thread'''
+        with self.__cond:
+            if self.__thread is None:
+                self.__thread = Thread(name=self.name, target=self.__loop, daemon=True)  # noqa:E501
+                self.__thread.start()
+
+    def shutdown(self) -> List[Tuple[Callable[..., Any], Tuple[Any, ...]]]:  # noqa:E501
+        '''stop timer thread, return pending calls in due order'''
+        with self.__cond:
+            thread: Optional[Thread] = self.__thread
+            self.__thread = None
+            calls = [heappop(self.__calls)[2:] for _ in range(len(self.__calls))]  # noqa:E501
+            self.__cond.notify_all()
+        if thread is not None and thread is not current_thread():
+            thread.join()
+        return calls
+
+
+class DaemonSchedule():
+    '''Schedule of daemon job calls
+
+    The base schedule calls the job again at once. After consecutive
+    failures the delay is at least backoff * 2 ** (failures - 1) seconds,
+    up to max_backoff, and a random jitter of up to jitter seconds is added
+    to every delay so that daemons started together spread out.
+    '''
+
+    def __init__(self, jitter: TimeUnit = 0.0, backoff: TimeUnit = 0.0,
+                 max_backoff: TimeUnit = 300.0):
+        self.__jitter: float = max(float(jitter), 0.0)
+        self.__backoff: float = max(float(backoff), 0.0)
+        self.__max_backoff: float = max(float(max_backoff), self.__backoff)
+
+    @property
+    def jitter(self) -> float:
+        '''max random seconds added to each delay'''
+        return self.__jitter
+
+    @property
+    def backoff(self) -> float:
+        '''delay after the first failure, doubled by each further one'''
+        return self.__backoff
+
+    @property
+    def max_backoff(self) -> float:
+        '''max delay after failures'''
+        return self.__max_backoff
+
+    def period(self, runtime: float) -> float:  # noqa:E501 pylint: disable=unused-argument
+        '''seconds from the end of a call of runtime seconds to the next'''
+        return 0.0
+
+    def first(self) -> float:
+        '''seconds until the first call'''
+        return self.jitter * random()
+
+    def delay(self, runtime: float, failures: int = 0) -> float:
+        '''seconds until the next call after a call of runtime seconds'''
+        delay: float = self.period(runtime)
+        if failures > 0 and self.backoff > 0.0:
+            delay = max(delay, min(self.backoff * 2 ** min(failures - 1, 64), self.max_backoff))  # noqa:E501
+        return delay + self.jitter * random()
+
+
+class IntervalSchedule(DaemonSchedule):
+    '''Call every interval seconds
+
+    With fixed delay (default) the interval is counted from the end of
+    the last call, with fixed rate from its start, so that calls start
+    interval seconds apart as long as they take less than interval.
+    '''
+
+    def __init__(self, interval: TimeUnit, fixed_rate: bool = False,  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 jitter: TimeUnit = 0.0, backoff: TimeUnit = 0.0,
+                 max_backoff: TimeUnit = 300.0):
+        if interval < 0:
+            raise ValueError(f"invalid interval {interval}")
+        super().__init__(jitter=jitter, backoff=backoff, max_backoff=max_backoff)  # noqa:E501
+        self.__interval: float = float(interval)
+        self.__fixed_rate: bool = fixed_rate
+
+    @property
+    def interval(self) -> float:
+        return self.__interval
+
+    @property
+    def fixed_rate(self) -> bool:
+        return self.__fixed_rate
+
+    def period(self, runtime: float) -> float:
+        return max(self.interval - runtime, 0.0) if self.fixed_rate else self.interval  # noqa:E501
+
+
+class CronSchedule(DaemonSchedule):
+    '''Cron-like "minute hour day month weekday" schedule in local time
+
+    Fields are *, numbers, ranges a-b and steps */n, a-b/n or a/n, or lists
+    of them separated by commas. Weekday 0 or 7 is Sunday. As in cron, when
+    both day and weekday are restricted, a day matching either is due.
+    '''
+    FIELDS: Tuple[Tuple[int, int], ...] = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))  # noqa:E501
+
+    def __init__(self, expr: str, jitter: TimeUnit = 0.0,
+                 backoff: TimeUnit = 0.0, max_backoff: TimeUnit = 300.0):
+        fields: List[str] = expr.split()
+        if len(fields) != len(self.FIELDS):
+            raise ValueError(f"invalid cron expression '{expr}'")
+        super().__init__(jitter=jitter, backoff=backoff, max_backoff=max_backoff)  # noqa:E501
+        values = [self.parse(field, *limits) for field, limits in zip(fields, self.FIELDS)]  # noqa:E501
+        self.__expr: str = expr
+        self.__minutes: FrozenSet[int] = values[0]
+        self.__hours: FrozenSet[int] = values[1]
+        self.__days: FrozenSet[int] = values[2]
+        self.__months: FrozenSet[int] = values[3]
+        self.__weekdays: FrozenSet[int] = frozenset(day % 7 for day in values[4])  # noqa:E501
+        self.__either: bool = fields[2] != "*" and fields[4] != "*"
+        self.due(datetime.now())  # raise ValueError if never due
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}('{self.expr}')"
+
+    @property
+    def expr(self) -> str:
+        return self.__expr
+
+    @staticmethod
+    def parse(field: str, low: int, high: int) -> FrozenSet[int]:
+        '''values of a cron field between low and high'''
+        values: Set[int] = set()
+        for part in field.split(","):
+            scope, _, step = part.partition("/")
+            if scope == "*":
+                start, stop = low, high
+            elif "-" in scope:
+                start, stop = (int(value) for value in scope.split("-", 1))
+            else:
+                start = int(scope)
+                stop = high if step else start
+            if not low <= start <= stop <= high or (step and int(step) < 1):  # noqa:E501
+                raise ValueError(f"invalid cron field '{field}'")
+            values.update(range(start, stop + 1, int(step) if step else 1))
+        return frozenset(values)
+
+    def __match_day(self, moment: datetime) -> bool:
+        day: bool = moment.day in self.__days
+        weekday: bool = moment.isoweekday() % 7 in self.__weekdays
+        return day or weekday if self.__either else day and weekday
+
+    def due(self, after: datetime) -> datetime:
+        '''first due minute after a moment'''
+        moment: datetime = after.replace(second=0, microsecond=0) + timedelta(minutes=1)  # noqa:E501
+        while moment.year <= after.year + 4:  # a leap day is due in 4 years
+            if moment.month not in self.__months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)  # noqa:E501
+            elif not self.__match_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.__hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.__minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"{self} is never due")
+
+    def period(self, runtime: float) -> float:
+        now: datetime = datetime.now()
+        return (self.due(now) - now).total_seconds()
+
+    def first(self) -> float:
+        return self.delay(0.0)
+
+
+class DaemonScheduler():
+    '''Shared scheduler of daemon jobs
+
+    One timer thread keeps the due time of every daemon job and hands due
+    jobs to a few worker threads, which call the job once and schedule its
+    next call. Many periodic jobs then share a few threads instead of
+    having one each. Stopping a job (job.shutdown()) removes it.
+    '''
+
+    def __init__(self, workers: int = 2, name: str = "daemon"):
+        self.__name: str = name
+        self.__workers: int = max(workers, 1)
+        self.__timer: TaskTimer = TaskTimer(f"{name}_timer")
+        self.__executor: Optional[ThreadPoolExecutor] = None
+        self.__jobs: Dict["DaemonTaskJob", Optional[int]] = {}  # due token
+        self.__tokens: Iterator[int] = count()
+        self.__intlock: Lock = Lock()  # internal lock
+
+    def __enter__(self):
+        self.startup()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def __len__(self) -> int:
+        return len(self.__jobs)
+
+    def __contains__(self, job: "DaemonTaskJob") -> bool:
+        return job in self.__jobs
+
+    @property
+    def name(self) -> str:
+        '''scheduler thread name prefix'''
+        return self.__name
+
+    @property
+    def workers(self) -> int:
+        '''number of worker threads'''
+        return self.__workers
+
+    @property
+    def running(self) -> bool:
+        '''scheduler threads are started'''
+        return self.__executor is not None
+
+    def __schedule(self, job: "DaemonTaskJob", delay: float) -> bool:
+        token: int = next(self.__tokens)
+        self.__jobs[job] = token  # an earlier due of job is outdated
+        return self.__timer.schedule(delay, self.__dispatch, job, token)
+
+    def submit(self, job: "DaemonTaskJob") -> "DaemonTaskJob":
+        '''start job in daemon mode'''
+        with self.__intlock:
+            if self.__executor is None:
+                raise RuntimeError(f"{self.name} scheduler is not started")
+            if job not in self.__jobs and job.attach(self):
+                self.__schedule(job, job.first_delay())
+        return job
+
+    def wakeup(self, job: "DaemonTaskJob") -> None:
+        '''dispatch job now, e.g. to remove it once it is stopped'''
+        with self.__intlock:
+            if self.__jobs.get(job) is None:  # removed or being called
+                return
+            self.__schedule(job, 0.0)
+
+    def __dispatch(self, job: "DaemonTaskJob", token: int) -> None:
+        with self.__intlock:
+            if self.__jobs.get(job) != token:
+                return
+            if job.daemon_running and self.__executor is not None:
+                self.__jobs[job] = None  # being called
+                self.__executor.submit(self.__call, job)
+                return
+            del self.__jobs[job]
+        job.detach()
+
+    def __call(self, job: "DaemonTaskJob") -> None:
+        delay: float = job.tick()
+        with self.__intlock:
+            if job.daemon_running and self.__executor is not None and self.__schedule(job, delay):  # noqa:E501
+                return
+            del self.__jobs[job]
+        job.detach()
+
+    def shutdown(self) -> None:
+        '''stop all daemon jobs and scheduler threads'''
+        with self.__intlock:
+            executor: Optional[ThreadPoolExecutor] = self.__executor
+            self.__executor = None
+        self.__timer.shutdown()  # drop pending dues
+        if executor is not None:
+            executor.shutdown(wait=True)
+        with self.__intlock:
+            jobs: List["DaemonTaskJob"] = list(self.__jobs)
+            self.__jobs.clear()
+        for job in jobs:
+            job.detach()
+
+    def startup(self) -> None:
+        '''start scheduler threads'''
+        with self.__intlock:
+            if self.__executor is None:
+                self.__timer.startup()
+                self.__executor = ThreadPoolExecutor(self.workers, f"{self.name}_worker")  # noqa:E501
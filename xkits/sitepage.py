@@ -16,7 +16,6 @@ from bs4 import BeautifulSoup
 from requests import Response
 from requests import Session
 
-from xkits.cache import CacheMiss
 from xkits.cache import CachePool
 from xkits.meter import TimeUnit
 
@@ -123,9 +122,9 @@ class PageCache(CachePool[str, Page]):
     '''Website pages cache pool'''
 
     def __init__(self, session: Optional[Session] = None,
-                 lifetime: TimeUnit = 0):
+                 lifetime: TimeUnit = 0, capacity: int = 0):
         self.__session: Optional[Session] = session
-        super().__init__(lifetime=lifetime)
+        super().__init__(lifetime=lifetime, capacity=capacity)
 
     def __str__(self) -> str:
         return f"website pages cache pool at {id(self)}"  # pragma: no cover
@@ -139,21 +138,15 @@ class PageCache(CachePool[str, Page]):
 
     def fetch(self, url: str, session: Optional[Session] = None,
               timeout: SessionTimeout = None) -> Page:
-        while True:
-            try:
-                return super().get(url)
-            except CacheMiss:
-                page = Page(url=url, session=session or self.session,
-                            timeout=timeout)
-                super().put(url, page)
+        return super().get_or_load(url, lambda: Page(url=url, session=session or self.session, timeout=timeout))  # noqa:E501
 
 
 class Site(PageCache):
     '''Website with pages cache pool'''
 
     def __init__(self, base: str, session: Optional[Session] = None,
-                 lifetime: TimeUnit = 0):
-        super().__init__(session=session, lifetime=lifetime)
+                 lifetime: TimeUnit = 0, capacity: int = 0):
+        super().__init__(session=session, lifetime=lifetime, capacity=capacity)  # noqa:E501
         components: ParseResult = urlparse(url=base)
         self.__baseurl: str = urlunparse(components)
         self.__components: ParseResult = components
@@ -0,0 +1,131 @@
+# coding:utf-8
+
+from threading import Lock
+from typing import Callable
+from typing import Dict
+
+from xkits.meter import CountMeter
+from xkits.meter import HdrHistogramMeter
+from xkits.meter import TimeMeter
+
+
+class TaskMetrics():  # pylint: disable=too-many-instance-attributes
+    '''Pool level metrics of task jobs
+
+    Queue wait (submit to start), run time and end-to-end latency are
+    HDR histograms of bounded memory, their percentile() (e.g. p50 or
+    p99) has a relative error below 10 ** -digits. Throughput is
+    completed jobs per second since reset, depth reads the current queue
+    depth from the pool.
+    '''
+    HIGHEST: float = 86400.0  # longer durations are clamped
+
+    def __init__(self, depth: Callable[[], int] = lambda: 0, digits: int = 2):  # noqa:E501
+        self.__gauge: Callable[[], int] = depth
+        self.__wait: HdrHistogramMeter = HdrHistogramMeter(highest=self.HIGHEST, digits=digits)  # noqa:E501
+        self.__run: HdrHistogramMeter = HdrHistogramMeter(highest=self.HIGHEST, digits=digits)  # noqa:E501
+        self.__latency: HdrHistogramMeter = HdrHistogramMeter(highest=self.HIGHEST, digits=digits)  # noqa:E501
+        self.__submitted: CountMeter = CountMeter()
+        self.__active: CountMeter = CountMeter(allow_sub=True)
+        self.__peak: int = 0
+        self.__uptime: TimeMeter = TimeMeter()
+        self.__intlock: Lock = Lock()  # internal lock
+
+    @property
+    def wait(self) -> HdrHistogramMeter:
+        '''seconds jobs waited in queue'''
+        return self.__wait
+
+    @property
+    def run(self) -> HdrHistogramMeter:
+        '''seconds jobs ran'''
+        return self.__run
+
+    @property
+    def latency(self) -> HdrHistogramMeter:
+        '''seconds from submit to finish'''
+        return self.__latency
+
+    @property
+    def submitted(self) -> int:
+        '''accepted jobs'''
+        return self.__submitted.total
+
+    @property
+    def completed(self) -> int:
+        '''executed jobs'''
+        return self.__latency.total
+
+    @property
+    def active(self) -> int:
+        '''jobs being executed'''
+        return self.__active.total
+
+    @property
+    def depth(self) -> int:
+        '''jobs in queue'''
+        return self.__gauge()
+
+    @property
+    def peak_depth(self) -> int:
+        '''max jobs in queue seen by submits'''
+        return self.__peak
+
+    @property
+    def uptime(self) -> float:
+        '''seconds since reset'''
+        return self.__uptime.runtime
+
+    @property
+    def throughput(self) -> float:
+        '''completed jobs per second since reset'''
+        return self.completed / uptime if (uptime := self.uptime) > 0.0 else 0.0  # noqa:E501
+
+    def submit(self, depth: int) -> None:
+        with self.__intlock:
+            self.__submitted.inc()
+            self.__peak = max(self.__peak, depth)
+
+    def start(self) -> None:
+        with self.__intlock:
+            self.__active.inc()
+
+    def finish(self, wait: float, run: float) -> None:
+        with self.__intlock:
+            self.__active.dec()
+            self.__wait.observe(wait)
+            self.__run.observe(run)
+            self.__latency.observe(wait + run)
+
+    def discard(self) -> None:
+        '''a started job was cancelled'''
+        with self.__intlock:
+            self.__active.dec()
+
+    def reset(self) -> None:
+        '''drop histograms and counters, active jobs are kept'''
+        with self.__intlock:
+            self.__wait.reset()
+            self.__run.reset()
+            self.__latency.reset()
+            self.__submitted = CountMeter()
+            self.__peak = self.depth
+            self.__uptime.restart()
+
+    def snapshot(self) -> Dict[str, float]:
+        '''counts, gauges, rates and latency percentiles (seconds)'''
+        with self.__intlock:
+            values: Dict[str, float] = {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "active": self.active,
+                "depth": self.depth,
+                "peak_depth": self.peak_depth,
+                "throughput": self.throughput,
+            }
+            for name, meter in (("wait", self.wait), ("run", self.run), ("latency", self.latency)):  # noqa:E501
+                values[f"{name}_mean"] = meter.mean
+                values[f"{name}_p50"] = meter.percentile(50)
+                values[f"{name}_p99"] = meter.percentile(99)
+                values[f"{name}_max"] = meter.maximum
+            return values
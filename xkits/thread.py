@@ -1,78 +1,46 @@
 # coding:utf-8
 
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from concurrent.futures import Future
 from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
-import sys
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import as_completed as futures_as_completed
+from concurrent.futures import wait as futures_wait
+from enum import Enum
+from functools import partial
+from queue import Empty
+from queue import Full
+from threading import Condition
+from threading import Event
 from threading import Lock
 from threading import Thread
 from threading import current_thread  # noqa:H306
-from time import sleep
+from time import monotonic
 from typing import Any
 from typing import Callable
 from typing import Dict
-from typing import Generic
+from typing import Iterable
 from typing import Iterator
+from typing import List
 from typing import Optional
 from typing import Set
 from typing import Tuple
-from typing import TypeVar
 
 from xkits.actuator import Logger
 from xkits.actuator import commands  # noqa:H306
+from xkits.lock import NamedLock  # noqa:F401 pylint: disable=unused-import
+from xkits.lock import lock_profiler
 from xkits.meter import CountMeter
 from xkits.meter import StatusCountMeter
 from xkits.meter import TimeMeter
 from xkits.meter import TimeUnit
-
-LKIT = TypeVar("LKIT")
-LKNT = TypeVar("LKNT")
-
-
-class NamedLock(Generic[LKNT]):
-
-    class LockItem(Generic[LKIT]):
-        def __init__(self, name: LKIT):
-            self.__lock: Lock = Lock()
-            self.__name: LKIT = name
-
-        @property
-        def name(self) -> LKIT:
-            return self.__name
-
-        @property
-        def lock(self) -> Lock:
-            return self.__lock
-
-    def __init__(self):
-        self.__locks: Dict[LKNT, NamedLock.LockItem[LKNT]] = {}
-        self.__inter: Lock = Lock()  # internal lock
-
-    def __len__(self) -> int:
-        return len(self.__locks)
-
-    def __iter__(self) -> Iterator[LockItem[LKNT]]:
-        return iter(self.__locks.values())
-
-    def __contains__(self, name: LKNT) -> bool:
-        return name in self.__locks
-
-    def __getitem__(self, name: LKNT) -> Lock:
-        return self.lookup(name).lock
-
-    def lookup(self, name: LKNT) -> LockItem[LKNT]:
-        try:
-            return self.__locks[name]
-        except KeyError:
-            with self.__inter:
-                if name not in self.__locks:
-                    lock = self.LockItem(name)
-                    self.__locks.setdefault(name, lock)
-                    assert self.__locks[name] is lock
-                    return lock
-
-                lock = self.__locks[name]  # pragma: no cover
-                assert lock.name == name  # pragma: no cover
-                return lock  # pragma: no cover
+from xkits.scheduler import DaemonSchedule
+from xkits.scheduler import DaemonScheduler
+from xkits.scheduler import TaskScheduler
+from xkits.scheduler import TaskTimer
+from xkits.taskmetrics import TaskMetrics
 
 
 class ThreadPool(ThreadPoolExecutor):
@@ -110,7 +78,7 @@ class ThreadPool(ThreadPoolExecutor):
         return {thread for thread in self.other_threads if thread.is_alive()}
 
 
-class TaskJob():
+class TaskJob():  # noqa:E501 pylint: disable=too-many-instance-attributes,too-many-public-methods
     '''Task Job'''
 
     def __init__(self, no: int, fn: Callable, *args: Any, **kwargs: Any):
@@ -120,13 +88,17 @@ class TaskJob():
         self.__kwargs: Dict[str, Any] = kwargs
         self.__result: Any = LookupError(f"{self} is not started")
         self.__running_timer: TimeMeter = TimeMeter(startup=False)
+        self.__queue_timer: TimeMeter = TimeMeter(startup=False)
+        self.__future: Future = Future()
+        self.__priority: int = 0
+        self.__tag: Any = None
 
     @classmethod
     def create_task(cls, fn: Callable, *args: Any, **kwargs: Any) -> "TaskJob":
         return cls(-1, fn, *args, **kwargs)
 
     def __str__(self) -> str:
-        args = list(self.args) + list(f"{k}={v}" for k, v in self.kwargs)
+        args = list(self.args) + list(f"{k}={v}" for k, v in self.kwargs.items())  # noqa:E501
         info: str = ", ".join(f"{a}" for a in args)
         return f"{self.__class__.__name__}{self.id} {self.fn}({info})"
 
@@ -150,6 +122,24 @@ class TaskJob():
         '''job callable keyword arguments'''
         return self.__kwargs
 
+    @property
+    def priority(self) -> int:
+        '''job priority, lower runs first'''
+        return self.__priority
+
+    @priority.setter
+    def priority(self, priority: int) -> None:
+        self.__priority = priority
+
+    @property
+    def tag(self) -> Any:
+        '''job tag (e.g. tenant) for fair queueing'''
+        return self.__tag
+
+    @tag.setter
+    def tag(self, tag: Any) -> None:
+        self.__tag = tag
+
     @property
     def result(self) -> Any:
         '''job callable function return value'''
@@ -162,15 +152,48 @@ class TaskJob():
         '''job running timer'''
         return self.__running_timer
 
-    def run(self) -> bool:
-        '''run job'''
+    @property
+    def queue_timer(self) -> TimeMeter:
+        '''job queueing timer, from submit (or due) to start'''
+        return self.__queue_timer
+
+    @property
+    def future(self) -> Future:
+        '''job completion future'''
+        return self.__future
+
+    def done(self) -> bool:
+        '''job is finished or cancelled'''
+        return self.future.done()
+
+    def cancel(self) -> bool:
+        '''cancel job if it is not started'''
+        return self.future.cancel()
+
+    def wait(self, timeout: Optional[TimeUnit] = None) -> bool:
+        '''wait for job to finish, return whether it is done'''
+        return len(futures_wait((self.future,), timeout).done) > 0
+
+    def add_done_callback(self, fn: Callable[["TaskJob"], Any]) -> None:
+        '''call fn(job) when job is done, immediately if already done'''
+        self.future.add_done_callback(lambda _: fn(self))
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+    def call(self) -> Any:
+        '''call job function'''
+        return self.fn(*self.args, **self.kwargs)
+
+    def execute(self) -> bool:
+        '''call job function once and save its result'''
         try:
             if self.running_timer.started:
                 raise RuntimeError(f"{self} is already started")
             assert not self.running_timer.started, f"{self} is already started"
             self.running_timer.startup()
             assert self.running_timer.started, f"failed to start {self}"
-            self.__result = self.fn(*self.args, **self.kwargs)
+            self.__result = self.call()
             return True
         except Exception as error:  # pylint: disable=broad-exception-caught
             self.__result = error
@@ -178,10 +201,37 @@ class TaskJob():
         finally:
             self.running_timer.shutdown()
 
+    def begin(self) -> bool:
+        '''mark job future running, False if job is cancelled'''
+        if self.future.done() and not self.future.cancelled():  # run again
+            self.__future = Future()
+        if not self.future.set_running_or_notify_cancel():
+            self.__result = CancelledError(f"{self} is cancelled")
+            return False
+        return True
+
+    def finish(self) -> None:
+        '''complete job future with the saved result'''
+        if isinstance(self.__result, Exception):
+            self.future.set_exception(self.__result)
+        else:
+            self.future.set_result(self.__result)
+
+    def run(self) -> bool:
+        '''run job'''
+        if self.future.running():  # already started
+            return self.execute()
+        if not self.begin():
+            return False
+        try:
+            return self.execute()
+        finally:
+            self.finish()
+
     def shutdown(self) -> None:
         '''wait for job to finish'''
-        while self.running_timer.started:
-            sleep(0.05)
+        if self.future.running():
+            self.wait()
 
     def startup(self) -> None:
         '''same as run'''
@@ -197,6 +247,16 @@ class TaskJob():
         self.shutdown()
 
 
+def as_completed(jobs: Iterable[TaskJob], timeout: Optional[TimeUnit] = None) -> Iterator[TaskJob]:  # noqa:E501
+    '''yield jobs as they finish, raise TimeoutError after timeout'''
+    futures: Dict[Future, TaskJob] = {job.future: job for job in jobs}
+    try:
+        for future in futures_as_completed(futures, timeout):
+            yield futures[future]
+    except FuturesTimeoutError as error:  # not builtin before Python 3.11
+        raise TimeoutError(str(error)) from error
+
+
 class DelayTaskJob(TaskJob):
     '''Delay Task Job'''
     MIN_DELAY_TIME: float = 0.001
@@ -233,23 +293,40 @@ class DelayTaskJob(TaskJob):
 
     def run(self) -> bool:
         '''run delay job'''
-        self.delay_timer.alarm(self.delay_time)
-        assert not self.waiting, f"{self} is waiting to run"
+        if not self.future.cancelled():  # no need to wait for cancelled job
+            self.delay_timer.alarm(self.delay_time)
+            assert not self.waiting, f"{self} is waiting to run"
         return super().run()
 
 
 class DaemonTaskJob(TaskJob):
-    '''Daemon Task Job'''
+    '''Daemon Task Job
+
+    Without a schedule the job function is called again right after each
+    call. With a schedule (see DaemonSchedule) the daemon waits between
+    calls and backs off after consecutive failures. The daemon runs in its
+    own thread, or on a DaemonScheduler shared by many daemon jobs.
+    '''
 
     def __init__(self, no: int, fn: Callable, *args: Any, **kwargs: Any):
         self.__counter: StatusCountMeter = StatusCountMeter()
         super().__init__(no, fn, *args, **kwargs)
         self.__running: bool = False
+        self.__schedule: Optional[DaemonSchedule] = None
+        self.__scheduler: Optional[DaemonScheduler] = None
+        self.__wakeup: Event = Event()
+        self.__failures: int = 0
 
     @classmethod
     def create_daemon_task(cls, fn: Callable, *args: Any, **kwargs: Any) -> "DaemonTaskJob":  # noqa:E501
         return cls(-1, fn, *args, **kwargs)
 
+    @classmethod
+    def create_periodic_task(cls, schedule: DaemonSchedule, fn: Callable, *args: Any, **kwargs: Any) -> "DaemonTaskJob":  # noqa:E501
+        job: DaemonTaskJob = cls(-1, fn, *args, **kwargs)
+        job.schedule = schedule
+        return job
+
     @property
     def daemon_counter(self) -> StatusCountMeter:
         '''daemon status counter'''
@@ -260,27 +337,86 @@ class DaemonTaskJob(TaskJob):
         '''daemon running flag'''
         return self.__running
 
+    @property
+    def schedule(self) -> Optional[DaemonSchedule]:
+        '''schedule of calls, None means call again at once'''
+        return self.__schedule
+
+    @schedule.setter
+    def schedule(self, schedule: Optional[DaemonSchedule]) -> None:
+        self.__schedule = schedule
+
+    @property
+    def failures(self) -> int:
+        '''consecutive failed calls'''
+        return self.__failures
+
+    def first_delay(self) -> float:
+        '''seconds until the first call'''
+        return self.schedule.first() if self.schedule is not None else 0.0
+
+    def tick(self) -> float:
+        '''call job function once, return seconds until the next call'''
+        success: bool = super().execute()
+        self.daemon_counter.inc(success)
+        self.__failures = 0 if success else self.__failures + 1
+        if self.schedule is None:
+            return 0.0
+        return self.schedule.delay(self.running_timer.runtime, self.failures)
+
     def run_in_background(self) -> Thread:
         '''run job in daemon mode in background'''
         thread: Thread = Thread(target=self.run)
         thread.start()
         return thread
 
-    def run(self):
+    def run_in_scheduler(self, scheduler: DaemonScheduler) -> None:
+        '''run job in daemon mode on a shared scheduler'''
+        scheduler.submit(self)
+
+    def attach(self, scheduler: DaemonScheduler) -> bool:
+        '''start daemon mode on scheduler, False if job is cancelled'''
+        self.__scheduler = scheduler
+        self.__running = self.begin()
+        return self.daemon_running
+
+    def detach(self) -> None:
+        '''stop daemon mode on scheduler and complete job future'''
+        self.__running = False
+        self.finish()
+
+    def execute(self) -> bool:
+        '''call job function repeatedly while daemon is running'''
+        success: bool = False
+        delay: float = self.first_delay()
+        while self.daemon_running:
+            if delay > 0.0 and self.__wakeup.wait(delay):
+                break  # shutdown
+            delay = self.tick()
+            success = self.failures == 0
+        return success
+
+    def run(self) -> bool:
         '''run job in daemon mode in current thread'''
+        self.__scheduler = None
         self.__running = True
-        while self.daemon_running:
-            success: bool = super().run()
-            self.daemon_counter.inc(success)
+        self.__wakeup.clear()
+        return super().run()
 
     def shutdown(self) -> None:
         '''wait for job to finish'''
         self.__running = False
+        self.__wakeup.set()
+        if self.__scheduler is not None:
+            self.__scheduler.wakeup(self)
         super().shutdown()
 
     def startup(self) -> None:
-        '''same as run in background'''
-        self.run_in_background()
+        '''same as run in background, or run in scheduler if it was'''
+        if self.__scheduler is not None:
+            self.run_in_scheduler(self.__scheduler)
+        else:
+            self.run_in_background()
 
     def restart(self) -> None:
         '''restart job'''
@@ -292,28 +428,174 @@ class DaemonTaskJob(TaskJob):
         self.restart()
 
 
-if sys.version_info >= (3, 9):
-    JobQueue = Queue[Optional[TaskJob]]  # noqa: E501, pragma: no cover, pylint: disable=unsubscriptable-object
-else:  # Python3.8 TypeError
-    JobQueue = Queue  # pragma: no cover
+class TaskRegistry(Dict[int, TaskJob]):
+    '''Registry of submitted task jobs by job id
+
+    By default jobs are kept until they are taken; with retain only the
+    last retain finished jobs are kept, and with retention finished jobs
+    are dropped after retention seconds (checked when a job finishes or
+    is registered, and on lookup, iteration, len() and in). take()
+    removes a job and returns its result, status_counter counts the
+    finished jobs.
+    '''
+
+    def __init__(self, retain: int = 0, retention: TimeUnit = 0):
+        self.__retain: int = max(retain, 0)
+        self.__retention: float = max(float(retention), 0.0)
+        self.__finished: Dict[int, float] = OrderedDict()  # finish time
+        self.__reglock: Lock = Lock()  # job registry lock
+        self.__status: StatusCountMeter = StatusCountMeter()
+        super().__init__()
+
+    @property
+    def retain(self) -> int:
+        '''max number of finished jobs to keep, 0 means no limit'''
+        return self.__retain
+
+    @property
+    def retention(self) -> float:
+        '''seconds to keep finished jobs, 0 means forever'''
+        return self.__retention
+
+    @property
+    def status_counter(self) -> StatusCountMeter:
+        '''task job status counter'''
+        return self.__status
+
+    def __trim(self) -> None:
+        deadline: float = monotonic() - self.retention
+        while self.__finished:
+            index, finished = next(iter(self.__finished.items()))
+            if not 0 < self.retain < len(self.__finished) and not (self.retention > 0.0 and finished <= deadline):  # noqa:E501
+                break
+            self.__finished.popitem(last=False)
+            self.pop(index, None)
+
+    def __finish(self, job: TaskJob) -> None:
+        with self.__reglock:
+            if self.get(job.id) is job:  # not taken yet
+                self.__finished[job.id] = monotonic()
+            self.__trim()
+
+    def __getitem__(self, index: int) -> TaskJob:
+        self.__expire()
+        return super().__getitem__(index)
+
+    def __iter__(self) -> Iterator[int]:
+        self.__expire()
+        return super().__iter__()
+
+    def __len__(self) -> int:
+        self.__expire()
+        return super().__len__()
 
+    def __contains__(self, index: object) -> bool:
+        self.__expire()
+        return super().__contains__(index)
 
-class TaskPool(Dict[int, TaskJob]):  # noqa: E501, pylint: disable=too-many-instance-attributes
-    '''Task Thread Pool'''
+    def __expire(self) -> None:
+        '''drop finished jobs out of retention, also while no job finishes'''
+        if self.retention > 0.0:
+            with self.__reglock:
+                self.__trim()
 
-    def __init__(self, workers: int = 1, jobs: int = 0, prefix: str = "task"):
+    def __count(self, job: TaskJob) -> None:
+        self.status_counter.inc(not job.future.cancelled() and job.future.exception() is None)  # noqa:E501
+
+    def register(self, job: TaskJob, count: bool = False) -> TaskJob:
+        '''add a submitted job, dropped by retain and retention when done
+
+        With count, the job status is counted in status_counter when done.
+        '''
+        assert isinstance(job, TaskJob), f"{job} is not a TaskJob"
+        assert job.id not in self, f"{job} id is already in pool"
+        assert job.id > 0, f"{job} id is invalid"
+        self.__expire()
+        self.setdefault(job.id, job)
+        if self.retain > 0 or self.retention > 0.0:
+            job.add_done_callback(self.__finish)
+        if count:
+            job.add_done_callback(self.__count)
+        return job
+
+    def forget(self, index: int) -> None:
+        '''remove a job from registry, if any'''
+        with self.__reglock:
+            self.__finished.pop(index, None)
+            self.pop(index, None)
+
+    def take(self, index: int, timeout: Optional[TimeUnit] = None) -> Any:
+        '''wait for a job, remove it from pool and return its result'''
+        return self.collect(self[index], timeout)
+
+    def collect(self, job: TaskJob, timeout: Optional[TimeUnit] = None) -> Any:  # noqa:E501
+        '''wait for a job, which may be dropped from pool already'''
+        if not job.wait(timeout):
+            raise TimeoutError(f"{job} is not finished in {timeout} seconds")
+        self.forget(job.id)
+        return job.result
+
+
+class Backpressure(Enum):
+    '''TaskPool policy when the bounded jobs queue is full'''
+    BLOCK = "block"  # wait for room, raise Full after submit timeout
+    REJECT = "reject"  # raise Full
+    CALLER_RUNS = "caller_runs"  # run the job in the submitting thread
+    DROP_OLDEST = "drop_oldest"  # cancel the oldest queued job
+
+
+class TaskPool(TaskRegistry):  # noqa: E501, pylint: disable=too-many-instance-attributes,too-many-public-methods
+    '''Task Thread Pool
+
+    Submitted jobs are kept in the pool (a dict of job id to job) as in
+    TaskRegistry, take() removes a job and returns its result.
+
+    With max_workers greater than workers the pool is elastic: a task
+    thread is added (up to max_workers) when a job is submitted while
+    the backlog exceeds the idle threads, and a thread idle for keepalive
+    seconds exits while more than workers threads are alive.
+
+    When the jobs queue (bounded by jobs) is full, backpressure decides
+    what a submit does, see Backpressure. Rejected and dropped jobs are
+    cancelled and counted by rejected_counter.
+
+    metrics records queue wait, run time and latency of executed jobs,
+    throughput and queue depth, see TaskMetrics.
+    '''
+
+    def __init__(self, workers: int = 1, jobs: int = 0, prefix: str = "task",  # noqa:E501 pylint: disable=too-many-arguments,too-many-positional-arguments
+                 scheduler: Callable[..., TaskScheduler] = TaskScheduler,
+                 retain: int = 0, retention: TimeUnit = 0,
+                 max_workers: int = 0, keepalive: TimeUnit = 60.0,
+                 backpressure: Backpressure = Backpressure.BLOCK,
+                 submit_timeout: Optional[TimeUnit] = None):
         wsize: int = max(workers, 1)
         qsize = max(wsize, jobs) if jobs > 0 else jobs
         self.__cmds: commands = commands()
-        self.__jobs: JobQueue = Queue(qsize)
+        self.__max_workers: int = max(max_workers, wsize)
+        self.__keepalive: float = max(float(keepalive), 0.0)
+        self.__jobs: TaskScheduler = scheduler(workers=self.__max_workers, maxsize=qsize)  # noqa:E501
+        self.__timer: TaskTimer = TaskTimer(f"{prefix or 'task'}_timer")
         self.__prefix: str = prefix or "task"
-        self.__status: StatusCountMeter = StatusCountMeter()
         self.__counter: CountMeter = CountMeter()
         self.__threads: Set[Thread] = set()
-        self.__intlock: Lock = Lock()  # internal lock
+        self.__indexes: Set[int] = set()  # worker indexes in use
+        self.__idle: Set[int] = set()  # worker indexes waiting for jobs
+        self.__grow: CountMeter = CountMeter()
+        self.__shrink: CountMeter = CountMeter()
+        self.__thrlock: Lock = Lock()  # task threads lock
+        self.__intlock: Lock = lock_profiler().lock(f"{self.__prefix}.intlock")  # noqa:E501
+        self.__idlock: Lock = Lock()  # job ids lock, not held by shutdown
+        self.__subcond: Condition = Condition()  # submits in progress
+        self.__submits: int = 0
+        self.__closing: bool = False
         self.__running: bool = False
         self.__workers: int = wsize
-        super().__init__()
+        self.__backpressure: Backpressure = backpressure
+        self.__submit_timeout: Optional[TimeUnit] = submit_timeout
+        self.__rejected: CountMeter = CountMeter()
+        self.__metrics: TaskMetrics = TaskMetrics(lambda: len(self.jobs))
+        super().__init__(retain, retention)
 
     def __enter__(self):
         self.startup()
@@ -323,10 +605,15 @@ class TaskPool(Dict[int, TaskJob]):  # noqa: E501, pylint: disable=too-many-inst
         self.shutdown()
 
     @property
-    def jobs(self) -> JobQueue:
-        '''task jobs'''
+    def jobs(self) -> TaskScheduler:
+        '''task jobs scheduler'''
         return self.__jobs
 
+    @property
+    def timer(self) -> TaskTimer:
+        '''delay jobs timer'''
+        return self.__timer
+
     @property
     def cmds(self) -> commands:
         '''command-line toolkit'''
@@ -353,81 +640,323 @@ class TaskPool(Dict[int, TaskJob]):  # noqa: E501, pylint: disable=too-many-inst
         return self.__workers
 
     @property
-    def status_counter(self) -> StatusCountMeter:
-        '''task job status counter'''
-        return self.__status
+    def max_workers(self) -> int:
+        '''max task workers of elastic pool'''
+        return self.__max_workers
+
+    @property
+    def keepalive(self) -> float:
+        '''seconds an extra task thread waits for jobs before exiting'''
+        return self.__keepalive
+
+    @property
+    def idle_workers(self) -> int:
+        '''task threads waiting for jobs'''
+        return len(self.__idle)
+
+    @property
+    def grow_counter(self) -> CountMeter:
+        '''task threads added for backlog'''
+        return self.__grow
+
+    @property
+    def shrink_counter(self) -> CountMeter:
+        '''task threads exited after keepalive'''
+        return self.__shrink
+
+    @property
+    def backpressure(self) -> Backpressure:
+        '''policy when the jobs queue is full'''
+        return self.__backpressure
 
-    def task(self):
-        '''execute a task from jobs queue'''
+    @property
+    def submit_timeout(self) -> Optional[TimeUnit]:
+        '''seconds a blocked submit waits for room, None means forever'''
+        return self.__submit_timeout
+
+    @property
+    def rejected_counter(self) -> CountMeter:
+        '''jobs rejected or dropped by backpressure'''
+        return self.__rejected
+
+    @property
+    def metrics(self) -> TaskMetrics:
+        '''pool level job metrics'''
+        return self.__metrics
+
+    def task(self, worker: int = 0):
+        '''execute tasks from jobs scheduler'''
         status_counter: StatusCountMeter = StatusCountMeter()
 
         logger: Logger = self.cmds.logger
         logger.debug("Task thread %s is running", current_thread().name)
+        timeout: Optional[float] = self.keepalive if self.max_workers > self.workers else None  # noqa:E501
 
         while True:
-            job: Optional[TaskJob] = self.jobs.get(block=True)
+            self.__idle.add(worker)
+            try:
+                job: Optional[TaskJob] = self.jobs.get(worker, timeout)
+            except Empty:
+                if self.__retire(worker):
+                    break
+                continue
+            finally:
+                self.__idle.discard(worker)
             if job is None:  # stop task
-                self.jobs.put(job)  # notice other tasks
                 break
 
-            if isinstance(job, DelayTaskJob) and job.waiting and self.running:
-                self.jobs.put(job)  # delay run task
+            if self.__defer(job):  # delay run task
                 continue
 
-            if not job.run():
-                self.status_counter.inc(False)
-                status_counter.inc(False)
-            else:
-                self.status_counter.inc(True)
-                status_counter.inc(True)
+            status_counter.inc(self.__execute(job))
 
         logger.debug("Task thread %s is stopped, %s", current_thread().name,
                      f"{status_counter.total} jobs: {status_counter.success} success and {status_counter.failure} failure")  # noqa:E501
 
+    def __execute(self, job: TaskJob) -> bool:
+        '''run job and record it in status counter and metrics'''
+        job.queue_timer.shutdown()
+        self.metrics.start()
+        success: bool = job.run()
+        if job.future.cancelled():
+            self.metrics.discard()
+        else:
+            self.metrics.finish(job.queue_timer.runtime, job.running_timer.runtime)  # noqa:E501
+        self.status_counter.inc(success)
+        return success
+
+    def __spawn(self, worker: int) -> None:
+        thread_name: str = f"{self.thread_name_prefix}_{worker}"
+        thread = Thread(name=thread_name, target=self.task, args=(worker,))
+        self.threads.add(thread)
+        self.__indexes.add(worker)
+        thread.start()  # run
+
+    def __expand(self) -> None:
+        '''add a task thread for backlog, if elastic pool has room'''
+        with self.__thrlock:
+            if not self.running or len(self.threads) >= self.max_workers:
+                return
+            worker: int = next((i for i in range(self.max_workers) if i not in self.__indexes), len(self.threads))  # noqa:E501
+            self.__spawn(worker)
+            self.grow_counter.inc()
+            self.cmds.logger.debug("Grow %s tasks to %d for %d backlog jobs", self.thread_name_prefix, len(self.threads), len(self.jobs))  # noqa:E501
+
+    def __retire(self, worker: int) -> bool:
+        '''exit an idle task thread, if more than workers are alive'''
+        with self.__thrlock:
+            if len(self.threads) <= self.workers:
+                return False
+            self.threads.discard(current_thread())
+            self.__indexes.discard(worker)
+            self.shrink_counter.inc()
+            self.cmds.logger.debug("Shrink %s tasks to %d after %ss idle", self.thread_name_prefix, len(self.threads), self.keepalive)  # noqa:E501
+            return True
+
+    def __defer(self, job: TaskJob) -> bool:
+        '''hand a waiting delay job to the timer until it is due'''
+        if not isinstance(job, DelayTaskJob) or not job.waiting or not self.running:  # noqa:E501
+            return False
+        remaining: float = job.delay_time - job.delay_timer.runtime
+        return self.timer.schedule(remaining, self.__release, job)
+
+    def __release(self, job: TaskJob) -> None:
+        '''put a due delay job in jobs queue as backpressure decides'''
+        job.queue_timer.restart()
+        try:
+            self.__enqueue(job)
+        except Full:  # rejected and cancelled
+            pass
+
     def submit_job(self, job: TaskJob) -> TaskJob:
-        assert isinstance(job, TaskJob), f"{job} is not a TaskJob"
-        assert job.id not in self, f"{job} id is already in pool"
-        assert job.id > 0, f"{job} id is invalid"
-        self.jobs.put(job, block=True)
-        self.setdefault(job.id, job)
-        return job
+        '''submit a job, raise RuntimeError while pool is shutting down'''
+        with self.__subcond:
+            if self.__closing:
+                raise RuntimeError(f"{self.thread_name_prefix} pool is shutting down")  # noqa:E501
+            self.__submits += 1
+        try:
+            self.register(job)
+            job.queue_timer.restart()
+            queued: bool = not self.__defer(job) and self.__enqueue(job)
+            self.metrics.submit(len(self.jobs))
+            if queued:
+                if len(self.threads) < self.max_workers and len(self.jobs) > self.idle_workers:  # noqa:E501
+                    self.__expand()
+            return job
+        finally:
+            with self.__subcond:
+                self.__submits -= 1
+                self.__subcond.notify_all()
+
+    def __enqueue(self, job: TaskJob) -> bool:
+        '''put job in jobs queue, False if the caller ran it'''
+        if self.backpressure is Backpressure.BLOCK:
+            try:
+                self.jobs.put(job, block=True, timeout=self.submit_timeout)
+                return True
+            except Full:
+                self.__reject(job)
+                raise
+        while True:
+            try:
+                self.jobs.put(job, block=False)
+                return True
+            except Full:
+                if self.backpressure is Backpressure.CALLER_RUNS:
+                    self.__execute(job)
+                    return False
+                if self.backpressure is not Backpressure.DROP_OLDEST or (oldest := self.jobs.discard()) is None:  # noqa:E501
+                    self.__reject(job)
+                    raise
+                self.rejected_counter.inc()
+                self.__discard(oldest)
+
+    def __reject(self, job: TaskJob) -> None:
+        self.rejected_counter.inc()
+        self.forget(job.id)
+        self.__discard(job)
+
+    def __discard(self, job: TaskJob) -> bool:
+        '''cancel a job which is not going to be executed'''
+        cancelled: bool = not job.future.cancelled()  # not cancelled before
+        if job.cancel():
+            self.status_counter.inc(job.run())  # CancelledError
+            return cancelled
+        return False  # pragma: no cover
+
+    def cancel_pending(self) -> List[TaskJob]:
+        '''cancel queued and delayed jobs, return the cancelled jobs'''
+        jobs: List[TaskJob] = [job for job in self.jobs.drain() if self.__discard(job)]  # noqa:E501
+        jobs.extend(job for job in list(self.values()) if not job.done() and job.cancel())  # noqa:E501
+        return jobs
 
     def submit_task(self, fn: Callable, *args: Any, **kwargs: Any) -> TaskJob:
         '''submit a task to jobs queue'''
-        with self.__intlock:  # generate job id under lock protection
+        with self.__idlock:  # generate job id under lock protection
+            sn: int = self.__counter.inc()  # serial number
+        return self.submit_job(TaskJob(sn, fn, *args, **kwargs))
+
+    def submit_priority_task(self, priority: int, fn: Callable, *args: Any, tag: Any = None, **kwargs: Any) -> TaskJob:  # noqa:E501
+        '''submit a task with priority (lower runs first) and tag
+
+        Jobs of the same priority are shared fairly between tags (e.g.
+        tenants), tag is not passed to fn. The scheduler must order jobs,
+        e.g. PriorityScheduler, otherwise ValueError is raised.
+        '''
+        if not self.jobs.PRIORITY:
+            raise ValueError(f"{type(self.jobs).__name__} does not order jobs by priority")  # noqa:E501
+        with self.__idlock:  # generate job id under lock protection
             sn: int = self.__counter.inc()  # serial number
-            return self.submit_job(TaskJob(sn, fn, *args, **kwargs))
+        job: TaskJob = TaskJob(sn, fn, *args, **kwargs)
+        job.priority = priority
+        job.tag = tag
+        return self.submit_job(job)
+
+    def submit_many(self, fn: Callable, iterable: Iterable[Any]) -> List[TaskJob]:  # noqa:E501
+        '''submit a task fn(item) for each item, reserving job ids at once
+
+        Each job is still queued on its own, map() with a chunksize puts
+        many items in one job to save queue operations.
+        '''
+        items: List[Any] = list(iterable)
+        if not items:
+            return []
+        with self.__idlock:  # generate job ids under lock protection
+            sn: int = self.__counter.inc(len(items)) - len(items) + 1
+        return [self.submit_job(TaskJob(sn + i, fn, item)) for i, item in enumerate(items)]  # noqa:E501
+
+    @staticmethod
+    def __apply(fn: Callable, chunk: List[Tuple[Any, ...]]) -> List[Any]:
+        return [fn(*args) for args in chunk]
+
+    def map(self, fn: Callable, *iterables: Iterable[Any], chunksize: int = 1,  # noqa:E501
+            ordered: bool = True, timeout: Optional[TimeUnit] = None) -> Iterator[Any]:  # noqa:E501
+        '''submit fn over iterables in chunks, yield results lazily
+
+        Results are yielded in input order, or by chunk as they complete
+        if not ordered. A failed call raises when its result is reached,
+        and TimeoutError is raised if results are not ready in timeout
+        seconds. Jobs are removed from pool as their results are taken,
+        those not started are cancelled if the results are abandoned.
+        '''
+        if chunksize < 1:
+            raise ValueError(f"invalid chunksize {chunksize}")
+        calls: List[Tuple[Any, ...]] = list(zip(*iterables))
+        jobs: List[TaskJob] = self.submit_many(partial(self.__apply, fn), (calls[i:i + chunksize] for i in range(0, len(calls), chunksize)))  # noqa:E501
+        deadline: Optional[float] = monotonic() + timeout if timeout is not None else None  # noqa:E501
+
+        def results() -> Iterator[Any]:
+            try:
+                if not ordered:
+                    for job in as_completed(jobs, timeout):
+                        yield from self.collect(job)
+                    return
+                for job in jobs:
+                    yield from self.collect(job, deadline - monotonic() if deadline is not None else None)  # noqa:E501
+            finally:
+                for job in jobs:  # cancel jobs not started, as Executor.map
+                    job.cancel()
+                    self.forget(job.id)
+
+        return results()
 
     def submit_delay_task(self, delay: TimeUnit, fn: Callable, *args: Any, **kwargs: Any) -> TaskJob:  # noqa:E501
         '''submit a delay task to jobs queue'''
-        with self.__intlock:  # generate job id under lock protection
+        with self.__idlock:  # generate job id under lock protection
             sn: int = self.__counter.inc()  # serial number
-            return self.submit_job(DelayTaskJob(delay, sn, fn, *args, **kwargs))  # noqa:E501
-
-    def shutdown(self) -> None:
-        '''stop all task threads and waiting for all jobs finish'''
-        with self.__intlock:  # block submit new tasks
-            self.cmds.logger.debug("Shutdown %s tasks", self.thread_name_prefix)  # noqa:E501
-            self.__running = False
-            self.jobs.put(None)  # notice tasks
-            while len(self.threads) > 0:
-                thread: Thread = self.threads.pop()
-                thread.join()
-            while not self.jobs.empty():
-                job: Optional[TaskJob] = self.jobs.get(block=True)
-                if job is not None:  # shutdown only after executed
-                    raise RuntimeError(f"Unexecuted job: {job}")  # noqa:E501, pragma: no cover
+        return self.submit_job(DelayTaskJob(delay, sn, fn, *args, **kwargs))  # noqa:E501
+
+    def shutdown(self, timeout: Optional[TimeUnit] = None, cancel: bool = False) -> List[TaskJob]:  # noqa:E501
+        '''stop all task threads after the queued jobs are executed
+
+        With timeout, jobs still queued after timeout seconds are cancelled,
+        with cancel, queued jobs are cancelled at once. Running jobs always
+        finish. Submits during shutdown raise RuntimeError. Return the
+        cancelled jobs.
+        '''
+        with self.__intlock:  # block startup
+            with self.__subcond:  # reject new submits, wait for started
+                self.__closing = True
+                self.__subcond.wait_for(lambda: self.__submits <= 0)
+            try:
+                self.cmds.logger.debug("Shutdown %s tasks", self.thread_name_prefix)  # noqa:E501
+                self.__running = False
+                for fn, args in self.timer.shutdown():  # release delay jobs
+                    fn(*args)
+                self.jobs.put(None)  # notice tasks
+                cancelled: List[TaskJob] = []
+                if cancel or timeout is not None:
+                    deadline: float = monotonic() + (float(timeout) if timeout is not None and not cancel else 0.0)  # noqa:E501
+                    with self.__thrlock:
+                        threads: List[Thread] = list(self.threads)
+                    for thread in threads:
+                        thread.join(max(deadline - monotonic(), 0.0))
+                    cancelled.extend(self.cancel_pending())
+                    self.jobs.put(None)  # drained with the jobs
+                while True:
+                    with self.__thrlock:
+                        if len(self.threads) <= 0:
+                            break
+                        thread = self.threads.pop()
+                    thread.join()
+                self.__indexes.clear()
+                cancelled.extend(self.cancel_pending())  # submitted after stop
+                if cancelled:
+                    self.cmds.logger.debug("Cancel %d %s jobs", len(cancelled), self.thread_name_prefix)  # noqa:E501
+                return cancelled
+            finally:
+                with self.__subcond:
+                    self.__closing = False
 
     def startup(self) -> None:
         '''start task threads'''
         with self.__intlock:
             self.cmds.logger.debug("Startup %s tasks", self.thread_name_prefix)
-            for i in range(self.workers):
-                thread_name: str = f"{self.thread_name_prefix}_{i}"
-                thread = Thread(name=thread_name, target=self.task)
-                self.threads.add(thread)
-                thread.start()  # run
-            self.__running = True
+            self.timer.startup()
+            self.__running = True  # before workers take delay jobs
+            with self.__thrlock:
+                for i in range(self.workers):
+                    self.__spawn(i)
 
     def restart(self) -> None:
         '''stop submit new tasks and waiting for all submitted tasks to end'''
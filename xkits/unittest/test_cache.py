@@ -1,16 +1,31 @@
 # coding:utf-8
 
+import asyncio
+import pickle
+from threading import Event
 from time import sleep
 import unittest
+from unittest import mock
 
 from xkits import CacheAtom
 from xkits import CacheData
 from xkits import CacheExpired
 from xkits import CacheItem
 from xkits import CacheMiss
+from xkits import CachePolicy
 from xkits import CachePool
+from xkits import CacheStatistics
+from xkits import FakeClock
+from xkits import FIFOPolicy
 from xkits import ItemPool
+from xkits import LFUPolicy
+from xkits import LRUPolicy
 from xkits import NamedCache
+from xkits import SLRUPolicy
+from xkits import ShardedCachePool
+from xkits import ThreadPool
+from xkits import cached
+from xkits.cache import KeywordMark
 
 
 class TestCache(unittest.TestCase):
@@ -72,6 +87,7 @@ class TestCache(unittest.TestCase):
         self.assertRaises(CacheExpired, read, item)
         item.data = "item"
         self.assertEqual(item.data, "item")
+        self.assertFalse(hasattr(item, "__dict__"))
 
     def test_item_pool(self):
         def read(pool: ItemPool, name: str):
@@ -103,5 +119,626 @@ class TestCache(unittest.TestCase):
         self.assertEqual(str(pool), f"cache pool at {id(pool)}")
 
 
+class TestCacheLoader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_single_flight(self):
+        calls = []
+        event = Event()
+
+        def loader() -> str:
+            calls.append(1)
+            event.wait(5)
+            return "value"
+
+        pool: CachePool[str, str] = CachePool()
+        with ThreadPool(4) as executor:
+            futures = [executor.submit(pool.get_or_load, "key", loader)
+                       for _ in range(4)]
+            sleep(0.1)
+            event.set()
+            self.assertEqual([f.result() for f in futures], ["value"] * 4)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(pool.get_or_load("key", loader), "value")
+        self.assertEqual(len(calls), 1)
+
+    def test_leader_double_check(self):
+        pool: CachePool[str, str] = CachePool()
+
+        def loader() -> str:
+            raise AssertionError("loader should not run")
+
+        with mock.patch.object(pool, "lookup", side_effect=[CacheMiss("key"), CacheItem("key", "value")]):  # noqa:E501
+            self.assertEqual(pool.get_or_load("key", loader), "value")
+
+    def test_error_waiters(self):
+        event = Event()
+
+        def loader() -> str:
+            event.wait(5)
+            raise ValueError("test")
+
+        pool: ShardedCachePool[str, str] = ShardedCachePool(shards=2)
+        with ThreadPool(2) as executor:
+            futures = [executor.submit(pool.get_or_load, "key", loader)
+                       for _ in range(2)]
+            sleep(0.1)
+            event.set()
+            for future in futures:
+                self.assertRaises(ValueError, future.result)
+
+    def test_interrupted_leader(self):
+        started = Event()
+        release = Event()
+
+        def loader() -> str:
+            started.set()
+            release.wait(5)
+            raise SystemExit("test")
+
+        pool: CachePool[str, str] = CachePool()
+        with ThreadPool(2) as executor:
+            leader = executor.submit(pool.get_or_load, "key", loader, None, 1)
+            self.assertTrue(started.wait(5))
+            follower = executor.submit(pool.get_or_load, "key", loader)
+            sleep(0.05)
+            release.set()
+            self.assertRaises(SystemExit, leader.result, 5)
+            self.assertRaises(SystemExit, follower.result, 5)
+        self.assertEqual(pool.get_or_load("key", lambda: "value"), "value")
+
+    def test_error_lifetime(self):
+        calls = []
+
+        def failure() -> str:
+            calls.append(1)
+            raise CacheMiss("test")
+
+        pool: CachePool[str, str] = CachePool()
+        self.assertRaises(CacheMiss, pool.get_or_load, "key", failure, None, 0.1)  # noqa:E501
+        self.assertRaises(CacheMiss, pool.get_or_load, "key", failure, None, 0.1)  # noqa:E501
+        self.assertEqual(len(calls), 1)
+        sleep(0.2)
+        self.assertEqual(pool.get_or_load("key", lambda: "value"), "value")
+        self.assertRaises(CacheMiss, pool.get_or_load, "miss", failure)
+        self.assertRaises(CacheMiss, pool.get_or_load, "miss", failure)
+        self.assertEqual(len(calls), 3)
+
+    def test_refresh_ahead(self):
+        values = iter(["v1", "v2"])
+        pool: CachePool[str, str] = CachePool(lifetime=0.3, refresh=0.2)
+        self.assertEqual(pool.refresh, 0.2)
+        self.assertIsNone(pool.executor)
+        self.assertEqual(pool.get_or_load("key", lambda: next(values)), "v1")
+        self.assertEqual(pool.get_or_load("key", lambda: next(values)), "v1")
+        sleep(0.15)
+        self.assertEqual(pool.get_or_load("key", lambda: next(values)), "v1")
+        sleep(0.05)
+        self.assertEqual(pool["key"], "v2")
+        pool.refresh = 0
+        self.assertEqual(pool.refresh, 0.0)
+
+    def test_stale_while_revalidate(self):
+        event = Event()
+
+        def loader() -> str:
+            event.wait(5)
+            return "v2"
+
+        def failure() -> str:
+            raise ValueError("test")
+
+        with ThreadPool(2) as executor:
+            pool: CachePool[str, str] = CachePool(lifetime=0.1, stale=0.5,
+                                                  executor=executor)
+            self.assertIs(pool.executor, executor)
+            self.assertEqual(pool.stale, 0.5)
+            pool.put("key", "v1")
+            sleep(0.2)
+            self.assertEqual(pool.reap(), 0)
+            self.assertEqual(pool.get_or_load("key", failure), "v1")
+            sleep(0.05)
+            self.assertEqual(pool.get_or_load("key", loader), "v1")
+            self.assertEqual(pool.get_or_load("key", loader), "v1")
+            event.set()
+            sleep(0.05)
+            self.assertEqual(pool.get_or_load("key", loader), "v2")
+            pool.put("old", "v1")
+            sleep(0.7)
+            self.assertEqual(pool.get_or_load("old", lambda: "v3"), "v3")
+
+    def test_reload_dispatch_failure(self):
+        executor = ThreadPool(2)
+        executor.shutdown()
+        pool: CachePool[str, str] = CachePool(lifetime=0.1, stale=5.0,
+                                              executor=executor)
+        pool.put("key", "v1")
+        sleep(0.15)
+        self.assertEqual(pool.get_or_load("key", lambda: "v2"), "v1")
+        pool.delete("key")
+        self.assertEqual(pool.get_or_load("key", lambda: "v3"), "v3")
+
+
+class TestCacheStatistics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_item_pool(self):
+        pool: ItemPool[str, str] = ItemPool(capacity=1)
+        self.assertEqual(pool.statistics.hit_ratio, 0.0)
+        pool.put("a", "1")
+        pool.get("a")
+        self.assertRaises(CacheMiss, pool.get, "b")
+        pool.put("b", "2")
+        self.assertIsInstance(pool.lookup("b"), CacheItem)
+        snapshot = pool.snapshot()
+        self.assertEqual(snapshot["size"], 1)
+        self.assertEqual(snapshot["weight"], 1)
+        self.assertEqual(snapshot["hits"], 1)
+        self.assertEqual(snapshot["misses"], 1)
+        self.assertEqual(snapshot["hit_ratio"], 0.5)
+        self.assertEqual(snapshot["evictions"], 1)
+        pool.statistics.reset()
+        self.assertEqual(pool.statistics.hits, 0)
+        self.assertEqual(pool.statistics.evictions, 0)
+        self.assertEqual(str(pool.statistics), f"CacheStatistics({id(pool.statistics)})")  # noqa:E501
+
+    def test_cache_pool(self):
+        def failure() -> str:
+            raise ValueError("test")
+
+        pool: CachePool[str, str] = CachePool(lifetime=0.1)
+        pool.put("a", "1")
+        pool.put("b", "2")
+        self.assertEqual(pool.get_or_load("a", failure), "1")
+        self.assertEqual(pool.get_or_load("c", lambda: "3"), "3")
+        self.assertRaises(ValueError, pool.get_or_load, "d", failure)
+        sleep(0.2)
+        self.assertRaises(CacheMiss, pool.get, "a")
+        self.assertEqual(pool.reap(), 2)
+        statistics: CacheStatistics = pool.statistics
+        self.assertEqual(statistics.hits, 1)
+        self.assertEqual(statistics.misses, 3)
+        self.assertEqual(statistics.expirations, 3)
+        self.assertEqual(statistics.loads, 2)
+        self.assertEqual(statistics.load_failures, 1)
+        self.assertEqual(statistics.load_time.total, 2)
+        self.assertEqual(pool.snapshot()["load_failures"], 1)
+
+    def test_sharded_pool(self):
+        pool: ShardedCachePool[int, int] = ShardedCachePool(shards=4)
+        for index in range(8):
+            self.assertEqual(pool.get_or_load(index, lambda: 0), 0)
+            self.assertEqual(pool.get_or_load(index, lambda: 1), 0)
+        snapshot = pool.snapshot()
+        self.assertEqual(snapshot["size"], 8)
+        self.assertEqual(snapshot["hits"], 8)
+        self.assertEqual(snapshot["misses"], 8)
+        self.assertEqual(snapshot["loads"], 8)
+        self.assertEqual(snapshot["load_failures"], 0)
+        self.assertEqual(snapshot["load_time"]["max"], pool.statistics.load_time.maximum)  # noqa:E501
+        pool.reset()
+        self.assertEqual(pool.snapshot()["hits"], 0)
+
+    def test_concurrent_reads(self):
+        pool: ItemPool[int, int] = ItemPool()
+        pool.put(0, 0)
+        with ThreadPool(8) as threads:
+            for future in [threads.submit(lambda: [pool.get(0) for _ in range(5000)]) for _ in range(8)]:  # noqa:E501
+                future.result()
+        self.assertEqual(pool.statistics.hits, 40000)
+
+
+class TestCachePolicy(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_base(self):
+        policy: CachePolicy[str] = CachePolicy()
+        self.assertEqual(str(policy), f"CachePolicy({id(policy)})")
+        self.assertRaises(NotImplementedError, len, policy)
+        self.assertRaises(NotImplementedError, policy.__contains__, "a")
+        self.assertRaises(NotImplementedError, policy.admit, "a")
+        self.assertRaises(NotImplementedError, policy.access, "a")
+        self.assertRaises(NotImplementedError, policy.discard, "a")
+        self.assertRaises(NotImplementedError, policy.victim)
+
+    def test_fifo(self):
+        policy: FIFOPolicy[str] = FIFOPolicy()
+        self.assertRaises(CacheMiss, policy.victim)
+        policy.admit("a")
+        policy.admit("b")
+        policy.access("a")
+        self.assertEqual(len(policy), 2)
+        self.assertIn("a", policy)
+        self.assertEqual(policy.victim(), "a")
+        policy.discard("a")
+        policy.discard("a")
+        self.assertEqual(policy.victim(), "b")
+
+    def test_lru(self):
+        policy: LRUPolicy[str] = LRUPolicy()
+        policy.admit("a")
+        policy.admit("b")
+        policy.access("a")
+        policy.access("c")
+        self.assertNotIn("c", policy)
+        self.assertEqual(policy.victim(), "b")
+
+    def test_lfu(self):
+        policy: LFUPolicy[str] = LFUPolicy()
+        self.assertRaises(CacheMiss, policy.victim)
+        policy.admit("a")
+        policy.admit("b")
+        policy.admit("a")
+        policy.access("c")
+        self.assertEqual(len(policy), 2)
+        self.assertIn("a", policy)
+        self.assertEqual(policy.frequency("a"), 2)
+        self.assertEqual(policy.frequency("c"), 0)
+        self.assertEqual(policy.victim(), "b")
+        policy.access("b")
+        policy.access("b")
+        self.assertEqual(policy.victim(), "a")
+        policy.discard("a")
+        policy.discard("a")
+        self.assertEqual(policy.victim(), "b")
+        policy.admit("c")
+        self.assertEqual(policy.victim(), "c")
+        for _ in range(3):
+            policy.access("c")
+        policy.admit("d")
+        policy.access("d")
+        policy.discard("b")  # frequency 3 is empty now
+        self.assertEqual(policy.victim(), "d")
+        policy.discard("d")
+        self.assertEqual(policy.victim(), "c")
+        policy.discard("c")
+        self.assertRaises(CacheMiss, policy.victim)
+        policy.admit("e")
+        self.assertEqual(policy.victim(), "e")
+
+    def test_slru(self):
+        self.assertRaises(ValueError, SLRUPolicy, 1.0)
+        policy: SLRUPolicy[str] = SLRUPolicy(0.5)
+        self.assertRaises(CacheMiss, policy.victim)
+        for index in ("a", "b", "c", "d"):
+            policy.admit(index)
+        policy.admit("a")
+        policy.access("b")
+        policy.access("a")
+        self.assertEqual(len(policy), 4)
+        self.assertIn("a", policy)
+        self.assertEqual(list(policy.protected), ["b", "a"])
+        self.assertEqual(policy.victim(), "c")
+        policy.access("d")  # demote b to probation
+        self.assertEqual(list(policy.protected), ["a", "d"])
+        self.assertEqual(list(policy.probation), ["c", "b"])
+        policy.discard("c")
+        policy.discard("b")
+        self.assertEqual(policy.victim(), "a")
+
+
+class TestBoundedPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_capacity(self):
+        pool: ItemPool[str, str] = ItemPool(capacity=2)
+        self.assertIsInstance(pool.policy, LRUPolicy)
+        self.assertEqual(pool.capacity, 2)
+        pool["a"] = "1"
+        pool["b"] = "2"
+        self.assertEqual(pool["a"].data, "1")
+        pool["c"] = "3"
+        self.assertEqual(len(pool), 2)
+        self.assertNotIn("b", pool)
+        pool["a"] = "4"
+        self.assertRaises(CacheMiss, pool.get, "b")
+        self.assertEqual(len(pool), 2)
+        self.assertEqual(pool.weight, 2)
+        del pool["a"]
+        self.assertEqual(pool.weight, 1)
+        self.assertIsNone(ItemPool().policy)
+
+    def test_maxweight(self):
+        pool: CachePool[str, str] = CachePool(maxweight=5, sizer=len,
+                                              policy=FIFOPolicy())
+        self.assertEqual(pool.maxweight, 5)
+        pool.put("a", "123")
+        pool.put("b", "12")
+        self.assertEqual(pool.weight, 5)
+        self.assertEqual(pool["a"], "123")
+        pool.put("c", "1")
+        self.assertEqual(pool.weight, 3)
+        self.assertNotIn("a", pool)
+        pool.put("d", "123456")
+        self.assertEqual(pool.weight, 0)
+        self.assertEqual(len(pool), 0)
+
+
+class TestExpiryPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_reap(self):
+        pool: ItemPool[str, str] = ItemPool(lifetime=0.1)
+        pool.put("a", "1")
+        pool.put("b", "2", lifetime=0.3)
+        pool.put("c", "3", lifetime=0)
+        pool.put("d", "4")
+        pool.put("d", "5")  # stale deadline in heap
+        del pool["d"]
+        self.assertEqual(pool.reap(), 0)
+        sleep(0.2)
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(pool.reap(), 1)
+        self.assertEqual(list(pool), ["b", "c"])
+        pool["b"].renew(0.5)
+        sleep(0.2)
+        self.assertEqual(pool.reap(), 0)
+        pool["b"].renew(0)
+        self.assertEqual(pool.reap(), 0)
+        self.assertEqual(len(pool), 2)
+
+    def test_fake_clock(self):
+        clock = FakeClock()
+        pool: CachePool[str, str] = CachePool(lifetime=10, source=clock)
+        self.assertIs(pool.source, clock)
+        pool.put("a", "1")
+        pool.put("b", "2", lifetime=20)
+        self.assertEqual(pool.get_or_load("c", lambda: "3"), "3")
+        self.assertEqual(pool.statistics.load_time.maximum, 0.0)
+        clock.advance(15)
+        self.assertRaises(CacheMiss, pool.get, "a")
+        self.assertEqual(pool.reap(), 1)
+        self.assertEqual(list(pool), ["b"])
+        clock.advance(10)
+        self.assertEqual(pool.reap(), 1)
+        sharded: ShardedCachePool[str, str] = ShardedCachePool(shards=2, source=clock)  # noqa:E501
+        for shard in sharded.shards:
+            self.assertIs(shard.source, clock)
+
+    def test_reap_on_put(self):
+        pool: CachePool[int, int] = CachePool(lifetime=0.1, capacity=1000)
+        for index in range(100):
+            pool.put(index, index)
+        sleep(0.2)
+        for index in range(100, 200):
+            pool.put(index, index, lifetime=0)
+        self.assertEqual(len(pool), 100)
+        self.assertEqual(pool.reap(1), 0)
+        pool.put(-1, -1, lifetime=10)
+        for index in range(100):
+            pool.put(0, index, lifetime=100)  # overwrite to compact heap
+        self.assertEqual(len(pool), 102)
+
+
+class TestShardedPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_shards(self):
+        def read(pool: ShardedCachePool, name: int):
+            return pool[name]
+        pool: ShardedCachePool[int, int] = ShardedCachePool(shards=4, lifetime=0.1)  # noqa:E501
+        self.assertEqual(len(pool.shards), 4)
+        self.assertEqual(str(pool), f"sharded cache pool at {id(pool)}")
+        for index in range(8):
+            pool[index] = index
+        self.assertEqual(len(pool), 8)
+        self.assertEqual(sorted(pool), list(range(8)))
+        self.assertEqual(pool.weight, 0)
+        self.assertIn(1, pool)
+        self.assertIs(pool.shard(1), pool.shard(1))
+        self.assertEqual(pool[1], 1)
+        del pool[1]
+        self.assertNotIn(1, pool)
+        self.assertRaises(CacheMiss, read, pool, 1)
+        pool.put(1, 1, lifetime=0)
+        sleep(0.2)
+        self.assertEqual(pool.reap(), 7)
+        self.assertEqual(list(pool), [1])
+        pool.lifetime = 10
+        self.assertEqual(pool.lifetime, 10.0)
+
+    def test_bounded_shards(self):
+        pool: ShardedCachePool[int, str] = ShardedCachePool(
+            shards=2, capacity=3, maxweight=10, sizer=len, policy=LFUPolicy)
+        for shard in pool.shards:
+            self.assertEqual(shard.capacity, 2)
+            self.assertEqual(shard.maxweight, 5)
+            self.assertIsInstance(shard.policy, LFUPolicy)
+        for index in range(8):
+            pool[index] = "ab"
+        self.assertEqual(len(pool), 4)
+        self.assertEqual(pool.weight, 8)
+
+
+class TestCached(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_function(self):
+        calls = []
+
+        @cached(capacity=2)
+        def square(value: int, offset: int = 0) -> int:
+            calls.append(value)
+            return value * value + offset
+
+        self.assertEqual(square.__name__, "square")
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(2), 4)
+        self.assertEqual(square(2, offset=1), 5)
+        self.assertEqual(calls, [2, 2])
+        self.assertEqual(square.pool.capacity, 2)
+        self.assertEqual(square.pool.statistics.hits, 1)
+        square(3)
+        self.assertEqual(len(square.pool), 2)
+
+    def test_key_collision(self):
+        @cached()
+        def call(*args, **kwargs) -> str:
+            return f"{args} {kwargs}"
+
+        self.assertEqual(call(a=1), "() {'a': 1}")
+        self.assertEqual(call((), (("a", 1),)), "((), (('a', 1),)) {}")
+        self.assertEqual(call(("a", 1)), "(('a', 1),) {}")
+        self.assertEqual(call(1, b=2), "(1,) {'b': 2}")
+        self.assertEqual(call(1, ("b", 2)), "(1, ('b', 2)) {}")
+        self.assertEqual(len(call.pool), 5)
+        self.assertEqual(call(b=2, a=1), call(a=1, b=2))
+        self.assertEqual(pickle.loads(pickle.dumps(KeywordMark())), KeywordMark())  # noqa:E501
+        self.assertEqual(repr(KeywordMark()), "KeywordMark()")
+        self.assertNotEqual(KeywordMark(), None)
+
+    def test_key_and_pool(self):
+        pool: ShardedCachePool[str, str] = ShardedCachePool(shards=2)
+
+        @cached(pool=pool, key=lambda value: value.lower())
+        def upper(value: str) -> str:
+            return value.upper()
+
+        self.assertIs(upper.pool, pool)
+        self.assertEqual(upper("a"), "A")
+        self.assertEqual(upper("A"), "A")
+        self.assertEqual(pool.get("a"), "A")
+
+    def test_single_flight(self):
+        event = Event()
+        calls = []
+
+        @cached(lifetime=10)
+        def slow(value: int) -> int:
+            calls.append(value)
+            event.wait()
+            return value
+
+        with ThreadPool(4) as executor:
+            futures = [executor.submit(slow, 1) for _ in range(4)]
+            sleep(0.1)
+            event.set()
+            self.assertEqual([f.result() for f in futures], [1] * 4)
+        self.assertEqual(calls, [1])
+
+    def test_coroutine(self):
+        calls = []
+
+        @cached(pool=ShardedCachePool(shards=2))
+        async def double(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return value * 2
+
+        async def main():
+            return await asyncio.gather(*(double(1) for _ in range(4)),
+                                        double(2))
+
+        self.assertEqual(double.__name__, "double")
+        self.assertEqual(asyncio.run(main()), [2, 2, 2, 2, 4])
+        self.assertEqual(asyncio.run(double(1)), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(double.pool.statistics.loads, 2)
+
+    def test_coroutine_error(self):
+        calls = []
+
+        @cached()
+        async def fail(value: int) -> int:
+            calls.append(value)
+            raise ValueError(value)
+
+        self.assertRaises(ValueError, asyncio.run, fail(1))
+        self.assertRaises(ValueError, asyncio.run, fail(1))
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(fail.pool.statistics.load_failures, 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,169 @@
+# coding:utf-8
+
+import asyncio
+from concurrent.futures import CancelledError
+from time import sleep
+import unittest
+
+from xkits import AsyncTaskJob
+from xkits import AsyncTaskPool
+from xkits import TaskJob
+from xkits import ThreadPool
+from xkits import run_job
+from xkits import run_task
+
+
+async def double(value: int, delay: float = 0.01) -> int:
+    await asyncio.sleep(delay)
+    return value * 2
+
+
+async def fail(value: int) -> int:
+    raise ValueError(value)
+
+
+def blocking(value: int) -> int:
+    sleep(0.01)
+    return value + 1
+
+
+class test_run_job(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_run_job(self):
+        async def main():
+            with ThreadPool(2) as pool:
+                job = TaskJob(1, blocking, 1)
+                self.assertEqual(await run_job(job, pool), 2)
+                self.assertTrue(job.done())
+                self.assertEqual(await run_task(pool, blocking, 2), 3)
+                self.assertEqual(await run_task(None, blocking, 3), 4)
+                with self.assertRaises(ValueError):
+                    await run_task(pool, int, "x")
+        asyncio.run(main())
+
+    def test_retain(self):
+        async def main():
+            async with AsyncTaskPool(retain=2, retention=60) as pool:
+                self.assertEqual(pool.retain, 2)
+                self.assertEqual(pool.retention, 60.0)
+                jobs = [pool.submit_task(double, i) for i in range(5)]
+                await pool.barrier()
+                self.assertEqual(list(pool), [job.id for job in jobs[-2:]])
+                self.assertEqual(await pool.take(jobs[-1].id), 8)
+                self.assertEqual(len(pool), 1)
+                self.assertEqual(pool.active, 0)
+        asyncio.run(main())
+
+    def test_cancel(self):
+        async def main():
+            with ThreadPool(2) as pool:
+                busy = [asyncio.ensure_future(run_task(pool, sleep, 0.05)) for _ in range(2)]  # noqa:E501
+                job = TaskJob(1, blocking, 1)
+                waiting = asyncio.ensure_future(run_job(job, pool))
+                await asyncio.sleep(0.01)
+                waiting.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await waiting
+                self.assertTrue(job.future.cancelled())
+                await asyncio.gather(*busy)
+        asyncio.run(main())
+
+
+class test_async_task_pool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_submit(self):
+        async def main():
+            async with AsyncTaskPool(concurrency=4) as pool:
+                self.assertTrue(pool.running)
+                self.assertEqual(pool.concurrency, 4)
+                self.assertEqual(pool.timeout, 0.0)
+                self.assertIsNone(pool.executor)
+                jobs = [pool.submit_task(double, i) for i in range(1, 9)]
+                self.assertEqual(pool.pending, 8)
+                await asyncio.sleep(0.005)
+                self.assertEqual(pool.active, 4)
+                self.assertEqual(await jobs[0], 2)
+                self.assertEqual(await pool.take(jobs[1].id), 4)
+                self.assertNotIn(jobs[1].id, pool)
+                failed = pool.submit_task(fail, 1)
+                with self.assertRaises(ValueError):
+                    await pool.take(failed.id)
+                job = pool.submit_blocking_task(blocking, 1)
+                self.assertEqual(await pool.take(job.id), 2)
+            self.assertFalse(pool.running)
+            self.assertEqual(pool.pending, 0)
+            self.assertEqual(jobs[-1].result, 16)
+            self.assertGreater(jobs[-1].coroutine_timer.runtime, 0.0)
+            self.assertEqual(pool.status_counter.success, 9)
+            self.assertEqual(pool.status_counter.failure, 1)
+            self.assertRaises(RuntimeError, pool.submit_task, double, 1)
+            self.assertRaises(AssertionError, pool.submit_job, TaskJob(100, double, 1))  # noqa:E501
+        asyncio.run(main())
+
+    def test_timeout(self):
+        async def main():
+            async with AsyncTaskPool(timeout=0.01) as pool:
+                job = pool.submit_task(double, 1, 1.0)
+                with self.assertRaises(asyncio.TimeoutError):
+                    await pool.take(job.id)
+                job = pool.submit_timeout_task(0, double, 1, 0.02)
+                self.assertEqual(job.timeout, 0.0)
+                with self.assertRaises(TimeoutError):
+                    await pool.take(job.id, 0.001)
+                self.assertEqual(await pool.take(job.id), 2)
+        asyncio.run(main())
+
+    def test_cancel(self):
+        async def main():
+            pool = AsyncTaskPool(concurrency=1)
+            pool.startup()
+            running = pool.submit_task(double, 1, 1.0)
+            waiting = pool.submit_task(double, 2, 1.0)
+            await asyncio.sleep(0.005)
+            self.assertTrue(waiting.cancel())
+            with self.assertRaises(CancelledError):
+                await pool.take(waiting.id)
+            self.assertTrue(waiting.future.cancelled())
+            self.assertEqual(pool.active, 1)
+            await pool.shutdown(cancel=True)
+            self.assertTrue(running.future.cancelled())
+            await pool.barrier()
+            self.assertTrue(pool.running)
+            await pool.shutdown()
+            self.assertEqual(pool.status_counter.failure, 2)
+            job = AsyncTaskJob(1, double, 1)
+            self.assertTrue(job.cancel())
+            self.assertIsNone(job.task)
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()
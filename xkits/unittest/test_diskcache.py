@@ -0,0 +1,180 @@
+# coding:utf-8
+
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Thread
+from time import sleep
+import unittest
+from unittest import mock
+
+from xkits import CacheMiss
+from xkits import DiskCache
+from xkits import TieredCachePool
+from xkits import diskcache
+
+
+class TestDiskCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        tdir: str = mkdtemp()
+        self.addCleanup(rmtree, tdir)
+        self.path = os.path.join(tdir, "cache.db")
+        self.disk: DiskCache[str, int] = DiskCache(self.path)
+        self.addCleanup(self.disk.close)
+
+    def tearDown(self):
+        pass
+
+    def test_put_get(self):
+        self.assertEqual(str(self.disk), f"disk cache at {id(self.disk)} path={self.path}")  # noqa:E501
+        self.disk.put("a", 1)
+        self.disk.put(("b", 2), 2, 10)
+        self.assertEqual(len(self.disk), 2)
+        self.assertIn("a", self.disk)
+        self.assertNotIn("c", self.disk)
+        self.assertEqual(set(self.disk), {"a", ("b", 2)})
+        self.assertEqual(self.disk.get("a"), (1, 0.0))
+        value, remaining = self.disk.get(("b", 2))
+        self.assertEqual(value, 2)
+        self.assertGreater(remaining, 9)
+        self.assertRaises(CacheMiss, self.disk.get, "c")
+        self.disk.delete("a")
+        self.assertNotIn("a", self.disk)
+
+    @mock.patch.object(diskcache, "time")
+    def test_expire(self, mock_time):
+        mock_time.return_value = 100.0
+        self.disk.put("a", 1, 5)
+        self.disk.put("b", 2, 20)
+        self.disk.put("c", 3)
+        mock_time.return_value = 110.0
+        self.assertRaises(CacheMiss, self.disk.get, "a")
+        self.assertNotIn("a", self.disk)
+        self.disk.put("d", 4, 5)
+        mock_time.return_value = 116.0
+        self.assertEqual(self.disk.reap(), ["d"])
+        self.assertEqual(set(self.disk), {"b", "c"})
+
+    @mock.patch.object(diskcache, "time")
+    def test_recent(self, mock_time):
+        for second, index in enumerate("abcd"):
+            mock_time.return_value = 100.0 + second
+            self.disk.put(index, second, 10 if index != "b" else 1)
+        mock_time.return_value = 104.0
+        self.assertEqual(self.disk.recent(), [("d", 3, 9.0), ("c", 2, 8.0), ("a", 0, 6.0)])  # noqa:E501
+        self.assertEqual(self.disk.recent(2), [("d", 3, 9.0), ("c", 2, 8.0)])  # noqa:E501
+
+
+class TestTieredCachePool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        tdir: str = mkdtemp()
+        self.addCleanup(rmtree, tdir)
+        self.path = os.path.join(tdir, "cache.db")
+
+    def tearDown(self):
+        pass
+
+    def test_spill_and_promote(self):
+        pool: TieredCachePool[str, int] = TieredCachePool(self.path, capacity=2)  # noqa:E501
+        self.assertEqual(str(pool), f"tiered cache pool at {id(pool)} path={self.path}")  # noqa:E501
+        pool.put("a", 1)
+        pool.put("b", 2)
+        pool.put("c", 3)
+        self.assertEqual(pool.statistics.evictions, 1)
+        self.assertEqual(list(pool.disk), ["a"])
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(set(pool), {"a", "b", "c"})
+        self.assertIn("a", pool)
+        self.assertNotIn("d", pool)
+        self.assertEqual(pool.get("a"), 1)  # promoted from disk
+        self.assertEqual(set(pool.disk), {"a", "b"})
+        self.assertEqual(pool.get_or_load("b", lambda: 0), 2)
+        self.assertRaises(CacheMiss, pool.get, "d")
+        pool.put("a", 10)  # outdated disk copy is dropped
+        self.assertEqual(set(pool.disk), {"b", "c"})
+        pool.delete("c")
+        self.assertNotIn("c", pool.disk)
+        pool.delete("d")
+        pool.close()
+
+    def test_expired(self):
+        disk: DiskCache[str, int] = DiskCache(self.path)
+        disk.put("a", 1, 10)
+        disk.put("b", 2, 10)
+        disk.close()
+        pool: TieredCachePool[str, int] = TieredCachePool(self.path, capacity=1, warm=False)  # noqa:E501
+        self.assertEqual(set(pool), {"a", "b"})
+        with mock.patch.object(diskcache, "time", return_value=1e12):
+            self.assertRaises(CacheMiss, pool.get, "a")
+            self.assertEqual(pool.reap(), 0)
+        self.assertNotIn("a", pool)
+        self.assertNotIn("b", pool)
+        self.assertEqual(len(pool.disk), 0)
+        pool.put("c", 3, 0.01)
+        sleep(0.02)
+        pool.flush()  # expired items are not persisted
+        self.assertEqual(len(pool.disk), 0)
+        pool.close()
+
+    def test_expired_promoted(self):
+        pool: TieredCachePool[str, int] = TieredCachePool(self.path, lifetime=0.05, capacity=1)  # noqa:E501
+        self.addCleanup(pool.close)
+        pool.put("a", 1)
+        pool.put("b", 2)
+        self.assertEqual(pool.get("a"), 1)  # promoted from disk
+        sleep(0.1)
+        self.assertRaises(CacheMiss, pool.get, "a")
+        self.assertNotIn("a", pool)
+        self.assertNotIn("a", pool.disk)
+        pool.put("c", 3)
+        pool.flush()
+        sleep(0.1)
+        self.assertRaises(CacheMiss, pool.get, "c")
+        self.assertNotIn("c", pool.disk)
+
+    def test_persist(self):
+        pool: TieredCachePool[str, int] = TieredCachePool(self.path, capacity=2)  # noqa:E501
+        pool.put("a", 1)
+        pool.put("b", 2, 60)
+        pool.close()
+        pool = TieredCachePool(self.path, capacity=1)
+        self.assertEqual(len(pool.disk), 2)
+        self.assertEqual(pool.weight, 1)  # warmed in memory
+        self.assertEqual(pool.get("a"), 1)
+        self.assertEqual(pool.get("b"), 2)
+        self.assertLessEqual(pool.lookup("b").downtime, 60)
+        pool.close()
+
+    def test_concurrent_spill(self):
+        pool: TieredCachePool[int, int] = TieredCachePool(self.path, capacity=1)  # noqa:E501
+        self.addCleanup(pool.close)
+        writer = Thread(target=lambda: [pool.put(i, i) for i in range(500)])
+        writer.start()
+        while writer.is_alive():
+            self.assertLessEqual(len(set(pool)), 500)
+            self.assertLessEqual(len(pool), 500)
+        writer.join()
+        self.assertEqual(len(pool), 500)
+        self.assertEqual(pool.get(0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,307 @@
+# coding:utf-8
+
+from threading import Event
+from threading import Lock
+from time import sleep
+import unittest
+from unittest import mock
+
+from xkits import ItemPool
+from xkits import LockProfiler
+from xkits import LockStats
+from xkits import NamedLock
+from xkits import NamedRWLock
+from xkits import ProfiledLock
+from xkits import ProfiledRWLock
+from xkits import RWLock
+from xkits import TaskPool
+from xkits import ThreadPool
+from xkits import lock_profiler
+
+
+class test_rw_lock(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_readers(self):
+        lock = RWLock()
+        with lock.read():
+            with lock.read(timeout=0.01):
+                self.assertEqual(lock.readers, 2)
+                self.assertFalse(lock.acquire(timeout=0.01))
+                self.assertFalse(lock.acquire(blocking=False))
+        self.assertEqual(lock.readers, 0)
+        with lock:
+            self.assertTrue(lock.locked())
+            self.assertFalse(lock.acquire_read(blocking=False))
+            with self.assertRaises(TimeoutError):
+                with lock.read(timeout=0.01):
+                    pass  # pragma: no cover
+            with self.assertRaises(TimeoutError):
+                with lock.write(timeout=0.01):
+                    pass  # pragma: no cover
+        self.assertFalse(lock.locked())
+        with lock.write(timeout=1) as held:
+            self.assertTrue(held.locked())
+        self.assertRaises(RuntimeError, lock.release)
+        self.assertRaises(RuntimeError, lock.release_read)
+
+    def test_writer_preference(self):
+        lock = RWLock()
+        order = []
+        with ThreadPool(2) as executor:
+            lock.acquire_read()
+            writer = executor.submit(lock.acquire)
+            sleep(0.05)
+            self.assertFalse(lock.acquire_read(timeout=0.01))  # held off
+            reader = executor.submit(lambda: order.append(lock.acquire_read()))  # noqa:E501
+            lock.release_read()
+            writer.result()
+            order.append("write")
+            lock.release()
+            reader.result()
+            lock.release_read()
+        self.assertEqual(order, ["write", True])
+
+
+class test_named_lock(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_refcount(self):
+        named_lock: NamedLock[str] = NamedLock()
+        with named_lock("a") as lock:
+            self.assertTrue(lock.locked())
+            self.assertEqual(named_lock.find("a").refs, 1)
+            with self.assertRaises(TimeoutError):
+                with named_lock("a", timeout=0.01):
+                    pass  # pragma: no cover
+            self.assertFalse(named_lock.acquire("a", blocking=False))
+            self.assertEqual(named_lock.find("a").refs, 1)
+        self.assertNotIn("a", named_lock)
+        self.assertEqual(len(named_lock), 0)
+        for index in range(100):
+            self.assertTrue(named_lock.acquire(f"url{index}"))
+            named_lock.release(f"url{index}")
+        self.assertEqual(len(named_lock), 0)
+        self.assertRaises(KeyError, named_lock.release, "a")
+
+    def test_acquire_error(self):
+        named_lock: NamedLock[str] = NamedLock()
+        with named_lock("a"):
+            self.assertRaises(ValueError, named_lock.acquire, "a", timeout=-2)  # noqa:E501
+            self.assertEqual(named_lock.find("a").refs, 1)
+        self.assertEqual(len(named_lock), 0)
+
+    def test_pinned(self):
+        named_lock: NamedLock[str] = NamedLock()
+        lock = named_lock["a"]
+        with named_lock("a") as held:
+            self.assertIs(held, lock)
+        self.assertIn("a", named_lock)
+        self.assertTrue(named_lock.lookup("a").pinned)
+        with named_lock("b"):
+            self.assertIs(named_lock["b"], named_lock.find("b").lock)
+        self.assertIn("b", named_lock)
+
+    def test_waiters(self):
+        named_lock: NamedLock[str] = NamedLock()
+        event = Event()
+        results = []
+
+        def hold(index: int):
+            with named_lock("a"):
+                event.wait()
+                results.append(index)
+
+        with ThreadPool(4) as executor:
+            futures = [executor.submit(hold, i) for i in range(4)]
+            sleep(0.05)
+            self.assertEqual(named_lock.find("a").refs, 4)
+            event.set()
+            for future in futures:
+                future.result()
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertNotIn("a", named_lock)
+
+
+class test_named_rw_lock(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_read_write(self):
+        named_lock: NamedRWLock[str] = NamedRWLock()
+        with named_lock.read("a") as lock:
+            self.assertIsInstance(lock, RWLock)
+            with named_lock.read("a", timeout=0.01):
+                self.assertEqual(lock.readers, 2)
+                self.assertEqual(named_lock.find("a").refs, 2)
+            with self.assertRaises(TimeoutError):
+                with named_lock("a", timeout=0.01):
+                    pass  # pragma: no cover
+        self.assertNotIn("a", named_lock)
+        with named_lock("a"):
+            with self.assertRaises(TimeoutError):
+                with named_lock.read("a", timeout=0.01):
+                    pass  # pragma: no cover
+            self.assertEqual(named_lock.find("a").refs, 1)
+        self.assertEqual(len(named_lock), 0)
+        with mock.patch.object(RWLock, "acquire_read", side_effect=KeyboardInterrupt):  # noqa:E501
+            self.assertRaises(KeyboardInterrupt, named_lock.acquire_read, "a")
+        self.assertEqual(len(named_lock), 0)
+
+
+class test_lock_profiler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        lock_profiler().disable()
+        lock_profiler().reset()
+
+    def test_profiled_lock(self):
+        profiler: LockProfiler = LockProfiler()
+        lock = profiler.lock("a")
+        self.assertIsInstance(lock, ProfiledLock)
+        self.assertIsInstance(profiler.lock("a", Lock()), ProfiledLock)
+        self.assertIn("a", profiler)
+        self.assertEqual(len(profiler), 1)
+        self.assertEqual(str(lock), "profiled lock a")
+        with lock as held:
+            self.assertIs(held, lock)
+            self.assertTrue(lock.locked())
+            self.assertFalse(lock.acquire(False))
+            self.assertFalse(lock.acquire(timeout=0.01))
+        self.assertFalse(lock.locked())
+        with ThreadPool(1) as pool:
+            with lock:
+                future = pool.submit(lock.acquire)
+                sleep(0.02)
+            self.assertTrue(future.result())
+            lock.release()
+        stats: LockStats = profiler["a"]
+        self.assertIs(lock.stats, stats)
+        self.assertIsInstance(lock.lock, type(Lock()))
+        self.assertEqual(stats.acquires, 3)
+        self.assertEqual(stats.contentions, 3)
+        self.assertEqual(stats.timeouts, 2)
+        self.assertGreater(stats.wait.maximum, 0.01)
+        self.assertGreater(stats.hold.maximum, 0.01)
+        snapshot = profiler.snapshot()["a"]
+        self.assertEqual(snapshot["acquires"], 3)
+        self.assertEqual(snapshot["wait_max"], stats.wait.maximum)
+        logger = mock.MagicMock()
+        profiler.report(logger)
+        logger.info.assert_called_once()
+        self.assertEqual([item.name for item in profiler], ["a"])
+        profiler.reset()
+        self.assertEqual(len(profiler), 0)
+
+    def test_profiled_rwlock(self):
+        profiler: LockProfiler = LockProfiler()
+        lock = profiler.rwlock("rw")
+        self.assertIsInstance(lock, ProfiledRWLock)
+        self.assertIs(lock.read_stats, profiler["rw.read"])
+        self.assertTrue(lock.acquire_read())
+        self.assertTrue(lock.acquire_read(timeout=0.01))
+        self.assertEqual(lock.readers, 2)
+        self.assertFalse(lock.acquire(timeout=0.01))
+        lock.release_read()
+        sleep(0.02)
+        lock.release_read()
+        with lock:
+            self.assertFalse(lock.acquire_read(False))
+            self.assertFalse(lock.acquire_read(timeout=0.01))
+        with ThreadPool(1) as pool:
+            with lock:
+                future = pool.submit(lock.acquire_read)
+                sleep(0.02)
+            self.assertTrue(future.result())
+        lock.release_read()  # released by another thread
+        self.assertEqual(lock.readers, 0)
+        read: LockStats = profiler["rw.read"]
+        self.assertEqual(read.acquires, 3)
+        self.assertEqual(read.contentions, 3)
+        self.assertEqual(read.timeouts, 2)
+        self.assertGreater(read.wait.maximum, 0.01)
+        self.assertGreater(read.hold.maximum, 0.02)
+        self.assertEqual(profiler["rw"].acquires, 2)
+        self.assertEqual(profiler["rw"].timeouts, 1)
+        self.assertIsInstance(LockProfiler(enabled=False).rwlock("rw"), RWLock)  # noqa:E501
+
+    def test_default_profiler(self):
+        profiler: LockProfiler = lock_profiler()
+        self.assertFalse(profiler.enabled)
+        self.assertNotIsInstance(profiler.lock("a"), ProfiledLock)
+        self.assertNotIsInstance(NamedLock().lookup("a").lock, ProfiledLock)  # noqa:E501
+        profiler.enable()
+        named_lock: NamedLock[str] = NamedLock("paths")
+        self.assertEqual(named_lock.name, "paths")
+        self.assertIs(named_lock.profiler, profiler)
+        with named_lock("a"):
+            pass
+        named_rwlock: NamedRWLock[str] = NamedRWLock("files")
+        with named_rwlock.read("a") as lock:
+            self.assertIsInstance(lock, ProfiledRWLock)
+        with named_rwlock("a"):
+            pass
+        self.assertEqual(profiler["files"].acquires, 1)
+        self.assertEqual(profiler["files.read"].acquires, 1)
+        items: ItemPool[str, int] = ItemPool()
+        items.put("a", 1)
+        with TaskPool(1, prefix="test") as pool:
+            pool.submit_task(int, 1)
+        self.assertEqual(profiler["paths"].acquires, 1)
+        self.assertGreater(profiler["ItemPool.intlock"].acquires, 0)
+        self.assertGreater(profiler["test.intlock"].acquires, 0)
+        with mock.patch.object(profiler, "snapshot", return_value={}):
+            profiler.report()
+
+
+if __name__ == "__main__":
+    unittest.main()
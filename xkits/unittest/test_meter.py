@@ -1,5 +1,6 @@
 # coding:utf-8
 
+from threading import Thread
 import unittest
 from unittest import mock
 
@@ -22,9 +23,10 @@ class TestTimeMeter(unittest.TestCase):
     def tearDown(self):
         pass
 
-    @mock.patch.object(meter, "time")
-    def test_runtime(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_runtime(self, mock_monotonic):
+        mock_monotonic.side_effect = [2.0, 3.0, 4.0, 5.0]
         timer = meter.TimeMeter(startup=False)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 0.0)
@@ -38,9 +40,10 @@ class TestTimeMeter(unittest.TestCase):
         self.assertEqual(timer.runtime, 2.0)
         self.assertEqual(timer.runtime, 3.0)
 
-    @mock.patch.object(meter, "time")
-    def test_restart(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_restart(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0]
         timer = meter.TimeMeter(startup=True)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 1.0)
@@ -60,9 +63,10 @@ class TestTimeMeter(unittest.TestCase):
         self.assertTrue(timer.started)
         self.assertFalse(timer.stopped)
 
-    @mock.patch.object(meter, "time")
-    def test_startup(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_startup(self, mock_monotonic):
+        mock_monotonic.side_effect = [2.0]
         timer = meter.TimeMeter(startup=False)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 0.0)
@@ -82,9 +86,10 @@ class TestTimeMeter(unittest.TestCase):
         self.assertTrue(timer.started)
         self.assertFalse(timer.stopped)
 
-    @mock.patch.object(meter, "time")
-    def test_shutdown(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_shutdown(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0]
         timer = meter.TimeMeter(startup=True)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 1.0)
@@ -104,10 +109,12 @@ class TestTimeMeter(unittest.TestCase):
         self.assertFalse(timer.started)
         self.assertTrue(timer.stopped)
 
-    @mock.patch.object(meter, "time")
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
     @mock.patch.object(meter, "sleep")
-    def test_alarm(self, mock_sleep, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 5.0]
+    def test_alarm(self, mock_sleep, mock_monotonic):
+        del mock_monotonic.sleep  # not a fake clock
+        mock_monotonic.side_effect = [2.0, 3.0, 5.0]
         timer = meter.TimeMeter(startup=False)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 0.0)
@@ -118,9 +125,10 @@ class TestTimeMeter(unittest.TestCase):
         self.assertEqual(timer.stopped_time, 0.0)
         mock_sleep.assert_called_once_with(2.0)
 
-    @mock.patch.object(meter, "time")
-    def test_reset(self, mock_time):
-        mock_time.side_effect = [1.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_reset(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0]
         timer = meter.TimeMeter(startup=True)
         self.assertEqual(timer.created_time, 1.0)
         self.assertEqual(timer.started_time, 1.0)
@@ -130,6 +138,24 @@ class TestTimeMeter(unittest.TestCase):
         self.assertEqual(timer.started_time, 0.0)
         self.assertEqual(timer.stopped_time, 0.0)
 
+    def test_source(self):
+        clock = meter.FakeClock()
+        timer = meter.TimeMeter(startup=False, source=clock)
+        self.assertIs(timer.source, clock)
+        self.assertLessEqual(timer.created_time, meter.time())
+        timer.alarm(3.0)
+        self.assertEqual(timer.started_time, 1.0)
+        self.assertEqual(timer.runtime, 3.0)
+        self.assertEqual(clock(), 4.0)
+        clock.advance(1)
+        timer.shutdown()
+        self.assertEqual(timer.stopped_time, 5.0)
+        self.assertEqual(timer.runtime, 4.0)
+        self.assertRaises(ValueError, clock.advance, -1)
+        clock.sleep(-1)
+        self.assertEqual(clock(), 5.0)
+        self.assertIs(meter.TimeMeter().source, meter.monotonic)
+
 
 class TestDownMeter(unittest.TestCase):
 
@@ -147,9 +173,10 @@ class TestDownMeter(unittest.TestCase):
     def tearDown(self):
         pass
 
-    @mock.patch.object(meter, "time")
-    def test_downtime(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_downtime(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0]
         countdown = meter.DownMeter(lifetime=3)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -160,9 +187,19 @@ class TestDownMeter(unittest.TestCase):
         self.assertEqual(countdown.downtime, 0.0)
         self.assertEqual(countdown.downtime, -1.0)
 
-    @mock.patch.object(meter, "time")
-    def test_downtime_0(self, mock_time):
-        mock_time.side_effect = [1.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_deadline(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0]
+        countdown = meter.DownMeter(lifetime=3)
+        self.assertEqual(countdown.deadline, 4.0)
+        countdown.renew(lifetime=0)
+        self.assertEqual(countdown.deadline, 0.0)
+
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_downtime_0(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0]
         countdown = meter.DownMeter(lifetime=0)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -173,9 +210,10 @@ class TestDownMeter(unittest.TestCase):
         self.assertFalse(countdown.expired)
         self.assertFalse(countdown.expired)
 
-    @mock.patch.object(meter, "time")
-    def test_expired(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_expired(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0]
         countdown = meter.DownMeter(lifetime=3)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -186,9 +224,10 @@ class TestDownMeter(unittest.TestCase):
         self.assertFalse(countdown.expired)
         self.assertTrue(countdown.expired)
 
-    @mock.patch.object(meter, "time")
-    def test_reset(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_reset(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
         countdown = meter.DownMeter(lifetime=1)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -208,9 +247,10 @@ class TestDownMeter(unittest.TestCase):
         self.assertEqual(countdown.lifetime, 1.0)
         self.assertEqual(countdown.downtime, 0.0)
 
-    @mock.patch.object(meter, "time")
-    def test_renew(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_renew(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
         countdown = meter.DownMeter(lifetime=1)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -230,9 +270,10 @@ class TestDownMeter(unittest.TestCase):
         self.assertEqual(countdown.lifetime, 2.0)
         self.assertEqual(countdown.downtime, 1.0)
 
-    @mock.patch.object(meter, "time")
-    def test_shutdown(self, mock_time):
-        mock_time.side_effect = [1.0, 2.0, 3.0]
+    @mock.patch.object(meter, "time", mock.MagicMock(return_value=1.0))
+    @mock.patch.object(meter, "monotonic")
+    def test_shutdown(self, mock_monotonic):
+        mock_monotonic.side_effect = [1.0, 2.0, 3.0]
         countdown = meter.DownMeter(lifetime=3)
         self.assertEqual(countdown.created_time, 1.0)
         self.assertEqual(countdown.started_time, 1.0)
@@ -286,6 +327,21 @@ class TestTsCountMeter(unittest.TestCase):
         self.assertEqual(counter.success, 2)
         self.assertEqual(counter.failure, 2)
 
+    def test_LocalCountMeter(self):
+        counter = meter.LocalCountMeter()
+        self.assertEqual(str(counter), f"LocalCountMeter({id(counter)})")
+        self.assertEqual(counter.total, 0)
+        self.assertRaises(ValueError, counter.inc, 0)
+        counter.inc()
+        threads = [Thread(target=lambda: [counter.inc(2) for _ in range(1000)]) for _ in range(4)]  # noqa:E501
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.total, 8001)  # exited threads are folded
+        counter.inc()
+        self.assertEqual(counter.total, 8002)
+
     def test_add(self):
         counter = meter.TsCountMeter()
         self.assertEqual(counter.total, 0)
@@ -323,5 +379,250 @@ class TestTsCountMeter(unittest.TestCase):
         self.assertEqual(counter.total, -5)
 
 
+class TestHistogramMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_observe(self):
+        histogram = meter.HistogramMeter((1.0, 2.0, 4.0))
+        self.assertEqual(str(histogram), f"HistogramMeter({id(histogram)})")
+        self.assertEqual(histogram.mean, 0.0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+        self.assertRaises(ValueError, histogram.percentile, 101)
+        for value in (0.5, 1.5, 1.5, 3.0, 10.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.total, 5)
+        self.assertEqual(histogram.sum, 16.5)
+        self.assertEqual(histogram.mean, 3.3)
+        self.assertEqual(histogram.minimum, 0.5)
+        self.assertEqual(histogram.maximum, 10.0)
+        self.assertEqual(histogram.buckets, {1.0: 1, 2.0: 2, 4.0: 1, float("inf"): 1})  # noqa:E501
+        self.assertEqual(histogram.percentile(0), 1.0)
+        self.assertEqual(histogram.percentile(50), 2.0)
+        self.assertEqual(histogram.percentile(80), 4.0)
+        self.assertEqual(histogram.percentile(100), 10.0)
+
+    def test_merge(self):
+        histogram = meter.HistogramMeter((1.0, 2.0))
+        other = meter.HistogramMeter((1.0, 2.0))
+        self.assertRaises(ValueError, histogram.merge, meter.HistogramMeter((1.0,)))  # noqa:E501
+        histogram.merge(other)
+        self.assertEqual(histogram.total, 0)
+        other.observe(1.5)
+        histogram.merge(other)
+        self.assertEqual(histogram.minimum, 1.5)
+        other.observe(0.5)
+        histogram.merge(other)
+        self.assertEqual(histogram.total, 3)
+        self.assertEqual(histogram.minimum, 0.5)
+        self.assertEqual(histogram.maximum, 1.5)
+        self.assertEqual(histogram.buckets[2.0], 2)
+
+
+class TestRateMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_rates(self):
+        self.assertRaises(ValueError, meter.RateMeter, 0)
+        clock = meter.FakeClock(0.0)
+        rate = meter.RateMeter(source=clock)
+        self.assertEqual(str(rate), f"RateMeter({id(rate)})")
+        self.assertEqual(rate.interval, 5.0)
+        self.assertEqual(rate.mean_rate, 0.0)
+        self.assertEqual(rate.rates, (0.0, 0.0, 0.0))
+        for _ in range(60):
+            self.assertGreater(rate.mark(10), 0)
+            clock.advance(1.0)
+        self.assertEqual(rate.count, 600)
+        self.assertEqual(rate.mean_rate, 10.0)
+        self.assertAlmostEqual(rate.m1_rate, 10.0)
+        self.assertAlmostEqual(rate.m5_rate, 10.0)
+        self.assertAlmostEqual(rate.m15_rate, 10.0)
+        clock.advance(60.0)
+        self.assertAlmostEqual(rate.m1_rate, 10.0 * 0.36787944, 6)
+        self.assertLess(rate.m1_rate, rate.m5_rate)
+        self.assertLess(rate.m5_rate, rate.m15_rate)
+
+
+class TestWindowCountMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_window(self):
+        self.assertRaises(ValueError, meter.WindowCountMeter, 0)
+        clock = meter.FakeClock(0.0)
+        counter = meter.WindowCountMeter(10, 5, source=clock)
+        self.assertEqual(str(counter), f"WindowCountMeter({id(counter)})")
+        self.assertEqual(counter.window, 10.0)
+        self.assertEqual(counter.slots, 5)
+        self.assertEqual(counter.inc(), 1)
+        self.assertEqual(counter.inc(2), 3)
+        self.assertRaises(ValueError, counter.inc, 0)
+        clock.advance(4.0)
+        counter.inc(4)
+        self.assertEqual(counter.total, 7)
+        self.assertEqual(counter.rate, 0.7)
+        clock.advance(7.0)
+        self.assertEqual(counter.total, 4)
+        clock.advance(10.0)
+        self.assertEqual(counter.inc(), 1)
+        self.assertEqual(counter.total, 1)
+        counter.reset()
+        self.assertEqual(counter.total, 0)
+
+
+class TestHdrHistogramMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_observe(self):
+        self.assertRaises(ValueError, meter.HdrHistogramMeter, 1.0, 1.0)
+        self.assertRaises(ValueError, meter.HdrHistogramMeter, digits=0)
+        histogram = meter.HdrHistogramMeter(0.001, 100.0, 2)
+        self.assertEqual(str(histogram), f"HdrHistogramMeter({id(histogram)})")  # noqa:E501
+        self.assertEqual(histogram.mean, 0.0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+        self.assertRaises(ValueError, histogram.percentile, 101)
+        self.assertRaises(ValueError, histogram.observe, 1.0, 0)
+        for i in range(1, 1001):
+            histogram.observe(i / 100.0)
+        histogram.observe(1000.0)  # clamped to highest
+        self.assertEqual(histogram.total, 1001)
+        self.assertEqual(histogram.minimum, 0.01)
+        self.assertEqual(histogram.maximum, 1000.0)
+        self.assertAlmostEqual(histogram.mean, (5005.0 + 1000.0) / 1001)
+        self.assertAlmostEqual(histogram.percentile(50), 5.0, delta=0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 9.91, delta=0.1)
+        self.assertEqual(histogram.percentile(0), 0.01)
+        self.assertEqual(histogram.percentile(100), 1000.0)
+        histogram.reset()
+        self.assertEqual(histogram.total, 0)
+        self.assertEqual(histogram.sum, 0.0)
+
+    def test_merge(self):
+        histogram = meter.HdrHistogramMeter()
+        other = meter.HdrHistogramMeter()
+        self.assertEqual((histogram.lowest, histogram.highest, histogram.digits), (0.000001, 3600.0, 2))  # noqa:E501
+        self.assertRaises(ValueError, histogram.merge, meter.HdrHistogramMeter(digits=3))  # noqa:E501
+        histogram.merge(other)
+        self.assertEqual(histogram.total, 0)
+        other.observe(1.5, 2)
+        histogram.merge(other)
+        self.assertEqual(histogram.minimum, 1.5)
+        other.observe(0.5)
+        histogram.merge(other)
+        self.assertEqual(histogram.total, 5)
+        self.assertEqual(histogram.minimum, 0.5)
+        self.assertEqual(histogram.maximum, 1.5)
+        self.assertEqual(histogram.sum, 6.5)
+
+
+class TestTDigestMeter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_observe(self):
+        self.assertRaises(ValueError, meter.TDigestMeter, 1)
+        digest = meter.TDigestMeter(50)
+        self.assertEqual(str(digest), f"TDigestMeter({id(digest)})")
+        self.assertEqual(digest.compression, 50.0)
+        self.assertEqual(digest.mean, 0.0)
+        self.assertEqual(digest.percentile(50), 0.0)
+        self.assertRaises(ValueError, digest.percentile, -1)
+        digest.observe(1.0)
+        self.assertEqual(digest.percentile(50), 1.0)
+        for i in range(2, 10001):
+            digest.observe(float(i))
+        self.assertEqual(digest.total, 10000)
+        self.assertEqual(digest.minimum, 1.0)
+        self.assertEqual(digest.maximum, 10000.0)
+        self.assertEqual(digest.mean, 5000.5)
+        self.assertLess(len(digest.centroids), 100)
+        self.assertEqual(digest.percentile(0), 1.0)
+        self.assertEqual(digest.percentile(100), 10000.0)
+        self.assertAlmostEqual(digest.percentile(50), 5000.0, delta=100.0)
+        self.assertAlmostEqual(digest.percentile(99), 9900.0, delta=20.0)
+        digest.reset()
+        self.assertEqual(digest.total, 0)
+        self.assertEqual(digest.centroids, [])
+
+    def test_merge(self):
+        digest = meter.TDigestMeter()
+        other = meter.TDigestMeter()
+        digest.merge(other)
+        self.assertEqual(digest.total, 0)
+        for i in range(100):
+            other.observe(float(i))
+        digest.merge(other)
+        digest.observe(-1.0)
+        digest.merge(other)
+        self.assertEqual(digest.total, 201)
+        self.assertEqual(digest.minimum, -1.0)
+        self.assertEqual(digest.maximum, 99.0)
+        self.assertEqual(digest.sum, 9899.0)
+        self.assertAlmostEqual(digest.percentile(50), 49.5, delta=2.0)
+
+
 if __name__ == "__main__":
     unittest.main()
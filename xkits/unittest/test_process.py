@@ -0,0 +1,150 @@
+# coding:utf-8
+
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from xkits import ProcessTaskJob
+from xkits import ProcessTaskPool
+from xkits import SharedBytes
+from xkits import TaskJob
+
+INITIALIZED: str = "XKITS_PROCESS_INITIALIZED"
+
+
+def initialize(value: str):
+    os.environ[INITIALIZED] = value
+
+
+def initialized() -> str:
+    return os.environ.get(INITIALIZED, "")
+
+
+def describe(data: bytes, *, tail: bytes = b"") -> str:
+    return f"{type(data).__name__}:{len(data)}:{len(tail)}"
+
+
+class test_shared_bytes(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_shared_bytes(self):
+        shared = SharedBytes(b"unittest")
+        self.assertEqual(shared.size, 8)
+        self.assertEqual(shared.load(), b"unittest")
+        attached = pickle.loads(pickle.dumps(shared))
+        self.assertEqual(attached.name, shared.name)
+        self.assertEqual(attached.load(), b"unittest")
+        attached.release()  # not the creator
+        shared.release()
+        shared.release()
+        self.assertRaises(FileNotFoundError, attached.load)
+        self.assertEqual(SharedBytes(b"").size, 0)
+
+    def test_invoke(self):
+        shared = SharedBytes(b"unittest")
+        self.assertEqual(ProcessTaskJob.invoke(describe, (shared,), {"tail": shared}), "bytes:8:8")  # noqa:E501
+        shared.release()
+
+
+class test_process_pool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_submit(self):
+        pool = ProcessTaskPool(2, initializer=initialize, initargs=("yes",), share=16)  # noqa:E501
+        self.assertFalse(pool.running)
+        self.assertRaises(RuntimeError, pool.submit_task, abs, -1)
+        self.assertEqual(len(pool), 0)
+        with pool:
+            self.assertTrue(pool.running)
+            self.assertEqual(pool.share, 16)
+            job = pool.submit_task(abs, -1)
+            self.assertIsInstance(job, TaskJob)
+            self.assertEqual(pool.take(job.id, 10), 1)
+            self.assertNotIn(job.id, pool)
+            self.assertEqual(pool.submit_task(initialized).future.result(10), "yes")  # noqa:E501
+            job = pool.submit_task(describe, b"x" * 64, tail=bytearray(32))
+            self.assertEqual(job.future.result(10), "bytes:64:32")
+            job = pool.submit_task(describe, b"x" * 8)
+            self.assertEqual(job.future.result(10), "bytes:8:0")
+            failure = pool.submit_task(int, "x")
+            self.assertRaises(ValueError, failure.future.result, 10)
+            self.assertEqual(list(pool.map(pow, range(5), [2] * 5, chunksize=2)), [0, 1, 4, 9, 16])  # noqa:E501
+            pool.barrier()
+            self.assertEqual(pool.status_counter.success, 4)
+            self.assertEqual(pool.status_counter.failure, 1)
+        self.assertFalse(pool.running)
+
+    def test_retain(self):
+        with ProcessTaskPool(1, retain=2) as pool:
+            self.assertEqual(pool.retain, 2)
+            jobs = [pool.submit_task(abs, -index) for index in range(5)]
+            pool.barrier()
+            self.assertEqual(list(pool), [job.id for job in jobs[-2:]])
+            self.assertEqual(pool.take(jobs[-1].id), 4)
+            self.assertEqual(len(pool), 1)
+
+    def test_dispatch_failure(self):
+        with ProcessTaskPool(1, share=16) as pool:
+            with mock.patch.object(SharedBytes, "release", autospec=True, side_effect=SharedBytes.release) as release:  # noqa:E501
+                with mock.patch.object(pool.executor, "submit", side_effect=RuntimeError):  # noqa:E501
+                    self.assertRaises(RuntimeError, pool.submit_task, describe, b"x" * 64)  # noqa:E501
+                release.assert_called_once()
+            self.assertEqual(len(pool), 0)
+
+    def test_shared_tracker(self):
+        script: str = "\n".join([
+            "from xkits import ProcessTaskPool",
+            "with ProcessTaskPool(2, share=16) as pool:",
+            "    pool.submit_task(abs, -1).wait()",
+            "    pool.submit_task(len, b'x' * 64).wait()",
+        ])
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)  # noqa:E501
+        self.assertNotIn("leaked", result.stderr)
+
+    def test_cancel(self):
+        job = ProcessTaskJob(1, abs, -1)
+        self.assertRaises(AssertionError, job.call)
+        self.assertIsNone(job.remote)
+        self.assertTrue(job.cancel())
+        with ProcessTaskPool(1) as pool:
+            jobs = [pool.submit_task(sum, range(10 ** 7)) for _ in range(8)]
+            cancelled = [job.cancel() for job in jobs]
+            self.assertIn(True, cancelled)
+            self.assertTrue(jobs[-1].done())
+            self.assertFalse(jobs[0].cancel())
+            self.assertRaises(TimeoutError, pool.take, jobs[0].id, 0)
+            pool.shutdown()
+            self.assertEqual(pool.status_counter.total, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
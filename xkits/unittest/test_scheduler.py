@@ -0,0 +1,341 @@
+# coding:utf-8
+
+from datetime import datetime
+from functools import partial
+from queue import Empty
+from queue import Full
+from time import sleep
+import unittest
+
+from xkits import CronSchedule
+from xkits import DaemonSchedule
+from xkits import DaemonScheduler
+from xkits import DaemonTaskJob
+from xkits import IntervalSchedule
+from xkits import PriorityScheduler
+from xkits import TaskJob
+from xkits import TaskPool
+from xkits import TaskScheduler
+from xkits import TaskTimer
+from xkits import ThreadPool
+from xkits import WorkStealingScheduler
+
+
+class test_task_scheduler(unittest.TestCase):
+
+    def test_fifo(self):
+        scheduler = TaskScheduler(workers=2)
+        self.assertEqual(scheduler.workers, 2)
+        self.assertTrue(scheduler.empty())
+        jobs = [TaskJob(i, print) for i in range(1, 4)]
+        for job in jobs:
+            scheduler.put(job)
+        self.assertEqual(len(scheduler), 3)
+        self.assertIs(scheduler.get(), jobs[0])
+        scheduler.put(None)
+        self.assertIs(scheduler.get(1), jobs[1])
+        self.assertEqual(scheduler.drain(), [jobs[2]])
+        self.assertTrue(scheduler.empty())
+
+    def test_work_stealing(self):
+        scheduler = WorkStealingScheduler(workers=2, maxsize=4)
+        jobs = [TaskJob(i, print) for i in range(1, 5)]
+        for job in jobs:
+            scheduler.put(job)  # round-robin
+        self.assertEqual(len(scheduler), 4)
+        self.assertRaises(Full, scheduler.put, TaskJob(5, print), False)
+        self.assertIs(scheduler.get(0), jobs[0])
+        self.assertIs(scheduler.get(0), jobs[2])
+        self.assertIs(scheduler.get(0), jobs[3])  # stolen from worker 1
+        self.assertIs(scheduler.get(0), jobs[1])
+        self.assertTrue(scheduler.empty())
+        scheduler.put(jobs[0])  # local push from worker 0
+        scheduler.put(None)
+        self.assertIs(scheduler.get(0), jobs[0])
+        self.assertIsNone(scheduler.get(1))
+        scheduler.put(jobs[1])
+        self.assertEqual(scheduler.drain(), [jobs[1]])
+
+    def test_priority(self):
+        scheduler = PriorityScheduler(maxsize=4)
+        jobs = [TaskJob(i, print) for i in range(1, 5)]
+        jobs[1].priority = -1
+        jobs[3].priority = 1
+        for job in jobs:
+            scheduler.put(job)
+        self.assertEqual(len(scheduler), 4)
+        self.assertRaises(Full, scheduler.put, TaskJob(5, print), False)
+        self.assertEqual([scheduler.get() for _ in range(4)],
+                         [jobs[1], jobs[0], jobs[2], jobs[3]])
+        self.assertTrue(scheduler.empty())
+        scheduler.put(jobs[0])
+        scheduler.put(None)
+        self.assertIs(scheduler.get(), jobs[0])
+        self.assertIsNone(scheduler.get())
+        scheduler.put(jobs[1])
+        self.assertEqual(scheduler.drain(), [jobs[1]])
+
+    def test_fair_queueing(self):
+        self.assertRaises(ValueError, PriorityScheduler, weights={"a": 0})
+        scheduler = PriorityScheduler(weights={"a": 2})
+        self.assertEqual(scheduler.weights, {"a": 2})
+        for index in range(6):
+            job = TaskJob(index + 1, print)
+            job.tag = "a" if index < 4 else "b"
+            self.assertEqual(job.tag, "a" if index < 4 else "b")
+            scheduler.put(job)
+        tags = [job.tag for job in iter(lambda: scheduler.get() if not scheduler.empty() else None, None)]  # noqa:E501
+        self.assertEqual(tags, ["a", "a", "b", "a", "a", "b"])
+
+    def test_blocking_put(self):
+        scheduler = PriorityScheduler(maxsize=1)
+        job = TaskJob(1, print)
+        scheduler.put(job)
+        with ThreadPool(2) as executor:
+            future = executor.submit(scheduler.put, TaskJob(2, print))
+            sleep(0.1)
+            self.assertFalse(future.done())
+            self.assertIs(scheduler.get(), job)
+            future.result()
+        self.assertEqual(len(scheduler), 1)
+        with ThreadPool(2) as executor:
+            self.assertEqual(scheduler.get().id, 2)
+            future = executor.submit(scheduler.get)
+            sleep(0.1)
+            scheduler.put(job)
+            self.assertIs(future.result(), job)
+
+    def test_priority_task_pool(self):
+        results = []
+        tasker = TaskPool(1, scheduler=PriorityScheduler)
+        for index in range(3):
+            tasker.submit_task(results.append, index)
+        self.assertEqual(tasker.submit_priority_task(-1, results.append, -1).priority, -1)  # noqa:E501
+        tasker.startup()
+        tasker.shutdown()
+        self.assertEqual(results, [-1, 0, 1, 2])
+        self.assertRaises(ValueError, TaskPool(1).submit_priority_task, 0, print)  # noqa:E501
+        self.assertRaises(ValueError, TaskPool(1, scheduler=WorkStealingScheduler).submit_priority_task, 0, print)  # noqa:E501
+
+    def test_fair_task_pool(self):
+        results = []
+        tasker = TaskPool(1, scheduler=partial(PriorityScheduler, weights={"b": 2}))  # noqa:E501
+        for index in range(4):
+            job = tasker.submit_priority_task(0, results.append, f"a{index}", tag="a")  # noqa:E501
+            self.assertEqual(job.tag, "a")
+            self.assertEqual(job.kwargs, {})
+        for index in range(4):
+            tasker.submit_priority_task(0, results.append, f"b{index}", tag="b")  # noqa:E501
+        tasker.startup()
+        tasker.shutdown()
+        self.assertEqual(results, ["b0", "a0", "b1", "b2", "a1", "b3", "a2", "a3"])  # noqa:E501
+
+    def test_timeout(self):
+        for scheduler in (TaskScheduler(), WorkStealingScheduler(),
+                          PriorityScheduler()):
+            self.assertRaises(Empty, scheduler.get, 0, 0.01)
+
+    def test_full(self):
+        for scheduler in (TaskScheduler(maxsize=2), WorkStealingScheduler(2, maxsize=2),  # noqa:E501
+                          PriorityScheduler(maxsize=2)):
+            self.assertIsNone(scheduler.discard())
+            jobs = [TaskJob(i, print) for i in range(1, 4)]
+            scheduler.put(jobs[0])
+            scheduler.put(jobs[1])
+            self.assertRaises(Full, scheduler.put, jobs[2], False)
+            self.assertRaises(Full, scheduler.put, jobs[2], True, 0.01)
+            self.assertIs(scheduler.discard(), jobs[0])
+            scheduler.put(jobs[2], True, 0.01)
+            self.assertEqual(len(scheduler), 2)
+            self.assertEqual({scheduler.discard(), scheduler.discard()}, set(jobs[1:]))  # noqa:E501
+            scheduler.put(None)
+            self.assertIsNone(scheduler.discard())
+            self.assertIsNone(scheduler.get())
+
+    def test_wakeup(self):
+        scheduler = WorkStealingScheduler(workers=2)
+        job = TaskJob(1, print)
+        with ThreadPool(2) as executor:
+            future = executor.submit(scheduler.get, 1)
+            sleep(0.1)
+            scheduler.put(job)
+            self.assertIs(future.result(), job)
+
+    def test_task_pool(self):
+        results = []
+        with TaskPool(4, scheduler=WorkStealingScheduler) as tasker:
+            self.assertIsInstance(tasker.jobs, WorkStealingScheduler)
+            for index in range(100):
+                tasker.submit_task(results.append, index)
+            tasker.submit_delay_task(0.01, results.append, 100)
+            tasker.barrier()
+            self.assertEqual(sorted(results), list(range(101)))
+            self.assertEqual(tasker.status_counter.success, 101)
+
+
+class test_task_timer(unittest.TestCase):
+
+    def test_timer(self):
+        calls = []
+        timer = TaskTimer("unittest_timer")
+        self.assertEqual(timer.name, "unittest_timer")
+        self.assertFalse(timer.running)
+        self.assertFalse(timer.schedule(0, calls.append, 0))
+        timer.startup()
+        timer.startup()
+        self.assertTrue(timer.running)
+        self.assertTrue(timer.schedule(0.2, calls.append, 2))
+        self.assertTrue(timer.schedule(0.1, calls.append, 1))
+        self.assertTrue(timer.schedule(0, calls.__getitem__, 10))  # raises
+        self.assertTrue(timer.schedule(10, calls.append, 4))
+        self.assertTrue(timer.schedule(5, calls.append, 3))
+        sleep(0.3)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(len(timer), 2)
+        pending = timer.shutdown()
+        self.assertEqual(pending, [(calls.append, (3,)), (calls.append, (4,))])
+        self.assertFalse(timer.running)
+        self.assertEqual(timer.shutdown(), [])
+
+    def test_delay_jobs(self):
+        results = []
+        with TaskPool(2) as tasker:
+            for index in range(100):
+                tasker.submit_delay_task(0.2, results.append, index)
+            sleep(0.05)
+            self.assertEqual(len(tasker.timer), 100)
+            self.assertTrue(tasker.jobs.empty())
+            self.assertEqual(results, [])
+            sleep(0.3)
+            self.assertEqual(len(tasker.timer), 0)
+            self.assertEqual(sorted(results), list(range(100)))
+            tasker.submit_delay_task(0.5, results.append, 100)
+            tasker.shutdown()  # pending delay jobs are released
+            self.assertEqual(results[-1], 100)
+            self.assertFalse(tasker.timer.running)
+            tasker.startup()
+            self.assertTrue(tasker.timer.running)
+
+    def test_delay_job_before_startup(self):
+        results = []
+        tasker = TaskPool(1)
+        tasker.submit_delay_task(0.2, results.append, 1)
+        tasker.startup()
+        sleep(0.05)
+        self.assertEqual(len(tasker.timer), 1)  # deferred by the worker
+        sleep(0.3)
+        self.assertEqual(results, [1])
+        tasker.shutdown()
+
+
+class test_daemon_schedule(unittest.TestCase):
+
+    def test_backoff(self):
+        schedule = DaemonSchedule(backoff=1, max_backoff=5)
+        self.assertEqual(schedule.jitter, 0.0)
+        self.assertEqual(schedule.first(), 0.0)
+        self.assertEqual([schedule.delay(0.1, failures) for failures in range(5)], [0.0, 1.0, 2.0, 4.0, 5.0])  # noqa:E501
+        self.assertEqual(schedule.delay(0.1, 10000), 5.0)
+        schedule = DaemonSchedule(jitter=0.5)
+        self.assertTrue(all(0.0 <= schedule.delay(0.0, 3) <= 0.5 for _ in range(100)))  # noqa:E501
+        self.assertEqual(DaemonSchedule(backoff=10).max_backoff, 300.0)
+
+    def test_interval(self):
+        schedule = IntervalSchedule(2, backoff=3)
+        self.assertEqual(schedule.interval, 2.0)
+        self.assertFalse(schedule.fixed_rate)
+        self.assertEqual(schedule.delay(0.5), 2.0)
+        self.assertEqual(schedule.delay(0.5, 2), 6.0)
+        schedule = IntervalSchedule(2, fixed_rate=True)
+        self.assertEqual(schedule.delay(0.5), 1.5)
+        self.assertEqual(schedule.delay(3.0), 0.0)
+        self.assertRaises(ValueError, IntervalSchedule, -1)
+
+    def test_cron(self):
+        schedule = CronSchedule("*/15 9-17 * * 1-5")
+        self.assertEqual(str(schedule), "CronSchedule('*/15 9-17 * * 1-5')")
+        self.assertEqual(schedule.expr, "*/15 9-17 * * 1-5")
+        friday = datetime(2024, 3, 1, 17, 50, 30)
+        self.assertEqual(schedule.due(datetime(2024, 3, 1, 9, 0)), datetime(2024, 3, 1, 9, 15))  # noqa:E501
+        self.assertEqual(schedule.due(friday), datetime(2024, 3, 4, 9, 0))
+        schedule = CronSchedule("0 0 29 2 *")
+        self.assertEqual(schedule.due(friday), datetime(2028, 2, 29, 0, 0))
+        schedule = CronSchedule("30 6 1,15 * 0")  # day or Sunday
+        self.assertEqual(schedule.due(friday), datetime(2024, 3, 3, 6, 30))
+        self.assertEqual(schedule.due(datetime(2024, 3, 11)), datetime(2024, 3, 15, 6, 30))  # noqa:E501
+        self.assertEqual(CronSchedule("0 12 * 12 7").due(friday), datetime(2024, 12, 1, 12, 0))  # noqa:E501
+        self.assertEqual(CronSchedule("5/20 * * * *").due(friday), datetime(2024, 3, 1, 18, 5))  # noqa:E501
+        self.assertLessEqual(CronSchedule("* * * * *").first(), 60.0)
+        self.assertEqual(CronSchedule.parse("1-10/3,20", 0, 59), {1, 4, 7, 10, 20})  # noqa:E501
+        for expr in ("* * * *", "60 * * * *", "* * 0 * *", "*/0 * * * *",
+                     "5-1 * * * *", "x * * * *", "0 0 30 2 *"):
+            self.assertRaises(ValueError, CronSchedule, expr)
+
+
+class test_daemon_scheduler(unittest.TestCase):
+
+    def test_scheduler(self):
+        calls = []
+        jobs = [DaemonTaskJob.create_periodic_task(IntervalSchedule(0.05), calls.append, i) for i in range(100)]  # noqa:E501
+        scheduler = DaemonScheduler(workers=2, name="unittest")
+        self.assertEqual(scheduler.name, "unittest")
+        self.assertEqual(scheduler.workers, 2)
+        self.assertRaises(RuntimeError, scheduler.submit, jobs[0])
+        with scheduler:
+            self.assertTrue(scheduler.running)
+            for job in jobs:
+                job.run_in_scheduler(scheduler)
+            scheduler.submit(jobs[0])  # already running
+            self.assertEqual(len(scheduler), 100)
+            self.assertIn(jobs[0], scheduler)
+            sleep(0.12)
+            self.assertTrue(all(job.daemon_running for job in jobs))
+            self.assertTrue(all(2 <= job.daemon_counter.success <= 4 for job in jobs))  # noqa:E501
+            jobs[0].shutdown()
+            self.assertFalse(jobs[0].daemon_running)
+            self.assertNotIn(jobs[0], scheduler)
+            self.assertTrue(jobs[0].done())
+            self.assertIsNone(jobs[0].result)
+            jobs[0].startup()  # back on the scheduler
+            self.assertIn(jobs[0], scheduler)
+            scheduler.wakeup(jobs[0])
+        self.assertFalse(scheduler.running)
+        self.assertEqual(len(scheduler), 0)
+        self.assertTrue(all(job.done() and not job.daemon_running for job in jobs))  # noqa:E501
+        scheduler.shutdown()
+        jobs[1].shutdown()
+
+    def test_backoff(self):
+        job = DaemonTaskJob.create_periodic_task(IntervalSchedule(0.01, backoff=0.2), int, "x")  # noqa:E501
+        cancelled = DaemonTaskJob.create_daemon_task(int, "x")
+        self.assertTrue(cancelled.cancel())
+        with DaemonScheduler() as scheduler:
+            scheduler.submit(job)
+            scheduler.submit(cancelled)
+            self.assertNotIn(cancelled, scheduler)
+            self.assertFalse(cancelled.daemon_running)
+            sleep(0.1)
+            self.assertEqual(job.daemon_counter.failure, 1)
+            self.assertEqual(job.failures, 1)
+        self.assertRaises(ValueError, getattr, job, "result")
+
+    def test_wakeup(self):
+        calls = []
+        job = DaemonTaskJob.create_periodic_task(IntervalSchedule(0.2), calls.append, 1)  # noqa:E501
+        slow = DaemonTaskJob.create_periodic_task(IntervalSchedule(0.2), sleep, 0.1)  # noqa:E501
+        with DaemonScheduler() as scheduler:
+            scheduler.submit(job)
+            sleep(0.05)
+            scheduler.wakeup(job)  # call now, the earlier due is outdated
+            sleep(0.05)
+            self.assertEqual(calls, [1, 1])
+            sleep(0.2)
+            self.assertEqual(calls, [1, 1, 1])
+            scheduler.submit(slow)
+            sleep(0.02)
+            slow.shutdown()  # stopped while being called
+            self.assertTrue(slow.done())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# coding:utf-8
+
+import random
+import unittest
+
+from xkits import TaskMetrics
+
+
+class test_task_metrics(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_percentile_accuracy(self):
+        rand = random.Random(1)
+        metrics: TaskMetrics = TaskMetrics(digits=2)
+        runs = sorted(rand.expovariate(1 / 0.05) for _ in range(20000))
+        for run in rand.sample(runs, len(runs)):
+            metrics.start()
+            metrics.finish(0.001, run)
+        for percent in (50, 90, 99, 99.9):
+            exact: float = runs[int(len(runs) * percent / 100) - 1]
+            self.assertAlmostEqual(metrics.run.percentile(percent), exact, delta=exact * 0.01)  # noqa:E501
+            self.assertAlmostEqual(metrics.latency.percentile(percent), exact + 0.001, delta=(exact + 0.001) * 0.01)  # noqa:E501
+        self.assertAlmostEqual(metrics.wait.percentile(99), 0.001, delta=0.00001)  # noqa:E501
+        self.assertEqual(metrics.run.maximum, runs[-1])
+        metrics.start()
+        metrics.finish(0.0, TaskMetrics.HIGHEST * 2)  # clamped
+        self.assertEqual(metrics.run.percentile(100), TaskMetrics.HIGHEST * 2)
+        self.assertEqual(metrics.completed, 20001)
+
+
+if __name__ == "__main__":
+    unittest.main()
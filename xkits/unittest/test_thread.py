@@ -1,15 +1,26 @@
 # coding:utf-8
 
+import asyncio
+from concurrent.futures import CancelledError
+from queue import Full
+from threading import Event
+from threading import Thread
+from threading import Timer
+from time import monotonic
 from time import sleep
 from time import time
 import unittest
 
+from xkits import Backpressure
 from xkits import DaemonTaskJob
 from xkits import DelayTaskJob
+from xkits import IntervalSchedule
 from xkits import NamedLock
 from xkits import TaskJob
+from xkits import TaskMetrics
 from xkits import TaskPool
 from xkits import ThreadPool
+from xkits import as_completed
 
 
 class test_named_lock(unittest.TestCase):
@@ -134,6 +145,162 @@ class test_task_pool(unittest.TestCase):
             pool.submit(run_job, task)
             task.shutdown()
 
+    def test_job_future(self):
+        done = []
+        job: TaskJob = TaskJob(1, sum, (1, 2))
+        self.assertFalse(job.done())
+        self.assertFalse(job.wait(0.01))
+        job.add_done_callback(done.append)
+        self.assertTrue(job.run())
+        self.assertTrue(job.done())
+        self.assertTrue(job.wait())
+        self.assertEqual(job.future.result(), 3)
+        self.assertEqual(done, [job])
+        job.add_done_callback(done.append)  # already done
+        self.assertEqual(done, [job, job])
+        self.assertTrue(job.run())  # run again with a new future
+        self.assertEqual(job.future.result(), 3)
+        failure: TaskJob = TaskJob(2, int, "x")
+        self.assertFalse(failure.run())
+        self.assertIsInstance(failure.future.exception(), ValueError)
+        cancel: TaskJob = TaskJob(3, sum, (1, 2))
+        self.assertTrue(cancel.cancel())
+        self.assertFalse(cancel.run())
+        self.assertRaises(CancelledError, lambda: cancel.result)
+
+    def test_job_running(self):
+        event = Event()
+        job: TaskJob = TaskJob(1, event.wait, 5)
+        with ThreadPool(1) as pool:
+            pool.submit(job.run)
+            sleep(0.1)
+            self.assertFalse(job.cancel())
+            self.assertFalse(job.run())  # already started
+            event.set()
+            job.shutdown()
+            self.assertTrue(job.done())
+            self.assertTrue(job.future.result())
+
+    def test_job_await(self):
+        async def main(job: TaskJob):
+            return await job
+
+        job: TaskJob = TaskJob(1, sum, (1, 2))
+        job.run()
+        self.assertEqual(asyncio.run(main(job)), 3)
+
+    def test_as_completed(self):
+        with TaskPool(2) as tasker:
+            slow = tasker.submit_task(sleep, 0.2)
+            fast = tasker.submit_task(sleep, 0.01)
+            self.assertEqual(list(as_completed([slow, fast])), [fast, slow])
+            slow = tasker.submit_task(sleep, 0.5)
+            self.assertRaises(TimeoutError, list, as_completed([slow], 0.01))
+
+    def test_retain(self):
+        with TaskPool(2, retain=3) as tasker:
+            self.assertEqual(tasker.retain, 3)
+            self.assertEqual(tasker.retention, 0.0)
+            jobs = [tasker.submit_task(abs, -index) for index in range(10)]
+            for job in jobs:
+                job.wait()
+            sleep(0.01)  # done callbacks run after waiters are notified
+            self.assertEqual(len(tasker), 3)
+            job = tasker.submit_task(sleep, 0.2)
+            self.assertRaises(TimeoutError, tasker.take, job.id, 0.01)
+            self.assertIsNone(tasker.take(job.id))
+            self.assertNotIn(job.id, tasker)
+            self.assertRaises(KeyError, tasker.take, job.id)
+
+    def test_retention(self):
+        with TaskPool(2, retention=0.1) as tasker:
+            self.assertEqual(tasker.retention, 0.1)
+            first = tasker.submit_task(abs, -1)
+            first.wait()
+            sleep(0.01)
+            self.assertIn(first.id, tasker)
+            sleep(0.1)
+            tasker.submit_task(abs, -2).wait()
+            sleep(0.01)
+            self.assertNotIn(first.id, tasker)
+            self.assertEqual(len(tasker), 1)
+            sleep(0.1)  # dropped without another job finishing
+            self.assertEqual(len(tasker), 0)
+
+    def test_elastic(self):
+        event = Event()
+        with TaskPool(1, max_workers=3, keepalive=0.1) as tasker:
+            self.assertEqual(tasker.max_workers, 3)
+            self.assertEqual(tasker.keepalive, 0.1)
+            sleep(0.05)
+            self.assertEqual(tasker.idle_workers, 1)
+            jobs = [tasker.submit_task(event.wait, 5) for _ in range(4)]
+            sleep(0.05)
+            self.assertEqual(len(tasker.threads), 3)
+            self.assertEqual(tasker.grow_counter.total, 2)
+            self.assertEqual(tasker.idle_workers, 0)
+            event.set()
+            for job in jobs:
+                job.wait()
+            sleep(0.3)
+            self.assertEqual(len(tasker.threads), 1)
+            self.assertEqual(tasker.shrink_counter.total, 2)
+            tasker.submit_task(abs, 1).wait()
+            self.assertEqual(tasker.status_counter.success, 5)
+
+    def test_metrics(self):
+        event = Event()
+        with TaskPool(1) as tasker:
+            metrics: TaskMetrics = tasker.metrics
+            tasker.submit_task(event.wait, 5)
+            sleep(0.02)
+            self.assertEqual(metrics.active, 1)
+            cancelled = tasker.submit_task(abs, 1)
+            jobs = [tasker.submit_task(abs, -i) for i in range(3)]
+            self.assertEqual(metrics.depth, 4)
+            self.assertTrue(cancelled.cancel())
+            sleep(0.02)
+            event.set()
+            delayed = tasker.submit_delay_task(0.02, abs, -3)
+            self.assertEqual(tasker.take(delayed.id), 3)
+            for job in jobs:
+                self.assertGreater(job.queue_timer.runtime, 0.02)
+        self.assertEqual(metrics.submitted, 6)
+        self.assertEqual(metrics.completed, 5)
+        self.assertEqual(metrics.active, 0)
+        self.assertEqual(metrics.peak_depth, 4)
+        self.assertGreater(metrics.wait.maximum, 0.02)
+        self.assertGreater(metrics.run.maximum, 0.02)
+        self.assertLess(delayed.queue_timer.runtime, 0.02)
+        self.assertGreaterEqual(metrics.latency.maximum, metrics.run.maximum)  # noqa:E501
+        self.assertGreater(metrics.throughput, 0.0)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["completed"], 5)
+        self.assertEqual(snapshot["latency_p99"], metrics.latency.percentile(99))  # noqa:E501
+        metrics.reset()
+        self.assertEqual(metrics.submitted, 0)
+        self.assertEqual(metrics.completed, 0)
+        self.assertEqual(metrics.peak_depth, 0)
+        self.assertEqual(TaskMetrics().depth, 0)
+
+    def test_daemon_job_schedule(self):
+        calls = []
+        job = DaemonTaskJob.create_periodic_task(IntervalSchedule(10), calls.append, 1)  # noqa:E501
+        self.assertIsInstance(job.schedule, IntervalSchedule)
+        job.startup()
+        sleep(0.05)
+        self.assertEqual(calls, [1])  # waiting for the next call
+        started = time()
+        job.shutdown()
+        self.assertLess(time() - started, 1.0)
+        self.assertTrue(job.result is None and job.done())
+        job.schedule = IntervalSchedule(0.01, backoff=10)
+        job = DaemonTaskJob.create_periodic_task(job.schedule, int, "x")
+        job.startup()
+        sleep(0.05)
+        job.shutdown()
+        self.assertEqual(job.daemon_counter.failure, 1)
+
     def test_daemon_job_1(self):
         def handle():
             sleep(0.01)
@@ -222,5 +389,190 @@ class test_task_pool(unittest.TestCase):
             self.assertTrue(tasker.running)
 
 
+class test_task_pool_map(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_submit_many(self):
+        with TaskPool(2) as tasker:
+            self.assertEqual(tasker.submit_many(abs, []), [])
+            first = tasker.submit_task(abs, 0)
+            jobs = tasker.submit_many(abs, [-1, -2, -3])
+            self.assertEqual([job.id for job in jobs], [first.id + 1, first.id + 2, first.id + 3])  # noqa:E501
+            self.assertEqual([tasker.take(job.id) for job in jobs], [1, 2, 3])
+            self.assertEqual(tasker.submit_task(abs, 0).id, first.id + 4)
+
+    def test_map(self):
+        with TaskPool(4) as tasker:
+            self.assertEqual(list(tasker.map(pow, range(10), [2] * 10, chunksize=3)), [i * i for i in range(10)])  # noqa:E501
+            self.assertEqual(sorted(tasker.map(abs, range(-5, 5), ordered=False, timeout=5)), sorted(abs(i) for i in range(-5, 5)))  # noqa:E501
+            self.assertEqual(len(tasker), 0)  # taken jobs are removed
+            self.assertRaises(ValueError, tasker.map, abs, [1], chunksize=0)
+            results = tasker.map(int, ["1", "x", "3"])
+            self.assertEqual(next(results), 1)
+            self.assertRaises(ValueError, next, results)
+            results = tasker.map(sleep, [0.5, 0.5], timeout=0.01)
+            self.assertRaises(TimeoutError, next, results)
+            results = tasker.map(sleep, [0.5], ordered=False, timeout=0.01)
+            self.assertRaises(TimeoutError, next, results)
+            self.assertEqual(list(tasker.map(abs, [])), [])
+            tasker.barrier()
+            self.assertEqual(len(tasker), 0)
+
+    def test_map_retain(self):
+        with TaskPool(4, retain=2) as tasker:
+            self.assertEqual(list(tasker.map(abs, range(-10, 0))), list(range(10, 0, -1)))  # noqa:E501
+            self.assertEqual(sorted(tasker.map(abs, range(10), ordered=False)), list(range(10)))  # noqa:E501
+        with TaskPool(4, retention=0.01) as tasker:
+            results = tasker.map(abs, range(10))
+            sleep(0.05)
+            tasker.submit_task(abs, 0).wait()  # drop the finished jobs
+            sleep(0.01)
+            self.assertEqual(list(results), list(range(10)))
+
+    def test_map_cancel(self):
+        with TaskPool(1) as tasker:
+            results = tasker.map(sleep, [0.2] * 5, timeout=0.01)
+            self.assertRaises(TimeoutError, next, results)
+            tasker.barrier()
+            self.assertGreaterEqual(tasker.status_counter.failure, 4)
+            results = tasker.map(sleep, [0.2] * 5)
+            self.assertIsNone(next(results))
+            results.close()  # abandon the results
+            tasker.barrier()
+            self.assertGreaterEqual(tasker.status_counter.failure, 7)
+            self.assertEqual(len(tasker), 0)
+
+
+class test_task_pool_backpressure(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pass
+
+    @classmethod
+    def tearDownClass(cls):
+        pass
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_backpressure(self):
+        event = Event()
+        with TaskPool(1, jobs=1, submit_timeout=0.01) as tasker:
+            self.assertIs(tasker.backpressure, Backpressure.BLOCK)
+            self.assertEqual(tasker.submit_timeout, 0.01)
+            tasker.submit_task(event.wait, 5)
+            sleep(0.05)
+            tasker.submit_task(abs, 1)
+            self.assertRaises(Full, tasker.submit_task, abs, 2)
+            self.assertEqual(tasker.rejected_counter.total, 1)
+            self.assertEqual(len(tasker), 2)
+            event.set()
+        event.clear()
+        with TaskPool(1, jobs=1, backpressure=Backpressure.REJECT) as tasker:
+            tasker.submit_task(event.wait, 5)
+            sleep(0.05)
+            tasker.submit_task(abs, 1)
+            self.assertRaises(Full, tasker.submit_task, abs, 2)
+            event.set()
+        event.clear()
+        with TaskPool(1, jobs=1, backpressure=Backpressure.CALLER_RUNS) as tasker:  # noqa:E501
+            tasker.submit_task(event.wait, 5)
+            sleep(0.05)
+            tasker.submit_task(abs, 1)
+            job = tasker.submit_task(abs, -2)
+            self.assertTrue(job.done())
+            self.assertEqual(job.result, 2)
+            event.set()
+        self.assertEqual(tasker.status_counter.success, 3)
+        event.clear()
+        with TaskPool(1, jobs=1, backpressure=Backpressure.DROP_OLDEST) as tasker:  # noqa:E501
+            tasker.submit_task(event.wait, 5)
+            sleep(0.05)
+            oldest = tasker.submit_task(abs, 1)
+            job = tasker.submit_task(abs, -2)
+            self.assertTrue(oldest.future.cancelled())
+            self.assertRaises(CancelledError, getattr, oldest, "result")
+            self.assertEqual(tasker.rejected_counter.total, 1)
+            event.set()
+            self.assertEqual(tasker.take(job.id), 2)
+        self.assertEqual(tasker.status_counter.failure, 1)
+
+    def test_draining_shutdown(self):
+        event = Event()
+        tasker = TaskPool(1)
+        tasker.startup()
+        running = tasker.submit_task(event.wait, 5)
+        sleep(0.05)
+        queued = [tasker.submit_task(abs, i) for i in range(3)]
+        delayed = tasker.submit_delay_task(5, abs, 1)
+        self.assertEqual(tasker.cancel_pending(), queued + [delayed])
+        self.assertTrue(all(job.future.cancelled() for job in queued))
+        queued = [tasker.submit_task(abs, i) for i in range(3)]
+        Timer(0.1, event.set).start()
+        self.assertEqual(tasker.shutdown(timeout=0.01), queued)
+        self.assertTrue(running.result)
+        self.assertEqual(tasker.status_counter.success, 1)
+        event.clear()
+        tasker.startup()
+        running = tasker.submit_task(event.wait, 0.05)
+        sleep(0.01)
+        queued = [tasker.submit_task(abs, i) for i in range(3)]
+        self.assertEqual(tasker.shutdown(cancel=True), queued)
+        self.assertTrue(running.done())
+        tasker.startup()
+        tasker.submit_task(abs, 1)
+        self.assertEqual(tasker.shutdown(timeout=1.0), [])
+        self.assertEqual(tasker.status_counter.success, 3)
+        tasker.submit_task(abs, 1)  # not started
+        self.assertEqual(len(tasker.shutdown()), 1)
+
+    def test_closing_shutdown(self):
+        event = Event()
+        tasker = TaskPool(1)
+        tasker.startup()
+        running = tasker.submit_task(event.wait, 5)
+        sleep(0.05)
+        stopper = Thread(target=tasker.shutdown)
+        stopper.start()
+        sleep(0.05)
+        started: float = monotonic()
+        self.assertRaises(RuntimeError, tasker.submit_task, abs, 1)
+        self.assertLess(monotonic() - started, 0.05)
+        event.set()
+        stopper.join()
+        self.assertTrue(running.result)
+        tasker.submit_task(abs, 1)  # not started, but not shutting down
+        self.assertEqual(len(tasker.shutdown()), 1)
+
+    def test_delay_backpressure(self):
+        event = Event()
+        with TaskPool(1, jobs=1, backpressure=Backpressure.REJECT) as tasker:
+            tasker.submit_task(event.wait, 5)
+            sleep(0.05)
+            delayed = tasker.submit_delay_task(0.01, abs, 1)
+            tasker.submit_task(abs, 2)
+            sleep(0.05)
+            self.assertTrue(delayed.future.cancelled())
+            self.assertEqual(tasker.rejected_counter.total, 1)
+            event.set()
+
+
 if __name__ == "__main__":
     unittest.main()